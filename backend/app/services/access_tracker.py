@@ -0,0 +1,76 @@
+"""
+Scenario access counts for cache warm-up
+Counts reads per (scenario id, lang) and saves them as a JSON snapshot, so the next instance can
+warm the pairs that were hot on the previous one
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class AccessTracker:
+    """
+    Thread-safe access counts per (scenario id, lang), saved as a snapshot on shutdown so the next
+    instance knows which scenarios to warm up. Capped at max_keys distinct pairs; once full, pairs
+    not seen before are dropped rather than evicting established ones
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, max_keys: int = 10000):
+        self._counts: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._max_keys = max_keys
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def record(self, scenario_id: str, lang: str, count: float = 1) -> None:
+        pair = (scenario_id, lang)
+        with self._lock:
+            if pair in self._counts:
+                self._counts[pair] += count
+            elif len(self._counts) < self._max_keys:
+                self._counts[pair] = count
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """Most accessed (scenario id, lang) pairs first"""
+        with self._lock:
+            ranked = sorted(self._counts.items(), key=lambda item: (-item[1], item[0]))
+        return [pair for pair, _ in ranked[:limit]]
+
+    def counts(self) -> Dict[Tuple[str, str], float]:
+        with self._lock:
+            return dict(self._counts)
+
+    def save(self, path: Path) -> None:
+        """Write the counts as JSON, replacing path atomically"""
+        with self._lock:
+            counts = [[scenario_id, lang, count] for (scenario_id, lang), count in self._counts.items()]
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.SNAPSHOT_VERSION, 'saved_at': time.time(), 'counts': counts}, f)
+        os.replace(tmp, path)
+
+    def load(self, path: Path, decay: float = 0.5) -> int:
+        """
+        Add counts from a saved snapshot, scaled by decay so older traffic weighs less than this
+        instance's own; returns the number of pairs read, 0 when there is no usable snapshot
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('version') != self.SNAPSHOT_VERSION:
+                return 0
+            counts = [(str(s), str(lang), float(count)) for s, lang, count in snapshot['counts']]
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+        for scenario_id, lang, count in counts:
+            self.record(scenario_id, lang, count * decay)
+        return len(counts)
@@ -0,0 +1,220 @@
+"""
+Shared (L2) cache backends for PBLCacheService
+Lets Cloud Run instances share cached PBL data instead of each one re-reading GCS
+"""
+
+import fnmatch
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+try:
+    import redis
+except ImportError:  # Redis is optional, only needed for RedisCacheBackend
+    redis = None
+
+MessageHandler = Callable[[Dict[str, Any]], None]
+KeyFilter = Callable[[str], bool]
+
+# Optional entry metadata carried in the envelope, as (entry field, short name)
+ENTRY_FIELDS = (('stale_until', 's'), ('validator', 'g'), ('revalidate_until', 'r'))
+
+
+def encode_entry(entry: Dict[str, Any]) -> bytes:
+    """Serialize a cached value with its absolute expiry time and stale/revalidation metadata"""
+    data = {'v': entry['value'], 'e': entry['expires_at']}
+    for field, short in ENTRY_FIELDS:
+        if field in entry:
+            data[short] = entry[field]
+    return orjson.dumps(data)
+
+
+def decode_entry(payload: bytes) -> Dict[str, Any]:
+    """Inverse of encode_entry, returns an entry with value, expires_at and any metadata"""
+    data = orjson.loads(payload)
+    entry = {'value': data['v'], 'expires_at': data['e']}
+    for field, short in ENTRY_FIELDS:
+        if short in data:
+            entry[field] = data[short]
+    return entry
+
+
+def glob_escape(text: str) -> str:
+    """Escape glob metacharacters so text only matches itself"""
+    return ''.join(f'[{c}]' if c in '*?[]' else c for c in text)
+
+
+class CacheBackend:
+    """
+    Interface for a cache tier shared between instances
+    Values are opaque bytes; batch calls should be a single round trip
+    """
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Return payloads for the keys that exist"""
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[str, Tuple[bytes, float]]) -> None:
+        """Store {key: (payload, ttl)}, each key expiring after its own ttl in seconds"""
+        raise NotImplementedError
+
+    def delete_many(self, keys: List[str]) -> None:
+        """Delete keys, ignoring ones that do not exist"""
+        raise NotImplementedError
+
+    def delete_matching(self, patterns: List[str], key_filter: Optional[KeyFilter] = None) -> None:
+        """
+        Delete keys matching any of the glob patterns and, when given, key_filter
+        Glob * also matches colons, so callers that need exact segments pass a key_filter
+        """
+        raise NotImplementedError
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        """Broadcast an invalidation message to every subscribed instance"""
+        raise NotImplementedError
+
+    def subscribe(self, handler: MessageHandler) -> None:
+        """Register a handler for invalidation messages"""
+        raise NotImplementedError
+
+
+class LocalCacheBackend(CacheBackend):
+    """
+    In-process stand-in for a shared cache
+    Several PBLCacheService instances can share one to mimic Redis in tests and local dev
+    """
+
+    def __init__(self):
+        self._store: Dict[str, Tuple[bytes, float]] = {}
+        self._handlers: List[MessageHandler] = []
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        now = time.time()
+        found = {}
+        with self._lock:
+            for key in keys:
+                item = self._store.get(key)
+                if item is None:
+                    continue
+                if item[1] <= now:
+                    del self._store[key]
+                    continue
+                found[key] = item[0]
+        return found
+
+    def set_many(self, items: Dict[str, Tuple[bytes, float]]) -> None:
+        now = time.time()
+        with self._lock:
+            for key, (payload, ttl) in items.items():
+                self._store[key] = (payload, now + ttl)
+
+    def delete_many(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._store.pop(key, None)
+
+    def delete_matching(self, patterns: List[str], key_filter: Optional[KeyFilter] = None) -> None:
+        with self._lock:
+            doomed = [k for k in self._store if any(fnmatch.fnmatchcase(k, p) for p in patterns)
+                      and (key_filter is None or key_filter(k))]
+            for key in doomed:
+                del self._store[key]
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        for handler in list(self._handlers):
+            handler(message)
+
+    def subscribe(self, handler: MessageHandler) -> None:
+        self._handlers.append(handler)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis (or fakeredis) backed shared cache
+    Batches go through a pipeline and invalidations through pub/sub
+    """
+
+    def __init__(self, client=None, url: Optional[str] = None, namespace: str = 'aisquare:',
+                 channel: str = 'aisquare:pbl-cache:invalidate'):
+        if client is None:
+            if redis is None:
+                raise ImportError("redis is required for RedisCacheBackend: pip install redis")
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+        self._client = client
+        self._namespace = namespace
+        self._channel = channel
+        self._pubsub_thread = None
+
+    def _k(self, key: str) -> str:
+        return self._namespace + key
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        if not keys:
+            return {}
+        payloads = self._client.mget([self._k(key) for key in keys])
+        return {key: payload for key, payload in zip(keys, payloads) if payload is not None}
+
+    def set_many(self, items: Dict[str, Tuple[bytes, float]]) -> None:
+        if not items:
+            return
+        pipe = self._client.pipeline(transaction=False)
+        for key, (payload, ttl) in items.items():
+            pipe.set(self._k(key), payload, px=max(1, int(ttl * 1000)))
+        pipe.execute()
+
+    def delete_many(self, keys: List[str]) -> None:
+        if keys:
+            self._client.delete(*[self._k(key) for key in keys])
+
+    def delete_matching(self, patterns: List[str], key_filter: Optional[KeyFilter] = None) -> None:
+        prefix_len = len(self._namespace)
+        for pattern in patterns:
+            batch = []
+            for key in self._client.scan_iter(match=self._k(pattern), count=500):
+                if key_filter is not None:
+                    name = key.decode('utf-8') if isinstance(key, bytes) else key
+                    if not key_filter(name[prefix_len:]):
+                        continue
+                batch.append(key)
+                if len(batch) >= 500:
+                    self._client.delete(*batch)
+                    batch = []
+            if batch:
+                self._client.delete(*batch)
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        self._client.publish(self._channel, orjson.dumps(message))
+
+    def subscribe(self, handler: MessageHandler) -> None:
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self._channel: lambda raw: handler(orjson.loads(raw['data']))})
+        self._pubsub_thread = pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+
+def new_instance_id() -> str:
+    """Identify this process so it can ignore its own invalidation messages"""
+    return uuid.uuid4().hex
+
+
+def tag_patterns(tag: Iterable[str]) -> List[str]:
+    """
+    Glob patterns covering the keys that carry a tag in the pbl:<type>:... layout
+    They can over-match (* spans colons), so pair them with an exact key filter
+    """
+    kind, *values = tag
+    values = [glob_escape(v) for v in values]
+    user_types = ('program', 'task', 'completion')
+    if kind == 'user':
+        return [f"pbl:{t}:{values[0]}:*" for t in user_types]
+    if kind == 'scenario':
+        return [f"pbl:scenario:{values[0]}:*", f"pbl:cms:pbl:{values[0]}:*"] + \
+               [f"pbl:{t}:*:{values[0]}:*" for t in user_types]
+    if kind == 'program':
+        user_email, scenario_id, program_id = values
+        return [f"pbl:{t}:{user_email}:{scenario_id}:{program_id}" for t in user_types] + \
+               [f"pbl:{t}:{user_email}:{scenario_id}:{program_id}:*" for t in user_types]
+    return []
@@ -0,0 +1,121 @@
+"""
+Metrics for PBLCacheService
+Per-prefix counters and loader latency histograms with a Prometheus text export
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, List
+
+# Counter slots, kept as list indexes so recording is a single list increment
+HITS, STALE_HITS, MISSES, SHARED_HITS, EXPIRED, EVICTED = range(6)
+COUNTER_NAMES = ['hits', 'stale_hits', 'misses', 'shared_hits', 'expired', 'evicted']
+
+# Loader latency buckets in seconds (GCS reads range from a few ms to seconds)
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class CacheMetrics:
+    """
+    Counters and histograms keyed by cache key prefix (e.g. pbl:scenario)
+    Not locked on its own: PBLCacheService records while holding its lock
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, List[int]] = {}
+        # Per prefix: one count per bucket plus +Inf, then sum
+        self._latency: Dict[str, List[float]] = {}
+        self._latency_sum: Dict[str, float] = {}
+        # get_or_load_many() batches can span prefixes, so they get a histogram of their own
+        self._batch = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._batch_sum = 0.0
+        self._batch_keys = 0
+
+    def incr(self, prefix: str, slot: int) -> None:
+        counters = self._counters.get(prefix)
+        if counters is None:
+            counters = self._counters[prefix] = [0] * len(COUNTER_NAMES)
+        counters[slot] += 1
+
+    def observe_loader(self, prefix: str, seconds: float) -> None:
+        buckets = self._latency.get(prefix)
+        if buckets is None:
+            buckets = self._latency[prefix] = [0] * (len(LATENCY_BUCKETS) + 1)
+            self._latency_sum[prefix] = 0.0
+        buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self._latency_sum[prefix] += seconds
+
+    def observe_batch_loader(self, seconds: float, keys: int) -> None:
+        self._batch[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self._batch_sum += seconds
+        self._batch_keys += keys
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of all counters and histograms"""
+        prefixes = {}
+        for prefix, counters in self._counters.items():
+            stats = dict(zip(COUNTER_NAMES, counters))
+            lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+            stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 4) if lookups else 0.0
+            prefixes[prefix] = stats
+
+        latency = {prefix: _histogram(buckets, self._latency_sum[prefix])
+                   for prefix, buckets in self._latency.items()}
+        batch = dict(_histogram(self._batch, self._batch_sum), keys=self._batch_keys)
+        return {'prefixes': prefixes, 'loader_latency': latency, 'batch_loader_latency': batch}
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._latency.clear()
+        self._latency_sum.clear()
+        self._batch = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._batch_sum = 0.0
+        self._batch_keys = 0
+
+
+def _histogram(buckets: List[int], total: float) -> Dict[str, Any]:
+    return {
+        'count': sum(buckets),
+        'sum': total,
+        'buckets': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], buckets)),
+    }
+
+
+def to_prometheus(snapshot: Dict[str, Any], memory: Dict[str, Any],
+                  namespace: str = 'pbl_cache') -> str:
+    """Render a metrics snapshot and memory stats in Prometheus text format"""
+    lines = []
+    for name in COUNTER_NAMES:
+        metric = f"{namespace}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for prefix, stats in sorted(snapshot['prefixes'].items()):
+            lines.append(f'{metric}{{prefix="{prefix}"}} {stats[name]}')
+
+    metric = f"{namespace}_loader_seconds"
+    lines.append(f"# TYPE {metric} histogram")
+    for prefix, hist in sorted(snapshot['loader_latency'].items()):
+        cumulative = 0
+        for le, count in hist['buckets'].items():
+            cumulative += count
+            lines.append(f'{metric}_bucket{{prefix="{prefix}",le="{le}"}} {cumulative}')
+        lines.append(f'{metric}_sum{{prefix="{prefix}"}} {hist["sum"]}')
+        lines.append(f'{metric}_count{{prefix="{prefix}"}} {hist["count"]}')
+
+    batch = snapshot.get('batch_loader_latency')
+    if batch:
+        metric = f"{namespace}_batch_loader_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for le, count in batch['buckets'].items():
+            cumulative += count
+            lines.append(f'{metric}_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f'{metric}_sum {batch["sum"]}')
+        lines.append(f'{metric}_count {batch["count"]}')
+        lines.append(f"# TYPE {namespace}_batch_loader_keys_total counter")
+        lines.append(f"{namespace}_batch_loader_keys_total {batch['keys']}")
+
+    lines.append(f"# TYPE {namespace}_entries gauge")
+    lines.append(f"{namespace}_entries {memory['entries']}")
+    lines.append(f"# TYPE {namespace}_resident_bytes gauge")
+    for prefix, size in sorted(memory['bytes_by_prefix'].items()):
+        lines.append(f'{namespace}_resident_bytes{{prefix="{prefix}"}} {size}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,191 @@
+"""
+Startup warm-up for PBLCacheService
+Preloads the hottest (scenario, lang) pairs into the cache before an instance reports ready, so the
+first requests after a deploy are cache hits instead of a content read plus parse each
+
+Pairs come from the access snapshot the previous instance saved on shutdown, topped up with every
+bundled scenario in the default languages. The snapshot only reaches the next instance when it is
+saved to shared storage (PBL_ACCESS_SNAPSHOT); by default it stays on local disk, and a fresh
+instance warms the bundled pairs alone. Loads run concurrently up to a limit and stop at a time
+budget; anything not warmed by then is loaded on demand as usual.
+
+Typical wiring (FastAPI lifespan):
+    warmup = CacheWarmup()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await warmup.run()
+        yield
+        warmup.save_snapshot()
+
+    @app.get('/ready')
+    def ready():
+        return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .access_tracker import AccessTracker
+from .content_bundle import BUILD_DIR, ContentBundle, get_default_bundle
+from .pbl_cache_service import PBLCacheService, get_scenario_key, pbl_cache, scenario_access
+
+logger = logging.getLogger(__name__)
+
+# The build directory is local to the instance and lost with it; PBL_ACCESS_SNAPSHOT should point
+# at shared storage (e.g. a Cloud Storage volume mount on Cloud Run) for counts to outlive an instance
+DEFAULT_SNAPSHOT_PATH = Path(os.environ.get('PBL_ACCESS_SNAPSHOT', BUILD_DIR / 'scenario_access.json'))
+DEFAULT_LANGUAGES = ['en', 'zhTW']
+DEFAULT_LIMIT = 200
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BUDGET = 20.0  # seconds
+
+Pair = Tuple[str, str]
+
+
+def bundled_pairs(bundle: ContentBundle, languages: Sequence[str] = DEFAULT_LANGUAGES) -> List[Pair]:
+    """(scenario id, lang) for every bundled scenario, language by language"""
+    available = set()
+    for key in bundle.keys():
+        content_type, scenario_id, lang = key.split('/')
+        if content_type == 'pbl':
+            available.add((scenario_id, lang))
+    return [pair for lang in languages for pair in sorted(available) if pair[1] == lang]
+
+
+def plan_pairs(tracker: AccessTracker, fallback: Sequence[Pair] = (),
+               limit: int = DEFAULT_LIMIT) -> List[Pair]:
+    """Most accessed pairs first, then fallback pairs not already planned"""
+    planned = dict.fromkeys(tracker.top(limit))
+    for pair in fallback:
+        if len(planned) >= limit:
+            break
+        planned.setdefault(tuple(pair))
+    return list(planned)
+
+
+async def warm_up(pairs: Sequence[Pair], loader: Callable[[str, str], Any],
+                  cache: PBLCacheService = pbl_cache, concurrency: int = DEFAULT_CONCURRENCY,
+                  budget: float = DEFAULT_BUDGET) -> Dict[str, Any]:
+    """
+    Load pairs into the cache in order with at most concurrency loads in flight, stopping after
+    budget seconds; loads already started then finish in the background. loader(scenario_id, lang)
+    may be a coroutine function; plain functions run in worker threads so slow reads overlap
+    """
+    stats = {'planned': len(pairs), 'warmed': 0, 'cached': 0, 'missing': 0, 'failed': 0,
+             'skipped': 0, 'timed_out': False, 'elapsed': 0.0}
+    pending_pairs = iter(pairs)
+    started = time.perf_counter()
+
+    async def worker():
+        # Workers share one iterator, so every pair is taken exactly once and in plan order
+        for scenario_id, lang in pending_pairs:
+            key = get_scenario_key(scenario_id, lang)
+            loaded = []
+
+            async def load():
+                loaded.append(key)
+                if asyncio.iscoroutinefunction(loader):
+                    return await loader(scenario_id, lang)
+                return await asyncio.to_thread(loader, scenario_id, lang)
+
+            try:
+                value = await cache.aget_or_set(key, load)
+            except Exception as e:
+                stats['failed'] += 1
+                logger.warning("Warm-up failed for %s: %s", key, e)
+                continue
+            if not loaded:
+                stats['cached'] += 1
+            else:
+                stats['warmed' if value is not None else 'missing'] += 1
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(min(concurrency, len(pairs)))]
+    if workers:
+        _, unfinished = await asyncio.wait(workers, timeout=budget)
+        if unfinished:
+            stats['timed_out'] = True
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+    stats['skipped'] = len(pairs) - stats['warmed'] - stats['cached'] - stats['missing'] - stats['failed']
+    stats['elapsed'] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+class CacheWarmup:
+    """
+    Runs warm-up once per instance and holds the readiness flag for health checks
+    The instance turns ready when warm-up ends for any reason, including a failure, so a broken
+    snapshot or content source slows the first requests down instead of keeping the instance out
+    """
+
+    def __init__(self, cache: PBLCacheService = pbl_cache,
+                 loader: Optional[Callable[[str, str], Any]] = None,
+                 tracker: AccessTracker = scenario_access,
+                 snapshot_path: Path = DEFAULT_SNAPSHOT_PATH,
+                 languages: Sequence[str] = DEFAULT_LANGUAGES, limit: int = DEFAULT_LIMIT,
+                 concurrency: int = DEFAULT_CONCURRENCY, budget: float = DEFAULT_BUDGET):
+        self.cache = cache
+        self.loader = loader
+        self.tracker = tracker
+        self.snapshot_path = Path(snapshot_path)
+        self.languages = list(languages)
+        self.limit = limit
+        self.concurrency = concurrency
+        self.budget = budget
+        self.stats: Optional[Dict[str, Any]] = None
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def _fallback_pairs(self) -> List[Pair]:
+        try:
+            return bundled_pairs(get_default_bundle(), self.languages)
+        except (OSError, ValueError) as e:
+            logger.warning("No content bundle to plan warm-up from: %s", e)
+            return []
+
+    def _default_loader(self, scenario_id: str, lang: str) -> Any:
+        # No English fallback: like load_scenario(), a missing translation is negative-cached
+        # under its own key instead of holding the English scenario for the full ttl
+        return get_default_bundle().get('pbl', scenario_id, lang, fallback_lang=None)
+
+    async def run(self, fallback: Optional[Sequence[Pair]] = None) -> Dict[str, Any]:
+        """Warm the cache from the saved snapshot and fallback pairs, then mark the instance ready"""
+        try:
+            snapshot_pairs = self.tracker.load(self.snapshot_path)
+            if fallback is None:
+                fallback = await asyncio.to_thread(self._fallback_pairs)
+            pairs = plan_pairs(self.tracker, fallback, self.limit)
+            self.stats = await warm_up(pairs, self.loader or self._default_loader, self.cache,
+                                       self.concurrency, self.budget)
+            self.stats['snapshot_pairs'] = snapshot_pairs
+            logger.info("Cache warm-up finished: %s", self.stats)
+        except Exception:
+            logger.exception("Cache warm-up failed")
+        finally:
+            self._ready.set()
+        return self.stats or {}
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait until warm-up has finished, False on timeout"""
+        return await asyncio.to_thread(self._ready.wait, timeout)
+
+    def status(self) -> Dict[str, Any]:
+        return {'ready': self.ready, 'warmup': self.stats}
+
+    def save_snapshot(self) -> None:
+        """Persist this instance's access counts for the next instance's warm-up"""
+        try:
+            self.tracker.save(self.snapshot_path)
+        except OSError as e:
+            logger.warning("Could not save access snapshot to %s: %s", self.snapshot_path, e)
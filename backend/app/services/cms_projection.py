@@ -0,0 +1,231 @@
+"""
+Per-language projection of CMS master files
+The masters under cms/content hold every language inline (title, title_zh, options_ja, ...).
+Projection parses a master once and emits one lean document per locale, in which every field holds
+only that language, falling back to English field by field. Three layouts are understood:
+    suffixed keys        title / title_zh / title_ja
+    language maps        description: {en: ..., zhTW: ...}
+    mixed lists          instructions: ["plain text", {en: ..., ja: ...}, ...]
+
+Projections are written as JSON next to the other build artifacts; load_cms_document() serves them
+through PBLCacheService so the cache only ever holds the requested language.
+
+Usage: cd backend && python -m app.services.cms_projection [--cms-root DIR] [--out DIR]
+"""
+
+import argparse
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+import orjson
+import yaml
+
+from .content_bundle import BUILD_DIR, LANGUAGES, REPO_ROOT, load_yaml
+from .pbl_cache_service import PBLCacheService, _estimate_size, get_cms_key, pbl_cache
+
+DEFAULT_CMS_ROOT = REPO_ROOT / 'cms' / 'content'
+DEFAULT_PROJECTION_DIR = BUILD_DIR / 'cms'
+FALLBACK_LANG = 'en'
+
+# Content type -> (directory under cms/content, master file name suffix)
+CMS_MASTERS = {
+    'pbl': ('pbl_data', '_scenario'),
+    'assessment': ('assessment_data', ''),
+    'rubrics': ('rubrics_data', ''),
+}
+
+# Field suffix in master files -> language code; plain zh is Traditional Chinese
+SUFFIX_LANGUAGES = {
+    'zh': 'zhTW', 'zhTW': 'zhTW', 'zhCN': 'zhCN', 'ja': 'ja', 'ko': 'ko', 'es': 'es',
+    'fr': 'fr', 'de': 'de', 'it': 'it', 'pt': 'pt', 'ru': 'ru', 'ar': 'ar', 'th': 'th',
+}
+_SUFFIX = re.compile(r'^(.+)_(%s)$' % '|'.join(SUFFIX_LANGUAGES))
+
+# Keys of a language map; 'id' is left out, it is far more often an identifier than Indonesian
+_MAP_LANGUAGES = {**{lang: lang for lang in LANGUAGES if lang != 'id'}, **SUFFIX_LANGUAGES}
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == '' or value == [] or value == {}
+
+
+def _is_language_map(node: Dict) -> bool:
+    """{en: ..., zhTW: ...} style value, as opposed to a structure that happens to have an en key"""
+    return FALLBACK_LANG in node and all(isinstance(k, str) and k in _MAP_LANGUAGES for k in node)
+
+
+def project(node: Any, lang: str) -> Any:
+    """Single-language copy of a master document or subtree, English where lang is missing"""
+    if isinstance(node, dict):
+        if _is_language_map(node):
+            chosen = node[FALLBACK_LANG]
+            for key, value in node.items():
+                if _MAP_LANGUAGES[key] == lang and not _is_empty(value):
+                    chosen = value
+            return project(chosen, lang)
+
+        projected = {}
+        translated = {}
+        for key, value in node.items():
+            match = _SUFFIX.match(key) if isinstance(key, str) else None
+            if match is None:
+                projected[key] = value
+            elif SUFFIX_LANGUAGES[match.group(2)] == lang and not _is_empty(value):
+                translated[match.group(1)] = value
+        # Translations take the base field's place; a translation without a base is appended
+        projected.update(translated)
+        return {key: project(value, lang) for key, value in projected.items()}
+    if isinstance(node, list):
+        return [project(item, lang) for item in node]
+    return node
+
+
+def languages_in(node: Any) -> Set[str]:
+    """Languages with at least one translated field in a master, plus English"""
+    found = {FALLBACK_LANG}
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            if _is_language_map(current):
+                found.update(_MAP_LANGUAGES[k] for k, v in current.items() if not _is_empty(v))
+            for key, value in current.items():
+                match = _SUFFIX.match(key) if isinstance(key, str) else None
+                if match and not _is_empty(value):
+                    found.add(SUFFIX_LANGUAGES[match.group(2)])
+                stack.append(value)
+        elif isinstance(current, list):
+            stack.extend(current)
+    return found
+
+
+def iter_projections(data: Any) -> Iterator[Tuple[str, Any]]:
+    """(lang, document) for every language present in a parsed master, English first"""
+    langs = languages_in(data)
+    for lang in [FALLBACK_LANG] + sorted(langs - {FALLBACK_LANG}):
+        yield lang, project(data, lang)
+
+
+def master_path(content_type: str, content_id: str, cms_root: Path = DEFAULT_CMS_ROOT) -> Path:
+    subdir, suffix = CMS_MASTERS[content_type]
+    return Path(cms_root) / subdir / f"{content_id}{suffix}.yaml"
+
+
+def projection_path(content_type: str, content_id: str, lang: str,
+                    out_dir: Path = DEFAULT_PROJECTION_DIR) -> Path:
+    return Path(out_dir) / content_type / content_id / f"{content_id}_{lang}.json"
+
+
+def iter_masters(cms_root: Path = DEFAULT_CMS_ROOT) -> Iterator[Tuple[str, str, Path]]:
+    """(content type, id, path) of every master file, templates excluded"""
+    for content_type, (subdir, suffix) in CMS_MASTERS.items():
+        base = Path(cms_root) / subdir
+        if not base.is_dir():
+            continue
+        for path in sorted(base.glob(f"*{suffix}.yaml")):
+            if not path.name.startswith('_'):
+                yield content_type, path.name[:-len(f"{suffix}.yaml")], path
+
+
+def _write_json(path: Path, document: Any) -> int:
+    blob = orjson.dumps(document, option=orjson.OPT_NON_STR_KEYS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_bytes(blob)
+    os.replace(tmp, path)
+    return len(blob)
+
+
+def build_projections(cms_root: Path = DEFAULT_CMS_ROOT, out_dir: Path = DEFAULT_PROJECTION_DIR,
+                      force: bool = False) -> Dict[str, Any]:
+    """
+    Project every master into per-language JSON documents, returns build stats
+    Masters older than their English projection are skipped unless force is set
+    """
+    stats = {'masters': 0, 'skipped': 0, 'documents': 0, 'master_bytes': 0, 'projected_bytes': 0,
+             'errors': {}}
+    for content_type, content_id, path in iter_masters(cms_root):
+        en_path = projection_path(content_type, content_id, FALLBACK_LANG, out_dir)
+        if not force and en_path.exists() and en_path.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            stats['skipped'] += 1
+            continue
+        try:
+            data = load_yaml(path)
+        except yaml.YAMLError as e:
+            stats['errors'][str(path)] = str(e).splitlines()[0]
+            continue
+        stats['masters'] += 1
+        master_size = _estimate_size(data)
+        # English last, so its mtime marks the whole master as projected
+        projections = sorted(iter_projections(data), key=lambda item: item[0] == FALLBACK_LANG)
+        for lang, document in projections:
+            _write_json(projection_path(content_type, content_id, lang, out_dir), document)
+            stats['documents'] += 1
+            stats['master_bytes'] += master_size
+            stats['projected_bytes'] += _estimate_size(document)
+    return stats
+
+
+def load_projection(content_type: str, content_id: str, lang: str, cms_root: Path = DEFAULT_CMS_ROOT,
+                    out_dir: Path = DEFAULT_PROJECTION_DIR) -> Optional[Any]:
+    """
+    One language of a CMS document: the prebuilt projection when it is current, otherwise projected
+    from the master. Languages the master has no translations for get the English projection
+    """
+    master = master_path(content_type, content_id, cms_root)
+    if not master.exists():
+        return None
+    master_mtime = master.stat().st_mtime_ns
+
+    def current(path: Path) -> bool:
+        return path.exists() and path.stat().st_mtime_ns >= master_mtime
+
+    path = projection_path(content_type, content_id, lang, out_dir)
+    if current(path):
+        return orjson.loads(path.read_bytes())
+    english = projection_path(content_type, content_id, FALLBACK_LANG, out_dir)
+    # English is written last, so a current English projection without this language means the
+    # master has no translation for it
+    if not path.exists() and current(english):
+        return orjson.loads(english.read_bytes())
+    return project(load_yaml(master), lang)
+
+
+def load_cms_document(content_type: str, content_id: str, lang: str,
+                      cms_root: Path = DEFAULT_CMS_ROOT, out_dir: Path = DEFAULT_PROJECTION_DIR,
+                      cache: PBLCacheService = pbl_cache) -> Optional[Any]:
+    """CMS document in one language from PBLCacheService, filling misses from its projection"""
+    return cache.get_or_set(get_cms_key(content_type, content_id, lang),
+                            lambda: load_projection(content_type, content_id, lang, cms_root, out_dir))
+
+
+def load_cms_scenario(scenario_id: str, lang: str, cache: PBLCacheService = pbl_cache) -> Optional[Any]:
+    """A CMS PBL scenario in one language"""
+    return load_cms_document('pbl', scenario_id, lang, cache=cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Project CMS master files into per-language documents')
+    parser.add_argument('--cms-root', type=Path, default=DEFAULT_CMS_ROOT, help='cms/content directory')
+    parser.add_argument('--out', type=Path, default=DEFAULT_PROJECTION_DIR, help='output directory')
+    parser.add_argument('--force', action='store_true', help='re-project masters that did not change')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = build_projections(args.cms_root, args.out, args.force)
+    elapsed = time.perf_counter() - start
+    for path, error in stats['errors'].items():
+        print(f"❌ Skipped {path}: {error}")
+    print(f"✅ Projected {stats['masters']} masters into {stats['documents']} documents "
+          f"({stats['skipped']} unchanged) in {args.out} in {elapsed:.2f}s")
+    if stats['projected_bytes']:
+        print(f"   In-memory size per cached document: {stats['master_bytes'] / stats['documents'] / 1024:.0f} KB "
+              f"master -> {stats['projected_bytes'] / stats['documents'] / 1024:.0f} KB projected "
+              f"({stats['master_bytes'] / stats['projected_bytes']:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Vectorized competency scoring
+Scores batches of assessment answers and PBL task results against the question bank and KSA
+mappings with dense matrix products (learners x questions/tasks x domains/codes), producing one
+AI literacy domain vector and one KSA code vector per learner
+
+Every piece of evidence is weighted: a question counts once for its domain and each mapped code,
+a PBL task counts twice for its primary focus codes, once for secondary ones and once for each
+domain its scenario targets. A learner's score on a dimension is weighted credit / weighted
+evidence, NaN when there is no evidence at all.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .content_bundle import DEFAULT_CONTENT_ROOT, load_yaml
+from .ksa_index import DOMAINS, PRIMARY_WEIGHT, SECONDARY_WEIGHT, KsaIndex
+
+OPTIONS = 'abcd'
+
+DEFAULT_QUESTION_FILE = (DEFAULT_CONTENT_ROOT / 'assessment_data' / 'ai_literacy'
+                         / 'ai_literacy_questions_en.yaml')
+
+# Answer codes besides option indexes; a missing key never equals an answer code
+UNANSWERED = -1
+INVALID = -2
+NO_KEY = -3
+
+_OPTION_CODES = {option: i for i, option in enumerate(OPTIONS)}
+
+
+def _iter_questions(data: Mapping) -> Iterable[Mapping]:
+    for task in data.get('tasks') or []:
+        yield from task.get('questions') or []
+    yield from data.get('questions') or []
+
+
+class QuestionBank:
+    """Answer key, domain weights and KSA code weights of an assessment bank as dense arrays"""
+
+    def __init__(self, questions: Sequence[Mapping], codes: Sequence[str], domains: Sequence[str] = DOMAINS):
+        self.question_ids: List[str] = [str(q.get('id')) for q in questions]
+        self.codes = list(codes)
+        self.domains = list(domains)
+        self._columns = {qid: j for j, qid in enumerate(self.question_ids)}
+        code_columns = {code: k for k, code in enumerate(self.codes)}
+        domain_columns = {domain: k for k, domain in enumerate(self.domains)}
+
+        n = len(self.question_ids)
+        self.key = np.array([_OPTION_CODES.get(str(q.get('correct_answer', '')).strip().lower(), NO_KEY)
+                             for q in questions], dtype=np.int8)
+        self.domain_weights = np.zeros((n, len(self.domains)), dtype=np.float32)
+        self.code_weights = np.zeros((n, len(self.codes)), dtype=np.float32)
+        for j, question in enumerate(questions):
+            if question.get('domain') in domain_columns:
+                self.domain_weights[j, domain_columns[question['domain']]] = 1
+            for kind_codes in (question.get('ksa_mapping') or {}).values():
+                for code in kind_codes or []:
+                    if code in code_columns:
+                        self.code_weights[j, code_columns[code]] = 1
+
+    @classmethod
+    def from_file(cls, path: Path = DEFAULT_QUESTION_FILE, codes: Sequence[str] = (),
+                  domains: Sequence[str] = DOMAINS) -> 'QuestionBank':
+        return cls(list(_iter_questions(load_yaml(path) or {})), codes, domains)
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    def encode(self, learner_rows: Mapping[str, int], answers: Iterable[Tuple[str, str, str]]) -> np.ndarray:
+        """(learner id, question id, option) rows -> learners x questions option codes, -1 when unanswered"""
+        matrix = np.full((len(learner_rows), len(self.question_ids)), UNANSWERED, dtype=np.int8)
+        for learner_id, question_id, option in answers:
+            row = learner_rows.get(learner_id)
+            column = self._columns.get(question_id)
+            if row is not None and column is not None:
+                matrix[row, column] = _OPTION_CODES.get(str(option).strip().lower(), INVALID)
+        return matrix
+
+
+class TaskMap:
+    """Domain and KSA code weights of every PBL task referenced in the KSA index"""
+
+    def __init__(self, index: KsaIndex, codes: Sequence[str], domains: Sequence[str] = DOMAINS):
+        self.codes = list(codes)
+        self.domains = list(domains)
+        code_columns = {code: k for k, code in enumerate(self.codes)}
+        domain_columns = {domain: k for k, domain in enumerate(self.domains)}
+
+        focus: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for code in index.codes:
+            for task in index.tasks_for(code):
+                # A task without an id can never match a result row
+                if task['task_id'] is None:
+                    continue
+                weight = PRIMARY_WEIGHT if task['primary'] else SECONDARY_WEIGHT
+                focus.setdefault((task['scenario_id'], task['task_id']), {})[code] = weight
+        # Ids are compared as text so a YAML integer id does not break the ordering
+        self.tasks: List[Tuple[str, str]] = sorted(focus, key=lambda task: (task[0], str(task[1])))
+        self._rows = {task: i for i, task in enumerate(self.tasks)}
+
+        self.domain_weights = np.zeros((len(self.tasks), len(self.domains)), dtype=np.float32)
+        self.code_weights = np.zeros((len(self.tasks), len(self.codes)), dtype=np.float32)
+        for i, task in enumerate(self.tasks):
+            for domain in index.domains_for(task[0]):
+                if domain in domain_columns:
+                    self.domain_weights[i, domain_columns[domain]] = 1
+            for code, weight in focus[task].items():
+                # Some scenarios list domains instead of codes as task focus
+                if code in domain_columns:
+                    k = domain_columns[code]
+                    self.domain_weights[i, k] = max(self.domain_weights[i, k], weight)
+                elif code in code_columns:
+                    self.code_weights[i, code_columns[code]] = weight
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def encode(self, learner_rows: Mapping[str, int],
+               results: Iterable[Tuple[str, str, str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (learner id, scenario id, task id, score 0-100) rows -> learners x tasks scores in [0, 1]
+        and an attempted mask; the best score counts when a task was attempted more than once
+        """
+        scores = np.zeros((len(learner_rows), len(self.tasks)), dtype=np.float32)
+        attempted = np.zeros(scores.shape, dtype=bool)
+        for learner_id, scenario_id, task_id, score in results:
+            row = learner_rows.get(learner_id)
+            column = self._rows.get((scenario_id, task_id))
+            if row is not None and column is not None:
+                scores[row, column] = max(scores[row, column], min(max(float(score), 0.0), 100.0) / 100)
+                attempted[row, column] = True
+        return scores, attempted
+
+
+class CompetencyScores:
+    """Per-learner domain and KSA code scores in [0, 1], NaN where a learner has no evidence"""
+
+    def __init__(self, learner_ids: Sequence[str], domains: Sequence[str], codes: Sequence[str],
+                 domain_scores: np.ndarray, ksa_scores: np.ndarray):
+        self.learner_ids = list(learner_ids)
+        self.domains = list(domains)
+        self.codes = list(codes)
+        self.domain_scores = domain_scores
+        self.ksa_scores = ksa_scores
+        self._rows = {learner_id: i for i, learner_id in enumerate(self.learner_ids)}
+
+    def __len__(self) -> int:
+        return len(self.learner_ids)
+
+    @staticmethod
+    def _vector(names: Sequence[str], values: np.ndarray) -> Dict[str, Optional[float]]:
+        return {name: (None if np.isnan(value) else round(float(value), 4)) for name, value in zip(names, values)}
+
+    def learner(self, learner_id: str) -> Optional[Dict[str, Any]]:
+        """One learner's report, scores rounded to 4 places and None where there is no evidence"""
+        row = self._rows.get(learner_id)
+        if row is None:
+            return None
+        return {
+            'learner_id': learner_id,
+            'domains': self._vector(self.domains, self.domain_scores[row]),
+            'ksa': self._vector(self.codes, self.ksa_scores[row]),
+        }
+
+    def weakest_codes(self, learner_id: str, limit: int = 3) -> List[str]:
+        """Codes with evidence and the lowest scores, e.g. for KsaIndex.recommend_scenarios"""
+        row = self._rows.get(learner_id)
+        if row is None:
+            return []
+        values = self.ksa_scores[row]
+        scored = np.flatnonzero(~np.isnan(values))
+        order = scored[np.argsort(values[scored], kind='stable')]
+        return [self.codes[k] for k in order[:limit]]
+
+    def cohort_summary(self) -> Dict[str, Any]:
+        """Mean score and number of learners with evidence for every domain and code"""
+        def summarize(names, matrix):
+            counts = (~np.isnan(matrix)).sum(axis=0)
+            sums = np.nansum(matrix, axis=0)
+            means = np.divide(sums, counts, out=np.full(len(names), np.nan), where=counts > 0)
+            return {name: {'mean': None if np.isnan(mean) else round(float(mean), 4), 'learners': int(count)}
+                    for name, mean, count in zip(names, means, counts)}
+
+        return {'learners': len(self.learner_ids),
+                'domains': summarize(self.domains, self.domain_scores),
+                'ksa': summarize(self.codes, self.ksa_scores)}
+
+
+def _ratio(credit: np.ndarray, evidence: np.ndarray) -> np.ndarray:
+    return np.divide(credit, evidence, out=np.full(credit.shape, np.nan, dtype=np.float32), where=evidence > 0)
+
+
+class CompetencyScorer:
+    """Scores learner cohorts against one question bank and, optionally, the PBL task map"""
+
+    def __init__(self, bank: QuestionBank, tasks: Optional[TaskMap] = None):
+        self.bank = bank
+        self.tasks = tasks
+        self.domains = bank.domains
+        self.codes = bank.codes
+
+    @classmethod
+    def from_index(cls, index: KsaIndex, question_file: Path = DEFAULT_QUESTION_FILE,
+                   domains: Sequence[str] = DOMAINS) -> 'CompetencyScorer':
+        """Scorer over the codes in a KSA index, its PBL tasks and the given question bank"""
+        codes = [code for code in index.codes if code not in domains]
+        return cls(QuestionBank.from_file(question_file, codes, domains), TaskMap(index, codes, domains))
+
+    def score_matrices(self, learner_ids: Sequence[str], answers: Optional[np.ndarray] = None,
+                       task_scores: Optional[np.ndarray] = None,
+                       attempted: Optional[np.ndarray] = None) -> CompetencyScores:
+        """
+        Score pre-encoded evidence: answers is learners x questions option codes (-1 unanswered),
+        task_scores/attempted are learners x tasks. A learner who answered no question at all has no
+        assessment evidence; skipped questions of a started assessment count as wrong
+        """
+        n = len(learner_ids)
+        domain_credit = np.zeros((n, len(self.domains)), dtype=np.float32)
+        domain_evidence = np.zeros_like(domain_credit)
+        code_credit = np.zeros((n, len(self.codes)), dtype=np.float32)
+        code_evidence = np.zeros_like(code_credit)
+
+        if answers is not None and len(self.bank):
+            correct = (answers == self.bank.key).astype(np.float32)
+            taken = (answers != UNANSWERED).any(axis=1).astype(np.float32)[:, None]
+            domain_credit += correct @ self.bank.domain_weights
+            domain_evidence += taken * self.bank.domain_weights.sum(axis=0)
+            code_credit += correct @ self.bank.code_weights
+            code_evidence += taken * self.bank.code_weights.sum(axis=0)
+
+        if task_scores is not None and self.tasks is not None and len(self.tasks):
+            done = attempted.astype(np.float32) if attempted is not None else (task_scores > 0).astype(np.float32)
+            domain_credit += task_scores @ self.tasks.domain_weights
+            domain_evidence += done @ self.tasks.domain_weights
+            code_credit += task_scores @ self.tasks.code_weights
+            code_evidence += done @ self.tasks.code_weights
+
+        return CompetencyScores(learner_ids, self.domains, self.codes,
+                                _ratio(domain_credit, domain_evidence), _ratio(code_credit, code_evidence))
+
+    def score(self, learner_ids: Sequence[str], answers: Iterable[Tuple[str, str, str]] = (),
+              task_results: Iterable[Tuple[str, str, str, float]] = ()) -> CompetencyScores:
+        """
+        Score a cohort from raw rows: answers as (learner id, question id, option) and task results
+        as (learner id, scenario id, task id, score 0-100); rows for unknown learners, questions or
+        tasks are ignored
+        """
+        learner_rows = {learner_id: i for i, learner_id in enumerate(learner_ids)}
+        answer_matrix = self.bank.encode(learner_rows, answers)
+        task_scores = attempted = None
+        if self.tasks is not None:
+            task_scores, attempted = self.tasks.encode(learner_rows, task_results)
+        return self.score_matrices(learner_ids, answer_matrix, task_scores, attempted)
@@ -0,0 +1,206 @@
+"""
+Precompiled content bundle for PBL scenarios, rubrics, assessments and discovery paths
+Compiles every *_<lang>.yaml under frontend/public into one memory-mappable file so a
+single (content type, id, lang) document can be loaded without parsing YAML
+
+Bundle layout:
+    8 bytes   magic b'AISQBNDL'
+    4 bytes   format version (little-endian uint32)
+    8 bytes   index length N (little-endian uint64)
+    N bytes   orjson index {"<type>/<id>/<lang>": [offset, length], ...}
+    ...       orjson document blobs, offsets relative to the end of the index
+
+Usage: cd backend && python -m app.services.content_bundle [--root DIR] [--out FILE]
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import orjson
+import yaml
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # libyaml not available, fall back to the pure-Python loader
+    from yaml import SafeLoader as YamlLoader
+
+from .pbl_cache_service import PBLCacheService, get_scenario_key, pbl_cache, scenario_access
+
+MAGIC = b'AISQBNDL'
+VERSION = 1
+HEADER = struct.Struct('<8sIQ')
+
+LANGUAGES = ['en', 'zhTW', 'zhCN', 'ja', 'ko', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'ar', 'th', 'id']
+
+# Content type name -> directory under frontend/public
+CONTENT_DIRS = {
+    'pbl': 'pbl_data/scenarios',
+    'rubrics': 'rubrics_data',
+    'assessment': 'assessment_data',
+    'discovery': 'discovery_data',
+}
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+# Relative to backend/ rather than the repo, which is all a deployed image contains
+BUILD_DIR = Path(__file__).resolve().parents[2] / 'build'
+DEFAULT_CONTENT_ROOT = REPO_ROOT / 'frontend' / 'public'
+DEFAULT_BUNDLE_PATH = BUILD_DIR / 'content_bundle.bin'
+FALLBACK_LANG = 'en'
+
+_LANG_SUFFIX = re.compile(r'_(%s)\.ya?ml$' % '|'.join(LANGUAGES))
+
+
+def bundle_key(content_type: str, content_id: str, lang: str) -> str:
+    """Index key for one document"""
+    return f"{content_type}/{content_id}/{lang}"
+
+
+def iter_content_files(root: Path) -> Iterator[Tuple[str, str, str, Path]]:
+    """Yield (content type, id, lang, path) for every translated YAML file under root"""
+    for content_type, subdir in CONTENT_DIRS.items():
+        base = root / subdir
+        if not base.is_dir():
+            continue
+        for content_dir in sorted(d for d in base.iterdir() if d.is_dir() and not d.name.startswith('_')):
+            for path in sorted(content_dir.iterdir()):
+                match = _LANG_SUFFIX.search(path.name)
+                if match:
+                    yield content_type, content_dir.name, match.group(1), path
+
+
+def load_yaml(path: Path) -> Any:
+    """Parse a YAML file with libyaml when available"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=YamlLoader)
+
+
+def build_bundle(root: Path = DEFAULT_CONTENT_ROOT, out: Path = DEFAULT_BUNDLE_PATH) -> Dict[str, Any]:
+    """Compile all content under root into a bundle file, returns build stats"""
+    index: Dict[str, List[int]] = {}
+    blobs: List[bytes] = []
+    errors: Dict[str, str] = {}
+    offset = 0
+    for content_type, content_id, lang, path in iter_content_files(Path(root)):
+        try:
+            blob = orjson.dumps(load_yaml(path), option=orjson.OPT_NON_STR_KEYS)
+        except (yaml.YAMLError, orjson.JSONEncodeError) as e:
+            # Leave broken files out; get() falls back to English for them
+            errors[str(path)] = str(e).splitlines()[0]
+            continue
+        index[bundle_key(content_type, content_id, lang)] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    index_blob = orjson.dumps(index)
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(out.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index_blob)))
+        f.write(index_blob)
+        for blob in blobs:
+            f.write(blob)
+    # Swap atomically so readers never map a half-written bundle
+    os.replace(tmp, out)
+    return {'documents': len(index), 'bytes': HEADER.size + len(index_blob) + offset, 'errors': errors}
+
+
+class ContentBundle:
+    """Read-only, memory-mapped view of a compiled content bundle"""
+
+    def __init__(self, path: Path = DEFAULT_BUNDLE_PATH):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} content bundle")
+        self._data_start = HEADER.size + index_len
+        self._index: Dict[str, List[int]] = orjson.loads(self._mm[HEADER.size:self._data_start])
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys(self) -> List[str]:
+        return list(self._index)
+
+    def get_raw(self, content_type: str, content_id: str, lang: str) -> Optional[bytes]:
+        """Serialized document bytes, or None if the bundle has no such document"""
+        location = self._index.get(bundle_key(content_type, content_id, lang))
+        if location is None:
+            return None
+        start = self._data_start + location[0]
+        return self._mm[start:start + location[1]]
+
+    def get(self, content_type: str, content_id: str, lang: str,
+            fallback_lang: Optional[str] = 'en') -> Optional[Any]:
+        """Decode one document, falling back to fallback_lang when lang is missing"""
+        raw = self.get_raw(content_type, content_id, lang)
+        if raw is None and fallback_lang and fallback_lang != lang:
+            raw = self.get_raw(content_type, content_id, fallback_lang)
+        return orjson.loads(raw) if raw is not None else None
+
+    def get_scenario(self, scenario_id: str, lang: str) -> Optional[Any]:
+        """A PBL scenario in one language"""
+        return self.get('pbl', scenario_id, lang)
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+
+_default_bundle: Optional[ContentBundle] = None
+
+
+def get_default_bundle() -> ContentBundle:
+    """The bundle at DEFAULT_BUNDLE_PATH, opened once per process"""
+    global _default_bundle
+    if _default_bundle is None:
+        _default_bundle = ContentBundle(DEFAULT_BUNDLE_PATH)
+    return _default_bundle
+
+
+def load_scenario(scenario_id: str, lang: str, bundle: Optional[ContentBundle] = None,
+                  cache: PBLCacheService = pbl_cache) -> Optional[Any]:
+    """
+    Scenario from PBLCacheService, filling misses from the bundle instead of YAML
+    A missing translation is negative-cached under its own key for the short negative TTL and the
+    English scenario is served from the English key, so a translation added later shows up quickly
+    """
+    bundle = bundle or get_default_bundle()
+    scenario_access.record(scenario_id, lang)
+    scenario = cache.get_or_set(get_scenario_key(scenario_id, lang),
+                                lambda: bundle.get('pbl', scenario_id, lang, fallback_lang=None))
+    if scenario is None and lang != FALLBACK_LANG:
+        scenario = cache.get_or_set(get_scenario_key(scenario_id, FALLBACK_LANG),
+                                    lambda: bundle.get('pbl', scenario_id, FALLBACK_LANG, fallback_lang=None))
+    return scenario
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile learning content YAML into a binary bundle')
+    parser.add_argument('--root', type=Path, default=DEFAULT_CONTENT_ROOT, help='frontend/public directory')
+    parser.add_argument('--out', type=Path, default=DEFAULT_BUNDLE_PATH, help='bundle file to write')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = build_bundle(args.root, args.out)
+    elapsed = time.perf_counter() - start
+    for path, error in stats['errors'].items():
+        print(f"❌ Skipped {path}: {error}")
+    print(f"✅ Bundled {stats['documents']} documents ({stats['bytes'] / 1024:.0f} KB) "
+          f"into {args.out} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,414 @@
+"""
+Multilingual full-text search over PBL, discovery and rubric content
+Builds a compact inverted index with postings per language and ranks matches with BM25. The
+index file is memory mapped: only the document table and term dictionary are decoded on load,
+postings are read in place.
+
+Tokenization follows the script, not the file's language tag:
+    Han, Kana, Hangul   overlapping character bigrams (a lone character stays a unigram)
+    Thai                bigrams of grapheme clusters, since Thai has no spaces between words
+    Arabic              words without diacritics and tatweel, letter variants folded, al- prefixes removed
+    everything else     words, case- and accent-folded
+
+Index layout:
+    8 bytes   magic b'AISQSRCH'
+    4 bytes   format version (little-endian uint32)
+    8 bytes   meta length N (little-endian uint64)
+    N bytes   orjson meta: document table, per-language stats and term dictionary locations
+    ...       orjson term dictionaries {term: [offset, df]}, one per language, decoded on first use
+    ...       zero padding to a 4-byte boundary
+    ...       postings: little-endian uint32 (document, term frequency) pairs
+
+Rebuilds are incremental: files whose size and mtime match the previous index reuse its postings,
+so editing one file only re-parses that file.
+
+Usage: cd backend && python -m app.services.content_search [--root DIR] [--out FILE] [--full]
+       cd backend && python -m app.services.content_search --query "prompt engineering" [--lang en]
+"""
+
+import argparse
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import orjson
+import yaml
+
+from .content_bundle import BUILD_DIR, DEFAULT_CONTENT_ROOT, bundle_key, iter_content_files, load_yaml
+
+MAGIC = b'AISQSRCH'
+VERSION = 1
+HEADER = struct.Struct('<8sIQ')
+
+DEFAULT_INDEX_PATH = BUILD_DIR / 'content_search.bin'
+
+SEARCH_TYPES = ['pbl', 'discovery', 'rubrics']
+
+# Keys whose values are identifiers or settings rather than searchable text
+SKIP_KEYS = {'id', 'model', 'role', 'type', 'category', 'difficulty', 'color', 'icon', 'image',
+             'url', 'path', 'version', 'language', 'last_updated', 'created_at', 'updated_at'}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_HAN = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_KANA = '\u3040-\u309f\u30a0-\u30ff\u31f0-\u31ff'
+_HANGUL = '\uac00-\ud7af\u1100-\u11ff\u3130-\u318f'
+_THAI = '\u0e01-\u0e4e'
+_ARABIC = '\u0620-\u064a\u0660-\u0669\u066e-\u06d3\u06d5\u06fa-\u06ff\u064b-\u065f\u0670\u0640'
+_TOKEN_RUNS = re.compile(
+    rf'(?P<cjk>[{_HAN}{_KANA}{_HANGUL}]+)|(?P<thai>[{_THAI}]+)|(?P<arabic>[{_ARABIC}]+)'
+    rf'|(?P<word>[^\W_{_HAN}{_KANA}{_HANGUL}{_THAI}{_ARABIC}]+)'
+)
+
+# Thai vowel and tone marks attach to the preceding character
+_THAI_CLUSTER = re.compile(r'.[\u0e31\u0e34-\u0e3a\u0e47-\u0e4e]*')
+
+_ARABIC_MARKS = re.compile('[\u064b-\u065f\u0670\u0640]')
+# Hamza-carrying alefs, alef maqsura, ta marbuta and hamza seats fold to their base letters
+_ARABIC_FOLD = str.maketrans({'\u0623': '\u0627', '\u0625': '\u0627', '\u0622': '\u0627', '\u0671': '\u0627',
+                              '\u0649': '\u064a', '\u0629': '\u0647', '\u0624': '\u0648', '\u0626': '\u064a'})
+# The definite article al-, alone or after wa-, bi-, ka-, fa- or li-
+_ARABIC_PREFIXES = ('\u0648\u0627\u0644', '\u0628\u0627\u0644', '\u0643\u0627\u0644', '\u0641\u0627\u0644',
+                    '\u0644\u0644', '\u0627\u0644')
+
+
+def _bigrams(units: Sequence[str]) -> List[str]:
+    if len(units) == 1:
+        return [units[0]]
+    return [units[i] + units[i + 1] for i in range(len(units) - 1)]
+
+
+def _fold_word(word: str) -> str:
+    if word.isascii():
+        return word
+    return ''.join(c for c in unicodedata.normalize('NFKD', word) if not unicodedata.combining(c))
+
+
+def _arabic_word(word: str) -> str:
+    word = _ARABIC_MARKS.sub('', word).translate(_ARABIC_FOLD)
+    for prefix in _ARABIC_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 2:
+            return word[len(prefix):]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Index terms of a text, for documents and queries alike"""
+    tokens = []
+    for match in _TOKEN_RUNS.finditer(unicodedata.normalize('NFKC', text).casefold()):
+        run = match.group()
+        kind = match.lastgroup
+        if kind == 'word':
+            tokens.append(_fold_word(run))
+        elif kind == 'cjk':
+            tokens.extend(_bigrams(run))
+        elif kind == 'thai':
+            tokens.extend(_bigrams(_THAI_CLUSTER.findall(run)))
+        else:
+            word = _arabic_word(run)
+            if word:
+                tokens.append(word)
+    return tokens
+
+
+def iter_text(data: Any) -> Iterator[str]:
+    """Searchable strings of a document, skipping identifier and setting fields"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            yield node
+        elif isinstance(node, dict):
+            stack.extend(v for k, v in node.items() if str(k) not in SKIP_KEYS)
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def find_title(data: Any) -> Optional[str]:
+    """First title within two levels, e.g. scenario_info.title"""
+    level = [data]
+    for _ in range(3):
+        following = []
+        for node in level:
+            if isinstance(node, dict):
+                if isinstance(node.get('title'), str):
+                    return node['title']
+                following.extend(v for v in node.values() if isinstance(v, dict))
+        level = following
+    return None
+
+
+def _scan(root: Path) -> Dict[str, Dict[str, Any]]:
+    """Current searchable files under root keyed by bundle key, with their size and mtime"""
+    files = {}
+    for content_type, content_id, lang, path in iter_content_files(root):
+        if content_type in SEARCH_TYPES:
+            stat = path.stat()
+            files[bundle_key(content_type, content_id, lang)] = {
+                'path': str(path.relative_to(root)), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    return files
+
+
+def _write(out: Path, docs: List[Dict[str, Any]], terms_by_doc: List[Counter]) -> int:
+    """Write an index from per-document term frequencies, returns the file size"""
+    postings_by_lang: Dict[str, Dict[str, List[int]]] = {}
+    for doc_id, (doc, terms) in enumerate(zip(docs, terms_by_doc)):
+        lang_postings = postings_by_lang.setdefault(doc['lang'], {})
+        for term, tf in terms.items():
+            lang_postings.setdefault(term, []).extend((doc_id, tf))
+
+    postings = array('I')
+    langs = {}
+    dictionaries = []
+    dictionaries_len = 0
+    for lang, lang_postings in sorted(postings_by_lang.items()):
+        terms = {}
+        for term in sorted(lang_postings):
+            pairs = lang_postings[term]
+            terms[term] = [len(postings) // 2, len(pairs) // 2]
+            postings.extend(pairs)
+        blob = orjson.dumps(terms)
+        lang_docs = [doc['length'] for doc in docs if doc['lang'] == lang]
+        langs[lang] = {'documents': len(lang_docs), 'avgdl': sum(lang_docs) / len(lang_docs),
+                       'terms': [dictionaries_len, len(blob)]}
+        dictionaries.append(blob)
+        dictionaries_len += len(blob)
+
+    if sys.byteorder != 'little':
+        postings.byteswap()
+    meta = orjson.dumps({'documents': docs, 'langs': langs, 'dictionaries_length': dictionaries_len})
+    padding = -(HEADER.size + len(meta) + dictionaries_len) % 4
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(out.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(meta)))
+        f.write(meta)
+        for blob in dictionaries:
+            f.write(blob)
+        f.write(b'\0' * padding)
+        f.write(postings.tobytes())
+    # Swap atomically so readers never map a half-written index
+    os.replace(tmp, out)
+    return HEADER.size + len(meta) + dictionaries_len + padding + postings.itemsize * len(postings)
+
+
+def build_index(root: Path = DEFAULT_CONTENT_ROOT, out: Path = DEFAULT_INDEX_PATH,
+                incremental: bool = True) -> Dict[str, Any]:
+    """
+    Index searchable content under root, reusing unchanged documents from an existing index at out
+    unless incremental is False; returns build stats
+    """
+    root = Path(root)
+    files = _scan(root)
+    reused: Dict[str, tuple] = {}
+    if incremental and Path(out).exists():
+        try:
+            with SearchIndex(out) as previous:
+                reused = previous.unchanged_terms(files)
+        except ValueError:
+            reused = {}
+
+    docs: List[Dict[str, Any]] = []
+    terms_by_doc: List[Counter] = []
+    errors: Dict[str, str] = {}
+    parsed = 0
+    for key, info in files.items():
+        content_type, content_id, lang = key.split('/')
+        doc = {'type': content_type, 'id': content_id, 'lang': lang, **info}
+        if key in reused:
+            terms, title = reused[key]
+        else:
+            try:
+                data = load_yaml(root / info['path'])
+            except yaml.YAMLError as e:
+                errors[info['path']] = str(e).splitlines()[0]
+                continue
+            parsed += 1
+            terms = Counter(token for text in iter_text(data) for token in tokenize(text))
+            title = find_title(data)
+        doc['title'] = title
+        doc['length'] = sum(terms.values())
+        docs.append(doc)
+        terms_by_doc.append(terms)
+
+    size = _write(out, docs, terms_by_doc)
+    return {
+        'documents': len(docs),
+        'parsed': parsed,
+        'reused': len(docs) - parsed,
+        'terms': sum(len(t) for t in terms_by_doc),
+        'bytes': size,
+        'errors': errors,
+    }
+
+
+class SearchIndex:
+    """Read-only, memory-mapped BM25 search index"""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._postings = None
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} search index")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} search index")
+        meta = orjson.loads(self._mm[HEADER.size:HEADER.size + meta_len])
+        self.documents: List[Dict[str, Any]] = meta['documents']
+        self._langs: Dict[str, Dict[str, Any]] = meta['langs']
+        self._terms: Dict[str, Dict[str, List[int]]] = {}
+        self._dictionaries_start = HEADER.size + meta_len
+        start = self._dictionaries_start + meta['dictionaries_length']
+        start += -start % 4
+        self._postings = memoryview(self._mm)[start:].cast('I')
+        if sys.byteorder != 'little':
+            swapped = array('I', self._postings)
+            swapped.byteswap()
+            self._postings.release()
+            self._postings = memoryview(swapped)
+
+    def __enter__(self) -> 'SearchIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def languages(self) -> List[str]:
+        return list(self._langs)
+
+    def _dictionary(self, lang: str) -> Dict[str, List[int]]:
+        """Term dictionary of one language, decoded on first use"""
+        terms = self._terms.get(lang)
+        if terms is None:
+            offset, length = self._langs[lang]['terms']
+            start = self._dictionaries_start + offset
+            terms = self._terms[lang] = orjson.loads(self._mm[start:start + length])
+        return terms
+
+    def _pairs(self, offset: int, df: int) -> Iterator[tuple]:
+        postings = self._postings
+        for i in range(2 * offset, 2 * (offset + df), 2):
+            yield postings[i], postings[i + 1]
+
+    def search(self, query: str, lang: Optional[str] = 'en', limit: int = 10,
+               types: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Documents matching any query term, best BM25 score first
+        lang=None searches every language; types restricts content types, e.g. ['pbl']
+        """
+        terms = Counter(tokenize(query))
+        scores: Dict[int, float] = {}
+        for lang_name in ([lang] if lang else self._langs):
+            stats = self._langs.get(lang_name)
+            if stats is None:
+                continue
+            n, avgdl = stats['documents'], stats['avgdl'] or 1.0
+            for term, query_tf in terms.items():
+                entry = self._dictionary(lang_name).get(term)
+                if entry is None:
+                    continue
+                offset, df = entry
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                for doc_id, tf in self._pairs(offset, df):
+                    length = self.documents[doc_id]['length']
+                    score = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avgdl))
+                    scores[doc_id] = scores.get(doc_id, 0.0) + query_tf * score
+
+        if types:
+            wanted = set(types)
+            scores = {d: s for d, s in scores.items() if self.documents[d]['type'] in wanted}
+        ranked = sorted(scores, key=lambda d: (-scores[d], d))[:limit]
+        return [{'type': self.documents[d]['type'], 'id': self.documents[d]['id'],
+                 'lang': self.documents[d]['lang'], 'title': self.documents[d]['title'],
+                 'score': round(scores[d], 4)} for d in ranked]
+
+    def unchanged_terms(self, files: Dict[str, Dict[str, Any]]) -> Dict[str, tuple]:
+        """(term frequencies, title) of documents whose file still has the indexed size and mtime"""
+        keep = {}
+        for doc_id, doc in enumerate(self.documents):
+            info = files.get(bundle_key(doc['type'], doc['id'], doc['lang']))
+            if info and info['path'] == doc['path'] and info['size'] == doc['size'] \
+                    and info['mtime_ns'] == doc['mtime_ns']:
+                keep[doc_id] = Counter()
+        for lang in self._langs:
+            for term, (offset, df) in self._dictionary(lang).items():
+                for doc_id, tf in self._pairs(offset, df):
+                    if doc_id in keep:
+                        keep[doc_id][term] = tf
+        return {bundle_key(self.documents[d]['type'], self.documents[d]['id'], self.documents[d]['lang']):
+                (terms, self.documents[d]['title']) for d, terms in keep.items()}
+
+    def close(self) -> None:
+        if self._postings is not None:
+            self._postings.release()
+            self._postings = None
+        self._mm.close()
+        self._file.close()
+
+
+_default_index: Optional[SearchIndex] = None
+
+
+def get_default_index() -> SearchIndex:
+    """The index at DEFAULT_INDEX_PATH, opened once per process"""
+    global _default_index
+    if _default_index is None:
+        _default_index = SearchIndex(DEFAULT_INDEX_PATH)
+    return _default_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or query the content search index')
+    parser.add_argument('--root', type=Path, default=DEFAULT_CONTENT_ROOT, help='frontend/public directory')
+    parser.add_argument('--out', type=Path, default=DEFAULT_INDEX_PATH, help='index file to write or query')
+    parser.add_argument('--full', action='store_true', help='re-parse every file instead of reusing the index')
+    parser.add_argument('--query', help='search the existing index instead of building it')
+    parser.add_argument('--lang', default='en', help="language to search, 'all' for every language")
+    parser.add_argument('--limit', type=int, default=10, help='number of results')
+    args = parser.parse_args()
+
+    if args.query:
+        with SearchIndex(args.out) as index:
+            start = time.perf_counter()
+            results = index.search(args.query, None if args.lang == 'all' else args.lang, args.limit)
+            elapsed = time.perf_counter() - start
+        for result in results:
+            print(f"{result['score']:8.3f}  {result['type']}/{result['id']}/{result['lang']}  {result['title'] or ''}")
+        print(f"{len(results)} results in {elapsed * 1000:.1f} ms")
+        return
+
+    start = time.perf_counter()
+    stats = build_index(args.root, args.out, incremental=not args.full)
+    elapsed = time.perf_counter() - start
+    for path, error in stats['errors'].items():
+        print(f"❌ Skipped {path}: {error}")
+    print(f"✅ Indexed {stats['documents']} documents ({stats['parsed']} parsed, {stats['reused']} reused, "
+          f"{stats['bytes'] / 1024:.0f} KB) into {args.out} in {elapsed:.2f}s")
+    if stats['errors']:
+        # The index is still written, but a build step should not pass with documents missing
+        print(f"❌ {len(stats['errors'])} files could not be parsed and are not searchable")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Async GCS content loader for PBLCacheService
+Downloads objects through the GCS JSON API with one pooled httpx.AsyncClient and a cap on
+concurrent fetches. Each cached value keeps the object's generation and ETag as its validator;
+once the entry expires, the reload sends ifGenerationNotMatch / If-None-Match and an unchanged
+object costs a 304 instead of a full download and parse.
+
+Usage:
+    async with GCSContentLoader('ai-square-content') as gcs:
+        scenario = await gcs.get_scenario('ai_job_search', 'en')
+
+    # or as the warm-up loader: CacheWarmup(loader=gcs.fetch_scenario)
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import quote
+
+import httpx
+import orjson
+import yaml
+
+from .content_bundle import CONTENT_DIRS, YamlLoader
+from .pbl_cache_service import PBLCacheService, Validated, get_scenario_key, pbl_cache
+
+logger = logging.getLogger(__name__)
+
+GCS_API = 'https://storage.googleapis.com'
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 10.0
+
+TokenProvider = Callable[[], Union[str, Awaitable[str]]]
+
+
+def parse_object(name: str, body: bytes) -> Any:
+    """Decode a downloaded object by extension: JSON, YAML, or text for anything else"""
+    if name.endswith('.json'):
+        return orjson.loads(body)
+    if name.endswith(('.yaml', '.yml')):
+        return yaml.load(body, Loader=YamlLoader)
+    return body.decode('utf-8')
+
+
+class GCSContentLoader:
+    """
+    Fetches and parses GCS objects into a PBLCacheService, revalidating expired entries
+    token_provider returns an OAuth access token (sync or async); leave it out for public
+    buckets or a local emulator
+    """
+
+    def __init__(self, bucket: str, cache: PBLCacheService = pbl_cache, prefix: str = '',
+                 base_url: str = GCS_API, concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT, token_provider: Optional[TokenProvider] = None,
+                 parser: Callable[[str, bytes], Any] = parse_object):
+        self.bucket = bucket
+        self.cache = cache
+        self.prefix = prefix
+        self.parser = parser
+        self._token_provider = token_provider
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        )
+        self.stats = {'downloads': 0, 'not_modified': 0, 'not_found': 0, 'bytes': 0}
+
+    async def __aenter__(self) -> 'GCSContentLoader':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def object_key(self, name: str) -> str:
+        """Cache key for an arbitrary object"""
+        return f"gcs:{self.bucket}:{name}"
+
+    def scenario_object(self, scenario_id: str, lang: str) -> str:
+        """Object name of a scenario, mirroring the frontend/public layout"""
+        return f"{self.prefix}{CONTENT_DIRS['pbl']}/{scenario_id}/{scenario_id}_{lang}.yaml"
+
+    async def _headers(self) -> Dict[str, str]:
+        if self._token_provider is None:
+            return {}
+        token = self._token_provider()
+        if inspect.isawaitable(token):
+            token = await token
+        return {'Authorization': f"Bearer {token}"}
+
+    async def fetch(self, name: str,
+                    validator: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[bytes], Optional[Dict[str, str]]]:
+        """
+        Download an object, conditionally when a validator from an earlier fetch is given
+        Returns (status, body, validator); body is None for 304 and 404, other errors raise
+        """
+        params = {'alt': 'media'}
+        headers = await self._headers()
+        if validator:
+            if validator.get('generation'):
+                params['ifGenerationNotMatch'] = validator['generation']
+            if validator.get('etag'):
+                headers['If-None-Match'] = validator['etag']
+
+        async with self._semaphore:
+            response = await self._client.get(f"/storage/v1/b/{self.bucket}/o/{quote(name, safe='')}",
+                                              params=params, headers=headers)
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+            return 304, None, validator
+        if response.status_code == 404:
+            self.stats['not_found'] += 1
+            return 404, None, None
+        response.raise_for_status()
+        self.stats['downloads'] += 1
+        self.stats['bytes'] += len(response.content)
+        return response.status_code, response.content, {
+            'generation': response.headers.get('x-goog-generation'),
+            'etag': response.headers.get('etag'),
+        }
+
+    async def _load(self, key: str, name: str) -> Optional[Validated]:
+        """Loader for one cache key: revalidate the previous copy if there is one"""
+        previous = self.cache.peek_validated(key)
+        status, body, validator = await self.fetch(name, previous.validator if previous else None)
+        if status == 304:
+            if previous is None:
+                raise RuntimeError(f"304 for {name} without a cached copy")
+            return Validated(previous.value, previous.validator)
+        if status == 404:
+            return None
+        # Parsing large YAML is CPU bound, keep it off the event loop
+        value = await asyncio.to_thread(self.parser, name, body)
+        return Validated(value, validator)
+
+    async def get(self, name: str, key: Optional[str] = None, ttl: Optional[int] = None) -> Any:
+        """Parsed object from the cache, fetched or revalidated on a miss; None if it does not exist"""
+        key = key or self.object_key(name)
+        return await self.cache.aget_or_set(key, functools.partial(self._load, key, name), ttl)
+
+    async def get_scenario(self, scenario_id: str, lang: str, ttl: Optional[int] = None) -> Any:
+        """A PBL scenario under the same cache key as the other scenario loaders"""
+        return await self.get(self.scenario_object(scenario_id, lang), get_scenario_key(scenario_id, lang), ttl)
+
+    async def fetch_scenario(self, scenario_id: str, lang: str) -> Optional[Validated]:
+        """Loader-shaped scenario fetch, e.g. for CacheWarmup(loader=...)"""
+        return await self._load(get_scenario_key(scenario_id, lang), self.scenario_object(scenario_id, lang))
@@ -0,0 +1,336 @@
+"""
+Precomputed KSA code index
+Flattens every ksa_codes_<lang>.yaml into an array-backed code table and inverts the KSA references
+in PBL scenarios (ksa_mapping, tasks[].KSA_focus) and assessment questions (ksa_mapping), so code
+summaries, code -> scenarios/tasks/questions lookups and weak-code recommendations never walk YAML
+
+Index layout:
+    8 bytes   magic b'AISQKSAX'
+    4 bytes   format version (little-endian uint32)
+    8 bytes   payload length N (little-endian uint64)
+    N bytes   orjson payload: code table columns, entity tables and CSR postings per reference kind
+
+Usage: cd backend && python -m app.services.ksa_index [--root DIR] [--out FILE]
+"""
+
+import argparse
+import os
+import re
+import struct
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+import orjson
+import yaml
+
+from .content_bundle import BUILD_DIR, DEFAULT_CONTENT_ROOT, iter_content_files, load_yaml
+
+MAGIC = b'AISQKSAX'
+VERSION = 2
+HEADER = struct.Struct('<8sIQ')
+
+DEFAULT_INDEX_PATH = BUILD_DIR / 'ksa_index.bin'
+
+# Top-level sections of ksa_codes_<lang>.yaml and the kind each one holds
+CODE_SECTIONS = {'knowledge_codes': 'knowledge', 'skill_codes': 'skills', 'attitude_codes': 'attitudes'}
+KINDS = ['knowledge', 'skills', 'attitudes']
+KIND_BY_PREFIX = {'K': 'knowledge', 'S': 'skills', 'A': 'attitudes'}
+# AI literacy domain ids; some scenarios list them as task focus instead of KSA codes
+DOMAINS = ['engaging_with_ai', 'creating_with_ai', 'managing_with_ai', 'designing_with_ai']
+
+# Posting weights: a task's primary focus counts double, scenario-wide mappings once
+PRIMARY_WEIGHT = 2
+SECONDARY_WEIGHT = 1
+MAPPING_WEIGHT = 1
+
+REFERENCE_KINDS = ['scenario', 'task', 'question']
+
+_CODE_PARTS = re.compile(r'(\d+)')
+
+
+def _code_sort_key(code: str) -> Tuple:
+    """K1.10 sorts after K1.9"""
+    kind = KINDS.index(KIND_BY_PREFIX[code[0]]) if code[:1] in KIND_BY_PREFIX else len(KINDS)
+    return (kind,) + tuple(int(p) if p.isdigit() else p for p in _CODE_PARTS.split(code))
+
+
+def _mapping_codes(mapping: Any) -> Iterator[str]:
+    """Codes listed in a {knowledge: [...], skills: [...], attitudes: [...]} mapping"""
+    if isinstance(mapping, Mapping):
+        for codes in mapping.values():
+            for code in codes or []:
+                yield str(code)
+
+
+def _iter_questions(data: Mapping) -> Iterator[Mapping]:
+    for task in data.get('tasks') or []:
+        yield from task.get('questions') or []
+    yield from data.get('questions') or []
+
+
+def _postings(references: Dict[str, List[Tuple[int, int]]], codes: List[str]) -> Dict[str, List[int]]:
+    """CSR arrays: entries of codes[i] are ids/weights[offsets[i]:offsets[i + 1]]"""
+    offsets, ids, weights = [0], [], []
+    for code in codes:
+        for entity, weight in sorted(references.get(code, ())):
+            ids.append(entity)
+            weights.append(weight)
+        offsets.append(len(ids))
+    return {'offsets': offsets, 'ids': ids, 'weights': weights}
+
+
+def build_index(root: Path = DEFAULT_CONTENT_ROOT, out: Path = DEFAULT_INDEX_PATH) -> Dict[str, Any]:
+    """Compile KSA codes and their references under root into an index file, returns build stats"""
+    code_info: Dict[str, Tuple[str, str]] = {}       # code -> (kind, theme)
+    summaries: Dict[str, Dict[str, str]] = {}        # lang -> code -> summary
+    scenarios: List[str] = []
+    scenario_domains: List[List[str]] = []           # scenario_info.target_domains
+    tasks: List[List[Any]] = []                      # [scenario index, task id]
+    questions: List[List[Any]] = []                  # [bank, question id, domain]
+    references: Dict[str, Dict[str, List[Tuple[int, int]]]] = {kind: {} for kind in REFERENCE_KINDS}
+    errors: Dict[str, str] = {}
+
+    def refer(kind: str, code: str, entity: int, weight: int) -> None:
+        references[kind].setdefault(code, []).append((entity, weight))
+
+    for content_type, content_id, lang, path in iter_content_files(Path(root)):
+        is_codes = content_type == 'rubrics' and content_id == 'ksa_codes'
+        # KSA references are language independent, English is the source of truth
+        if not is_codes and (lang != 'en' or content_type not in ('pbl', 'assessment')):
+            continue
+        try:
+            data = load_yaml(path) or {}
+        except yaml.YAMLError as e:
+            errors[str(path)] = str(e).splitlines()[0]
+            continue
+
+        if is_codes:
+            lang_summaries = summaries.setdefault(lang, {})
+            for section, kind in CODE_SECTIONS.items():
+                for theme, theme_data in ((data.get(section) or {}).get('themes') or {}).items():
+                    for code, code_data in ((theme_data or {}).get('codes') or {}).items():
+                        code = str(code)
+                        if lang == 'en' or code not in code_info:
+                            code_info[code] = (kind, theme)
+                        summary = (code_data or {}).get('summary')
+                        if summary:
+                            lang_summaries[code] = summary
+        elif content_type == 'pbl':
+            scenario = len(scenarios)
+            scenarios.append(content_id)
+            scenario_domains.append(list((data.get('scenario_info') or {}).get('target_domains') or []))
+            for code in _mapping_codes(data.get('ksa_mapping')):
+                refer('scenario', code, scenario, MAPPING_WEIGHT)
+            for task_data in data.get('tasks') or []:
+                focus = task_data.get('KSA_focus') or {}
+                task = len(tasks)
+                tasks.append([scenario, task_data.get('id')])
+                for code in focus.get('primary') or []:
+                    refer('task', str(code), task, PRIMARY_WEIGHT)
+                for code in focus.get('secondary') or []:
+                    refer('task', str(code), task, SECONDARY_WEIGHT)
+        else:
+            for question_data in _iter_questions(data):
+                question = len(questions)
+                questions.append([content_id, question_data.get('id'), question_data.get('domain')])
+                for code in _mapping_codes(question_data.get('ksa_mapping')):
+                    refer('question', code, question, MAPPING_WEIGHT)
+
+    # Codes referenced by content but missing from ksa_codes still get a row, without summary;
+    # domain ids used as focus are expected there and not reported as unknown codes
+    domains = set(DOMAINS).union(*scenario_domains, (domain for _, _, domain in questions if domain))
+    referenced = {code for kind_refs in references.values() for code in kind_refs}
+    missing = referenced - set(code_info)
+    unknown = sorted(missing - domains, key=_code_sort_key)
+    for code in missing:
+        code_info[code] = ('domain', None) if code in domains else (KIND_BY_PREFIX.get(code[:1], 'unknown'), None)
+
+    codes = sorted(code_info, key=_code_sort_key)
+    themes = sorted({theme for _, theme in code_info.values() if theme})
+    theme_index = {theme: i for i, theme in enumerate(themes)}
+    payload = {
+        'codes': codes,
+        'kinds': [code_info[code][0] for code in codes],
+        'themes': themes,
+        'code_theme': [theme_index.get(code_info[code][1], -1) for code in codes],
+        'summaries': {lang: [by_code.get(code) for code in codes] for lang, by_code in sorted(summaries.items())},
+        'scenarios': scenarios,
+        'scenario_domains': scenario_domains,
+        'tasks': tasks,
+        'questions': questions,
+        'postings': {kind: _postings(references[kind], codes) for kind in REFERENCE_KINDS},
+    }
+    blob = orjson.dumps(payload)
+
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(out.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(blob)))
+        f.write(blob)
+    os.replace(tmp, out)
+    return {
+        'codes': len(codes),
+        'languages': len(summaries),
+        'scenarios': len(scenarios),
+        'tasks': len(tasks),
+        'questions': len(questions),
+        'bytes': HEADER.size + len(blob),
+        'unknown_codes': unknown,
+        'errors': errors,
+    }
+
+
+class KsaIndex:
+    """Read-only KSA code table with reverse lookups, loaded from a compiled index file"""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        raw = self.path.read_bytes()
+        if len(raw) < HEADER.size:
+            raise ValueError(f"{self.path} is not a version {VERSION} KSA index")
+        magic, version, length = HEADER.unpack_from(raw, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} KSA index")
+        payload = orjson.loads(raw[HEADER.size:HEADER.size + length])
+
+        self.codes: List[str] = payload['codes']
+        self._rows = {code: i for i, code in enumerate(self.codes)}
+        self._kinds: List[str] = payload['kinds']
+        self._themes: List[str] = payload['themes']
+        self._code_theme = array('i', payload['code_theme'])
+        self._summaries: Dict[str, List[Optional[str]]] = payload['summaries']
+        self.scenarios: List[str] = payload['scenarios']
+        self._scenario_rows = {scenario: i for i, scenario in enumerate(self.scenarios)}
+        self._scenario_domains: List[List[str]] = payload['scenario_domains']
+        self._tasks: List[List[Any]] = payload['tasks']
+        self._questions: List[List[Any]] = payload['questions']
+        self._postings = {
+            kind: (array('I', p['offsets']), array('I', p['ids']), array('B', p['weights']))
+            for kind, p in payload['postings'].items()
+        }
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._rows
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def languages(self) -> List[str]:
+        return list(self._summaries)
+
+    def summary(self, code: str, lang: str = 'en', fallback_lang: Optional[str] = 'en') -> Optional[str]:
+        """A code's summary, falling back to fallback_lang when lang has none"""
+        row = self._rows.get(code)
+        if row is None:
+            return None
+        text = self._summaries.get(lang, [None] * len(self.codes))[row]
+        if text is None and fallback_lang and fallback_lang != lang and fallback_lang in self._summaries:
+            text = self._summaries[fallback_lang][row]
+        return text
+
+    def lookup(self, code: str, lang: str = 'en') -> Optional[Dict[str, Any]]:
+        """Kind, theme and summary of a code"""
+        row = self._rows.get(code)
+        if row is None:
+            return None
+        theme = self._code_theme[row]
+        return {
+            'code': code,
+            'kind': self._kinds[row],
+            'theme': self._themes[theme] if theme >= 0 else None,
+            'summary': self.summary(code, lang),
+        }
+
+    def domains_for(self, scenario_id: str) -> List[str]:
+        """AI literacy domains a scenario targets"""
+        row = self._scenario_rows.get(scenario_id)
+        return list(self._scenario_domains[row]) if row is not None else []
+
+    def _entries(self, kind: str, code: str) -> List[Tuple[int, int]]:
+        row = self._rows.get(code)
+        if row is None:
+            return []
+        offsets, ids, weights = self._postings[kind]
+        start, end = offsets[row], offsets[row + 1]
+        return list(zip(ids[start:end], weights[start:end]))
+
+    def scenarios_for(self, code: str) -> List[str]:
+        """Scenarios whose ksa_mapping or task focus includes the code"""
+        found = {self.scenarios[s] for s, _ in self._entries('scenario', code)}
+        found.update(self.scenarios[self._tasks[t][0]] for t, _ in self._entries('task', code))
+        return sorted(found)
+
+    def tasks_for(self, code: str, primary_only: bool = False) -> List[Dict[str, Any]]:
+        """Tasks focusing on the code, as {scenario_id, task_id, primary}"""
+        return [
+            {'scenario_id': self.scenarios[self._tasks[t][0]], 'task_id': self._tasks[t][1],
+             'primary': weight == PRIMARY_WEIGHT}
+            for t, weight in self._entries('task', code)
+            if weight == PRIMARY_WEIGHT or not primary_only
+        ]
+
+    def questions_for(self, code: str) -> List[Dict[str, Any]]:
+        """Assessment questions mapped to the code, as {bank, question_id, domain}"""
+        return [
+            {'bank': bank, 'question_id': question_id, 'domain': domain}
+            for bank, question_id, domain in (self._questions[q] for q, _ in self._entries('question', code))
+        ]
+
+    def recommend_scenarios(self, weak_codes: Union[Iterable[str], Mapping[str, float]],
+                            limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Scenarios that best train the given codes, optionally weighted by how weak each one is
+        Task focus counts per task (primary twice), so scenarios practising a code repeatedly rank higher
+        """
+        weights = weak_codes if isinstance(weak_codes, Mapping) else {code: 1.0 for code in weak_codes}
+        scores: Dict[int, float] = {}
+        matched: Dict[int, List[str]] = {}
+        for code, code_weight in weights.items():
+            hits: Dict[int, float] = {}
+            for s, weight in self._entries('scenario', code):
+                hits[s] = hits.get(s, 0) + weight
+            for t, weight in self._entries('task', code):
+                s = self._tasks[t][0]
+                hits[s] = hits.get(s, 0) + weight
+            for s, hit in hits.items():
+                scores[s] = scores.get(s, 0) + code_weight * hit
+                matched.setdefault(s, []).append(code)
+        ranked = sorted(scores, key=lambda s: (-scores[s], self.scenarios[s]))[:limit]
+        return [{'scenario_id': self.scenarios[s], 'score': scores[s], 'codes': matched[s]} for s in ranked]
+
+
+_default_index: Optional[KsaIndex] = None
+
+
+def get_default_index() -> KsaIndex:
+    """The index at DEFAULT_INDEX_PATH, loaded once per process"""
+    global _default_index
+    if _default_index is None:
+        _default_index = KsaIndex(DEFAULT_INDEX_PATH)
+    return _default_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the KSA code index')
+    parser.add_argument('--root', type=Path, default=DEFAULT_CONTENT_ROOT, help='frontend/public directory')
+    parser.add_argument('--out', type=Path, default=DEFAULT_INDEX_PATH, help='index file to write')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = build_index(args.root, args.out)
+    elapsed = time.perf_counter() - start
+    for path, error in stats['errors'].items():
+        print(f"❌ Skipped {path}: {error}")
+    if stats['unknown_codes']:
+        print(f"⚠️  Referenced but not defined in ksa_codes: {', '.join(stats['unknown_codes'])}")
+    print(f"✅ Indexed {stats['codes']} codes in {stats['languages']} languages, {stats['scenarios']} scenarios, "
+          f"{stats['tasks']} tasks and {stats['questions']} questions ({stats['bytes'] / 1024:.0f} KB) "
+          f"into {args.out} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
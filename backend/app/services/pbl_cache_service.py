@@ -3,22 +3,151 @@ PBL Cache Service for optimizing GCS reads
 Implements server-side caching for PBL data
 """
 
+import asyncio
+import heapq
+import inspect
 import json
+import logging
+import random
+import sys
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 from functools import lru_cache
 import hashlib
 
+from .cache_backends import (
+    CacheBackend,
+    decode_entry,
+    encode_entry,
+    glob_escape,
+    new_instance_id,
+    tag_patterns,
+)
+from .access_tracker import AccessTracker
+from .cache_metrics import (
+    EVICTED,
+    EXPIRED,
+    HITS,
+    MISSES,
+    SHARED_HITS,
+    STALE_HITS,
+    CacheMetrics,
+    to_prometheus,
+)
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() when a caller needs to tell a miss from a cached None
+MISSING = object()
+
+
+class Validated:
+    """
+    Loader result carrying a validator (ETag, GCS generation) to keep with the cached value
+    Callers of get_or_set() and friends receive the plain value
+    """
+
+    __slots__ = ('value', 'validator')
+
+    def __init__(self, value: Any, validator: Any):
+        self.value = value
+        self.validator = validator
+
+    def __repr__(self) -> str:
+        return f"Validated({self.value!r}, {self.validator!r})"
+
+
+class _Flight:
+    """A loader call in progress that concurrent misses wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
 class PBLCacheService:
     """
     In-memory cache service for PBL data
-    Future: Can be extended to use Redis
+    Optionally backed by a shared L2 tier (Redis) through a CacheBackend
+
+    Entries are kept in an OrderedDict in least-recently-used order, so
+    lookups, inserts and evictions are all O(1). A re-entrant lock guards
+    the store because the global instance is shared by worker threads.
+
+    Expiry times are also pushed onto a min-heap so a background sweeper
+    can reclaim expired entries without waiting for a get() on that key.
+
+    get_or_set() and aget_or_set() coalesce concurrent misses so only one
+    loader runs per key, and can serve a stale value while refreshing.
+    Falsy values are cached like any other; a loader returning None marks
+    the object as missing and is cached for the shorter negative_ttl.
+
+    Keys are indexed by their colon-separated prefixes and by user,
+    scenario and program tags, so invalidation only touches matching keys.
+    New keys are queued and indexed (and pushed onto the expiry heap) in
+    batches by the next invalidation or sweep, keeping set() cheap.
+
+    With max_bytes set, eviction is also driven by the estimated size of
+    each value, and resident bytes are tracked per key prefix. Without a
+    budget, sizes are not computed and memory stats report zero bytes.
+
+    With a backend, this in-process store acts as L1: misses fall through
+    to the shared tier before calling a loader, writes go to both tiers,
+    and writes and invalidations are broadcast so other instances drop
+    their L1 copy.
+
+    Hits, misses, expiries, evictions and loader latency are recorded per
+    key prefix; see get_stats() and export_prometheus().
+
+    Loaders may return Validated(value, validator). Such entries are kept
+    for revalidate_ttl seconds past expiry without being served, so the
+    next loader can fetch peek_validated(key) and send a conditional
+    request instead of downloading an unchanged object again.
     """
 
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._default_ttl = 300  # 5 minutes
-        self._max_entries = 1000
+    def __init__(self, max_entries: int = 1000, default_ttl: int = 300,
+                 ttl_jitter: float = 0.0, negative_ttl: int = 30,
+                 max_bytes: Optional[int] = None,
+                 backend: Optional[CacheBackend] = None, metrics: bool = True,
+                 revalidate_ttl: int = 3600):
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._default_ttl = default_ttl  # 5 minutes
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._total_bytes = 0
+        self._bytes_by_prefix: Dict[str, int] = {}
+        self._ttl_jitter = ttl_jitter  # fraction of ttl added at random
+        self._negative_ttl = negative_ttl  # ttl for loaders that found nothing
+        self._revalidate_ttl = revalidate_ttl  # how long validated entries outlive expiry
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # Live keys stored since the last drain, not yet indexed or on the heap (dict as an ordered set)
+        self._pending: Dict[str, None] = {}
+        self._expiry_stats = {'expired': 0, 'reclaimed_bytes': 0, 'sweeps': 0}
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+        self._inflight: Dict[str, _Flight] = {}
+        self._async_inflight: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._async_tasks: Set[asyncio.Task] = set()
+        self._metrics = CacheMetrics() if metrics else None
+        self._prefix_index: Dict[str, Set[str]] = {}
+        self._tag_index: Dict[Tuple[str, ...], Set[str]] = {}
+        self._backend = backend
+        self._instance_id = new_instance_id()
+        if backend is not None:
+            backend.subscribe(self._on_invalidation)
+
+    def __len__(self) -> int:
+        return len(self._cache)
 
     def _generate_key(self, prefix: str, *args) -> str:
         """Generate a cache key from prefix and arguments"""
@@ -31,57 +160,693 @@ class PBLCacheService:
             return True
         return time.time() > entry['expires_at']
 
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
-        if key not in self._cache:
-            return None
+    def _reclaim_at(self, entry: Dict[str, Any]) -> float:
+        """Time after which an entry can no longer be served stale or revalidated"""
+        return max(entry.get('stale_until', 0), entry.get('revalidate_until', 0), entry['expires_at'])
 
-        entry = self._cache[key]
-        if self._is_expired(entry):
-            del self._cache[key]
-            return None
+    def _lookup(self, key: str, allow_stale: bool = False) -> Tuple[bool, Any, bool]:
+        """Return (found, value, is_stale) for key (caller holds the lock)"""
+        entry = self._cache.get(key)
+        if entry is None:
+            self._record(key, MISSES)
+            return False, None, False
+
+        now = time.time()
+        if now > entry['expires_at']:
+            if now > self._reclaim_at(entry):
+                self._expire(key)
+                self._record(key, MISSES)
+                return False, None, False
+            if not allow_stale or now > entry.get('stale_until', 0):
+                self._record(key, MISSES)
+                return False, None, False
+            self._record(key, STALE_HITS)
+            return True, entry.get('value'), True
+
+        # A hit makes the key the most recently used one
+        self._cache.move_to_end(key)
+        if self._metrics is not None:
+            self._metrics.incr(entry['prefix'], HITS)
+        return True, entry.get('value'), False
+
+    def _record(self, key: str, slot: int) -> None:
+        """Count an event against the key's prefix (caller holds the lock)"""
+        if self._metrics is not None:
+            self._metrics.incr(_size_prefix(key), slot)
+
+    def _observe_loader(self, key: str, started: float) -> None:
+        """Record how long a loader for key took"""
+        if self._metrics is not None:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._metrics.observe_loader(_size_prefix(key), elapsed)
+
+    def _observe_batch_loader(self, keys: int, started: float) -> None:
+        """Record one batch loader call and how many keys it was asked for"""
+        if self._metrics is not None:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._metrics.observe_batch_loader(elapsed, keys)
+
+    def _index_key(self, key: str) -> None:
+        """Add a new key to the prefix and tag indexes (caller holds the lock)"""
+        for prefix in _key_prefixes(key):
+            self._prefix_index.setdefault(prefix, set()).add(key)
+        for tag in _key_tags(key):
+            self._tag_index.setdefault(tag, set()).add(key)
+
+    def _drain_pending(self) -> None:
+        """Index queued keys and push their expiry onto the heap (caller holds the lock)"""
+        # Removing a key also takes it off the queue, so every queued key is live
+        for key in self._pending:
+            entry = self._cache[key]
+            if not entry.get('indexed'):
+                self._index_key(key)
+                entry['indexed'] = True
+            heapq.heappush(self._expiry_heap, (self._reclaim_at(entry), key))
+        self._pending = {}
+        # Overwrites and deletes leave stale heap items behind
+        if len(self._expiry_heap) > 2 * len(self._cache) + 64:
+            self._rebuild_expiry_heap()
+
+    def _unindex_key(self, key: str) -> None:
+        """Remove a key from the prefix and tag indexes (caller holds the lock)"""
+        for index, names in ((self._prefix_index, _key_prefixes(key)),
+                             (self._tag_index, _key_tags(key))):
+            for name in names:
+                keys = index.get(name)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[name]
+
+    def _remove(self, key: str) -> Optional[Dict[str, Any]]:
+        """Remove an entry from the store (caller holds the lock)"""
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._pending.pop(key, None)
+            if entry.get('indexed'):
+                self._unindex_key(key)
+            if entry['size']:
+                self._account_bytes(entry['prefix'], -entry['size'])
+        return entry
 
-        return entry.get('value')
+    def _account_bytes(self, prefix: str, delta: int) -> None:
+        """Track resident bytes in total and per key prefix (caller holds the lock)"""
+        self._total_bytes += delta
+        remaining = self._bytes_by_prefix.get(prefix, 0) + delta
+        if remaining:
+            self._bytes_by_prefix[prefix] = remaining
+        else:
+            self._bytes_by_prefix.pop(prefix, None)
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set value in cache with TTL"""
-        # Implement simple LRU eviction
-        if len(self._cache) >= self._max_entries:
-            # Remove oldest entry
-            oldest_key = min(self._cache.keys(),
-                           key=lambda k: self._cache[k].get('created_at', 0))
-            del self._cache[oldest_key]
+    def _expire(self, key: str) -> None:
+        """Drop an expired entry and record what it reclaimed"""
+        entry = self._remove(key)
+        if entry is not None:
+            self._expiry_stats['expired'] += 1
+            self._record(key, EXPIRED)
+            self._expiry_stats['reclaimed_bytes'] += entry.get('size', 0)
 
+    def get(self, key: str, default: Any = None) -> Optional[Any]:
+        """Get value from cache, or default on a miss (pass MISSING to detect cached None)"""
+        with self._lock:
+            entry = self._cache.get(key)
+            # Fast path for a fresh hit, everything else goes through _lookup
+            if entry is not None and time.time() <= entry['expires_at']:
+                self._cache.move_to_end(key)
+                if self._metrics is not None:
+                    self._metrics.incr(entry['prefix'], HITS)
+                return entry['value']
+            found, value, _ = self._lookup(key)
+        if found:
+            return value
+
+        shared = self._fetch_shared([key])
+        return shared[key] if key in shared else default
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None,
+            stale_ttl: Optional[int] = None) -> None:
+        """Set value in cache with TTL, optionally servable stale for stale_ttl more seconds"""
+        entry = self._make_entry(value, ttl, stale_ttl)
+        self._store_entry(key, entry)
+        if self._backend is not None:
+            self._write_shared({key: entry})
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values at once, returns only the keys that were found"""
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                hit, value, _ = self._lookup(key)
+                if hit:
+                    found[key] = value
+                else:
+                    missing.append(key)
+        found.update(self._fetch_shared(missing))
+        return found
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """Set several values with the same TTL, writing L2 in one batch"""
+        entries = {key: self._make_entry(value, ttl) for key, value in items.items()}
+        for key, entry in entries.items():
+            self._store_entry(key, entry)
+        self._write_shared(entries)
+
+    def get_or_load_many(self, keys: List[str], batch_loader,
+                         ttl: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get several keys, loading all misses with one batch_loader(missing_keys) call
+        batch_loader returns {key: value}; keys it leaves out are negative-cached as None
+        """
+        results = self.get_many(keys)
+        waiting: Dict[str, _Flight] = {}
+        leading: Dict[str, _Flight] = {}
+        with self._lock:
+            for key in keys:
+                if key in results or key in waiting or key in leading:
+                    continue
+                flight = self._inflight.get(key)
+                if flight is not None:
+                    waiting[key] = flight
+                else:
+                    leading[key] = self._inflight[key] = _Flight()
+
+        if leading:
+            try:
+                started = time.perf_counter()
+                loaded = batch_loader(list(leading)) or {}
+                self._observe_batch_loader(len(leading), started)
+                entries = {}
+                for key, flight in leading.items():
+                    flight.value = results[key] = _unwrap(loaded.get(key))
+                    entries[key] = self._loaded_entry(loaded.get(key), ttl)
+                for key, entry in entries.items():
+                    self._store_entry(key, entry)
+                self._write_shared(entries)
+            except BaseException as e:
+                for flight in leading.values():
+                    flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in leading:
+                        self._inflight.pop(key, None)
+                for flight in leading.values():
+                    flight.done.set()
+
+        for key, flight in waiting.items():
+            results[key] = flight.wait()
+        return results
+
+    def _make_entry(self, value: Any, ttl: Optional[int] = None,
+                    stale_ttl: Optional[int] = None) -> Dict[str, Any]:
+        """Build a store entry for value"""
+        validator = None
+        if isinstance(value, Validated):
+            value, validator = value.value, value.validator
         ttl = ttl or self._default_ttl
-        self._cache[key] = {
+        if self._ttl_jitter:
+            # Spread expiry of keys loaded together to avoid synchronized misses
+            ttl += random.uniform(0, ttl * self._ttl_jitter)
+        now = time.time()
+        entry = {
             'value': value,
-            'created_at': time.time(),
-            'expires_at': time.time() + ttl
+            'created_at': now,
+            'expires_at': now + ttl,
+            # Sizes are only needed to enforce a byte budget
+            'size': _estimate_size(value) if self._max_bytes is not None else 0
         }
+        if stale_ttl:
+            entry['stale_until'] = entry['expires_at'] + stale_ttl
+        if validator is not None:
+            entry['validator'] = validator
+            entry['revalidate_until'] = entry['expires_at'] + self._revalidate_ttl
+        return entry
+
+    def _store_entry(self, key: str, entry: Dict[str, Any]) -> None:
+        """Insert an entry into the in-process store, evicting as needed"""
+        size = entry['size']
+        max_bytes = self._max_bytes
+        with self._lock:
+            cache = self._cache
+            previous = cache.pop(key, None)
+            if previous is None:
+                entry['prefix'] = _size_prefix(key)
+            else:
+                entry['prefix'] = previous['prefix']
+                if previous['size']:
+                    self._account_bytes(previous['prefix'], -previous['size'])
+                if previous.get('indexed'):
+                    if max_bytes is not None and size > max_bytes:
+                        self._unindex_key(key)
+                    else:
+                        # Same key, same index slots: skip the unindex and reindex
+                        entry['indexed'] = True
+            if max_bytes is not None and size > max_bytes:
+                self._pending.pop(key, None)
+                logger.debug("Not caching %s: %d bytes exceeds the budget", key, size)
+                return
+
+            # Evict least recently used entries from the front
+            while len(cache) >= self._max_entries:
+                self._evict_lru()
+            if max_bytes is not None:
+                while cache and self._total_bytes + size > max_bytes:
+                    self._evict_lru()
+            cache[key] = entry
+            if size:
+                self._account_bytes(entry['prefix'], size)
+            self._pending[key] = None
+
+    def _evict_lru(self) -> None:
+        """Evict the least recently used entry (caller holds the lock)"""
+        key, entry = self._cache.popitem(last=False)
+        self._pending.pop(key, None)
+        if entry.get('indexed'):
+            self._unindex_key(key)
+        if entry['size']:
+            self._account_bytes(entry['prefix'], -entry['size'])
+        if self._metrics is not None:
+            self._metrics.incr(entry['prefix'], EVICTED)
 
     def delete(self, key: str) -> None:
         """Delete key from cache"""
-        if key in self._cache:
-            del self._cache[key]
+        self._delete_local([key])
+        self._backend_call('delete_many', [key])
+        self._broadcast({'op': 'delete', 'keys': [key]})
 
     def clear_pattern(self, pattern: str) -> None:
-        """Clear all keys matching pattern"""
-        keys_to_delete = [k for k in self._cache.keys() if pattern in k]
-        for key in keys_to_delete:
-            del self._cache[key]
-
-    def get_or_set(self, key: str, getter_func, ttl: Optional[int] = None) -> Any:
-        """Get from cache or compute and cache"""
-        value = self.get(key)
-        if value is not None:
-            return value
+        """Clear all keys containing pattern (scans every key, prefer clear_prefix)"""
+        self._clear_pattern_local(pattern)
+        self._backend_call('delete_matching', [f"*{glob_escape(pattern)}*"])
+        self._broadcast({'op': 'pattern', 'pattern': pattern})
+
+    def clear_prefix(self, prefix: str) -> int:
+        """Clear all keys under a segment-aligned prefix, e.g. 'pbl:task:<email>'"""
+        prefix = prefix.rstrip(':')
+        removed = self._clear_prefix_local(prefix)
+        self._backend_call('delete_matching', [glob_escape(prefix), f"{glob_escape(prefix)}:*"])
+        self._broadcast({'op': 'prefix', 'prefix': prefix})
+        return removed
+
+    def invalidate_tag(self, *tag: str) -> int:
+        """Clear all keys carrying an exact tag, returns how many were removed"""
+        removed = self._invalidate_tag_local(tag)
+        self._backend_call('delete_matching', tag_patterns(tag), lambda key: tag in _key_tags(key))
+        self._broadcast({'op': 'tag', 'tag': list(tag)})
+        return removed
+
+    def _delete_local(self, keys: List[str]) -> int:
+        with self._lock:
+            return sum(self._remove(key) is not None for key in keys)
+
+    def _clear_pattern_local(self, pattern: str) -> int:
+        with self._lock:
+            return self._delete_local([k for k in self._cache.keys() if pattern in k])
+
+    def _clear_prefix_local(self, prefix: str) -> int:
+        with self._lock:
+            self._drain_pending()
+            keys_to_delete = list(self._prefix_index.get(prefix, ()))
+            if prefix in self._cache:
+                keys_to_delete.append(prefix)
+            return self._delete_local(keys_to_delete)
+
+    def _invalidate_tag_local(self, tag: Tuple[str, ...]) -> int:
+        with self._lock:
+            self._drain_pending()
+            return self._delete_local(list(self._tag_index.get(tuple(tag), ())))
+
+    def _backend_call(self, method: str, *args) -> Any:
+        """Call the shared tier, treating failures as misses so L1 keeps serving"""
+        if self._backend is None:
+            return None
+        try:
+            return getattr(self._backend, method)(*args)
+        except Exception:
+            logger.warning("Shared cache %s failed", method, exc_info=True)
+            return None
+
+    def _broadcast(self, message: Dict[str, Any]) -> None:
+        """Tell other instances to drop their L1 copies"""
+        if self._backend is not None:
+            self._backend_call('publish', dict(message, origin=self._instance_id))
+
+    def _on_invalidation(self, message: Dict[str, Any]) -> None:
+        """Apply an invalidation broadcast by another instance to L1 only"""
+        if message.get('origin') == self._instance_id:
+            return
+        op = message.get('op')
+        if op == 'delete':
+            self._delete_local(message['keys'])
+        elif op == 'pattern':
+            self._clear_pattern_local(message['pattern'])
+        elif op == 'prefix':
+            self._clear_prefix_local(message['prefix'])
+        elif op == 'tag':
+            self._invalidate_tag_local(tuple(message['tag']))
+
+    def _fetch_shared(self, keys: List[str]) -> Dict[str, Any]:
+        """Read keys from the shared tier and promote them into L1, returns the fresh ones"""
+        payloads = self._backend_call('get_many', keys) if keys else None
+        if not payloads:
+            return {}
+
+        now = time.time()
+        found = {}
+        for key, payload in payloads.items():
+            try:
+                entry = decode_entry(payload)
+            except Exception:
+                logger.warning("Dropping undecodable shared cache entry %s", key)
+                continue
+            if self._reclaim_at(entry) <= now:
+                continue
+            # Stale and validator metadata come along, so L1 can serve stale or revalidate
+            entry['created_at'] = now
+            entry['size'] = _estimate_size(entry['value']) if self._max_bytes is not None else 0
+            self._store_entry(key, entry)
+            if entry['expires_at'] <= now:
+                continue
+            found[key] = entry['value']
+            with self._lock:
+                self._record(key, SHARED_HITS)
+        return found
+
+    def _write_shared(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Write entries through to the shared tier in one batch and drop other instances' copies"""
+        if self._backend is None or not entries:
+            return
+        now = time.time()
+        payloads = {}
+        for key, entry in entries.items():
+            try:
+                payload = encode_entry(entry)
+            except TypeError:
+                logger.debug("Value for %s is not serializable, keeping it in L1 only", key)
+                continue
+            # Each key keeps its own lifetime, including the stale and revalidation windows
+            payloads[key] = (payload, self._reclaim_at(entry) - now)
+        if payloads:
+            self._backend_call('set_many', payloads)
+        self._broadcast({'op': 'delete', 'keys': list(entries)})
+
+    def invalidate_user(self, user_email: str) -> int:
+        """Clear program, task and completion keys of one user"""
+        return self.invalidate_tag('user', user_email)
+
+    def invalidate_scenario(self, scenario_id: str) -> int:
+        """Clear scenario content and every user's keys for a scenario"""
+        return self.invalidate_tag('scenario', scenario_id)
+
+    def invalidate_program(self, user_email: str, scenario_id: str, program_id: str) -> int:
+        """Clear program, task and completion keys of one program"""
+        return self.invalidate_tag('program', user_email, scenario_id, program_id)
+
+    def _rebuild_expiry_heap(self) -> None:
+        """Rebuild the expiry heap from live entries (caller holds the lock)"""
+        self._expiry_heap = [(self._reclaim_at(entry), key) for key, entry in self._cache.items()]
+        heapq.heapify(self._expiry_heap)
+
+    def purge_expired(self, max_items: int = 1000) -> int:
+        """Remove up to max_items expired entries, returns how many were removed"""
+        removed = 0
+        now = time.time()
+        with self._lock:
+            self._drain_pending()
+            heap = self._expiry_heap
+            while heap and removed < max_items and heap[0][0] < now:
+                reclaim_at, key = heapq.heappop(heap)
+                entry = self._cache.get(key)
+                # Skip heap items left behind by overwrites or deletes
+                if entry is None or self._reclaim_at(entry) != reclaim_at:
+                    continue
+                self._expire(key)
+                removed += 1
+            self._expiry_stats['sweeps'] += 1
+        return removed
+
+    def start_sweeper(self, interval: float = 1.0, max_items_per_tick: int = 1000) -> None:
+        """Start a daemon thread that purges expired entries every interval"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        def run():
+            while not self._sweeper_stop.wait(interval):
+                self.purge_expired(max_items_per_tick)
+
+        self._sweeper_stop.clear()
+        self._sweeper = threading.Thread(target=run, name='pbl-cache-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper thread"""
+        self._sweeper_stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Return resident bytes in total and per key prefix such as pbl:scenario"""
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self._max_bytes,
+                'bytes_by_prefix': dict(self._bytes_by_prefix),
+            }
 
-        value = getter_func()
-        self.set(key, value, ttl)
-        return value
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of per-prefix counters, loader latency and memory use"""
+        with self._lock:
+            snapshot = self._metrics.snapshot() if self._metrics else {
+                'prefixes': {}, 'loader_latency': {}, 'batch_loader_latency': None}
+        snapshot['memory'] = self.get_memory_stats()
+        return snapshot
+
+    def export_prometheus(self) -> str:
+        """Render get_stats() in Prometheus text exposition format"""
+        stats = self.get_stats()
+        return to_prometheus(stats, stats['memory'])
+
+    def get_expiry_stats(self) -> Dict[str, int]:
+        """Return counts of expired entries, reclaimed bytes and sweeps"""
+        with self._lock:
+            return dict(self._expiry_stats)
+
+    def peek_validated(self, key: str) -> Optional[Validated]:
+        """Value and validator of a key, expired or not, for a conditional reload; None if unknown"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or 'validator' not in entry or time.time() > self._reclaim_at(entry):
+                return None
+            return Validated(entry['value'], entry['validator'])
+
+    def get_or_set(self, key: str, getter_func, ttl: Optional[int] = None,
+                   stale_ttl: Optional[int] = None) -> Any:
+        """Get from cache or compute and cache, running one loader per key at a time"""
+        with self._lock:
+            found, value, is_stale = self._lookup(key, allow_stale=bool(stale_ttl))
+            if found:
+                if is_stale:
+                    self._refresh_in_background(key, getter_func, ttl, stale_ttl)
+                return value
+
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not is_leader:
+            return flight.wait()
+        return self._run_flight(key, flight, getter_func, ttl, stale_ttl)
+
+    def _run_flight(self, key: str, flight: _Flight, getter_func,
+                    ttl: Optional[int], stale_ttl: Optional[int]) -> Any:
+        """Run the loader for key and publish the result to waiters"""
+        try:
+            shared = self._fetch_shared([key])
+            if key in shared:
+                flight.value = shared[key]
+            else:
+                started = time.perf_counter()
+                loaded = getter_func()
+                self._observe_loader(key, started)
+                self._store_loaded(key, loaded, ttl, stale_ttl)
+                flight.value = _unwrap(loaded)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _store_loaded(self, key: str, value: Any, ttl: Optional[int],
+                      stale_ttl: Optional[int]) -> None:
+        """Cache a loader result, using the negative ttl when nothing was found"""
+        entry = self._loaded_entry(value, ttl, stale_ttl)
+        self._store_entry(key, entry)
+        self._write_shared({key: entry})
+
+    def _loaded_entry(self, value: Any, ttl: Optional[int],
+                      stale_ttl: Optional[int] = None) -> Dict[str, Any]:
+        """Build the entry for a loader result"""
+        if _unwrap(value) is None:
+            return self._make_entry(None, min(ttl or self._default_ttl, self._negative_ttl))
+        return self._make_entry(value, ttl, stale_ttl)
+
+    def _refresh_in_background(self, key: str, getter_func,
+                               ttl: Optional[int], stale_ttl: Optional[int]) -> None:
+        """Reload a stale key in a daemon thread (caller holds the lock)"""
+        if key in self._inflight:
+            return
+        flight = self._inflight[key] = _Flight()
+
+        def run():
+            try:
+                self._run_flight(key, flight, getter_func, ttl, stale_ttl)
+            except Exception:
+                logger.exception("Background refresh failed for %s", key)
+
+        threading.Thread(target=run, name='pbl-cache-refresh', daemon=True).start()
+
+    async def aget_or_set(self, key: str, getter_func, ttl: Optional[int] = None,
+                          stale_ttl: Optional[int] = None) -> Any:
+        """
+        Async get_or_set; getter_func may be a coroutine function, plain functions run in a
+        worker thread. The loader runs in its own task, so cancelling one caller (e.g. a warm-up
+        worker hitting its budget) does not cancel the load other callers are waiting on
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            found, value, is_stale = self._lookup(key, allow_stale=bool(stale_ttl))
+            if found:
+                if is_stale and flight_key not in self._async_inflight:
+                    self._astart_flight(loop, flight_key, getter_func, ttl, stale_ttl, background=True)
+                return value
+
+            future = self._async_inflight.get(flight_key)
+            if future is None:
+                future = self._astart_flight(loop, flight_key, getter_func, ttl, stale_ttl)
+
+        return await asyncio.shield(future)
+
+    def _astart_flight(self, loop: asyncio.AbstractEventLoop, flight_key: Tuple[int, str],
+                       getter_func, ttl: Optional[int], stale_ttl: Optional[int],
+                       background: bool = False) -> asyncio.Future:
+        """Start the loader task for a key and register its future (caller holds the lock)"""
+        future = self._async_inflight[flight_key] = loop.create_future()
+        task = loop.create_task(self._arun_flight(flight_key, future, getter_func, ttl, stale_ttl, background))
+        # The loop only keeps weak references to tasks
+        self._async_tasks.add(task)
+        task.add_done_callback(self._async_tasks.discard)
+        return future
+
+    async def _arun_flight(self, flight_key: Tuple[int, str], future: asyncio.Future,
+                           getter_func, ttl: Optional[int], stale_ttl: Optional[int],
+                           background: bool) -> None:
+        """Await the loader for a key and resolve the shared future"""
+        key = flight_key[1]
+        try:
+            shared = await asyncio.to_thread(self._fetch_shared, [key]) if self._backend else {}
+            if key in shared:
+                value = shared[key]
+            else:
+                started = time.perf_counter()
+                if inspect.iscoroutinefunction(getter_func):
+                    value = await getter_func()
+                else:
+                    value = await asyncio.to_thread(getter_func)
+                    if inspect.isawaitable(value):
+                        value = await value
+                self._observe_loader(key, started)
+                entry = self._loaded_entry(value, ttl, stale_ttl)
+                self._store_entry(key, entry)
+                if self._backend is not None:
+                    await asyncio.to_thread(self._write_shared, {key: entry})
+                value = _unwrap(value)
+            future.set_result(value)
+        except asyncio.CancelledError:
+            # Only reached when the loop itself cancels the task, e.g. at shutdown
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a flight with no waiters does not log a warning
+            future.exception()
+            if background:
+                logger.error("Background refresh failed for %s", key, exc_info=e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            with self._lock:
+                self._async_inflight.pop(flight_key, None)
+
+def _unwrap(value: Any) -> Any:
+    """Plain value of a loader result"""
+    return value.value if isinstance(value, Validated) else value
+
+def _estimate_size(value: Any) -> int:
+    """Approximate the in-memory size of a value in bytes"""
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return size
+
+def _size_prefix(key: str) -> str:
+    """Prefix used to group resident bytes and metrics, e.g. 'pbl:scenario'"""
+    first = key.find(':')
+    second = key.find(':', first + 1) if first != -1 else -1
+    return key if second == -1 else key[:second]
+
+def _key_prefixes(key: str) -> List[str]:
+    """Proper colon-separated prefixes of a key"""
+    prefixes = []
+    pos = key.find(':')
+    while pos != -1:
+        prefixes.append(key[:pos])
+        pos = key.find(':', pos + 1)
+    return prefixes
+
+def _key_tags(key: str) -> List[Tuple[str, ...]]:
+    """Tags for keys following the pbl:<type>:... layout of the key generators below"""
+    parts = key.split(':')
+    if len(parts) < 3 or parts[0] != 'pbl':
+        return []
+    if parts[1] == 'scenario':
+        return [('scenario', parts[2])]
+    if parts[1] == 'cms' and len(parts) >= 4 and parts[2] == 'pbl':
+        return [('scenario', parts[3])]
+    if parts[1] in ('program', 'task', 'completion') and len(parts) >= 5:
+        user_email, scenario_id, program_id = parts[2:5]
+        return [
+            ('user', user_email),
+            ('scenario', scenario_id),
+            ('program', user_email, scenario_id, program_id),
+        ]
+    return []
 
 # Global cache instance
-pbl_cache = PBLCacheService()
+pbl_cache = PBLCacheService(ttl_jitter=0.1)
+
+# Scenario reads per (scenario id, lang), snapshotted for the next instance's warm-up
+scenario_access = AccessTracker()
 
 # Cache key generators
 def get_program_key(user_email: str, scenario_id: str, program_id: str) -> str:
@@ -99,3 +864,7 @@ def get_completion_key(user_email: str, scenario_id: str, program_id: str) -> st
 def get_scenario_key(scenario_id: str, lang: str) -> str:
     """Generate cache key for scenario data"""
     return f"pbl:scenario:{scenario_id}:{lang}"
+
+def get_cms_key(content_type: str, content_id: str, lang: str) -> str:
+    """Generate cache key for a single-language CMS document"""
+    return f"pbl:cms:{content_type}:{content_id}:{lang}"
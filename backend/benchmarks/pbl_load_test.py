@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Load test for the PBL cache and content path
+Replays synthetic PBL traffic (Zipf-distributed scenarios, languages and users, a configurable
+read/write/invalidate mix) through PBLCacheService and the key helpers, with loaders that sleep
+like GCS reads, and reports throughput, p50/p99 latency, hit ratio and peak RSS per workload.
+Each profile runs in a fresh process, as the peak RSS of a process only ever grows
+
+Traces are generated from a seed, so runs are repeatable; --save-trace/--trace replay the exact
+same operations. --save-baseline records results and --baseline fails the run on regressions.
+Baselines are machine specific, record them on the machine that checks them.
+
+Usage: cd backend && python benchmarks/pbl_load_test.py [--profile NAME] [--baseline FILE]
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.pbl_cache_service import (  # noqa: E402
+    PBLCacheService,
+    get_completion_key,
+    get_program_key,
+    get_scenario_key,
+    get_task_key,
+)
+
+LANGUAGES = ['en', 'zhTW', 'zhCN', 'ja', 'ko', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'ar', 'th', 'id']
+
+# Workload profiles; mix is the share of reads, writes and invalidations
+PROFILES = {
+    'browse': {'mix': (0.95, 0.04, 0.01), 'users': 5_000, 'scenarios': 40},
+    'default': {'mix': (0.80, 0.15, 0.05), 'users': 20_000, 'scenarios': 40},
+    'progress': {'mix': (0.55, 0.35, 0.10), 'users': 20_000, 'scenarios': 40},
+}
+DEFAULTS = {
+    'ops': 50_000,
+    'threads': 16,
+    'cache_size': 5_000,
+    'ttl': 300,
+    'scenario_skew': 1.1,   # Zipf exponents
+    'lang_skew': 1.5,
+    'user_skew': 0.8,
+    'programs_per_user': 3,
+    'tasks_per_program': 6,
+    'gcs_ms': 8.0,          # median simulated GCS read
+    'gcs_sigma': 0.6,       # lognormal spread, p99 is about 4x the median
+    'scenario_kb': 20,
+}
+
+# Share of reads per key type
+READ_TARGETS = (('scenario', 0.50), ('task', 0.30), ('program', 0.15), ('completion', 0.05))
+WRITE_TARGETS = (('task', 0.60), ('program', 0.25), ('completion', 0.15))
+# Content publishes are rare next to per-program resets
+SCENARIO_INVALIDATION_SHARE = 0.02
+
+# Regression thresholds for --baseline
+THROUGHPUT_TOLERANCE = 0.15
+LATENCY_TOLERANCE = 0.25
+HIT_RATIO_TOLERANCE = 0.02
+
+
+class ZipfSampler:
+    """Draws ranks 0..n-1 with P(k) proportional to 1 / (k + 1) ** skew"""
+
+    def __init__(self, n: int, skew: float, rng: random.Random):
+        self._cumulative = list(accumulate(1 / (k + 1) ** skew for k in range(n)))
+        self._rng = rng
+
+    def __call__(self) -> int:
+        return bisect_left(self._cumulative, self._rng.random() * self._cumulative[-1])
+
+
+def _pick(rng: random.Random, choices: Sequence) -> str:
+    roll = rng.random()
+    for name, share in choices:
+        roll -= share
+        if roll < 0:
+            return name
+    return choices[-1][0]
+
+
+def generate_trace(config: Dict[str, Any], seed: int = 0) -> List[List[Any]]:
+    """
+    Operations as lists: [op, target, *ids], op is read/write/invalidate and target a key type
+    Scenario ids are popularity ranks shuffled with the seed, so hot scenarios are not s0, s1, ...
+    """
+    rng = random.Random(seed)
+    scenario_names = [f"scenario_{i:03d}" for i in range(config['scenarios'])]
+    rng.shuffle(scenario_names)
+    scenario = ZipfSampler(config['scenarios'], config['scenario_skew'], rng)
+    lang = ZipfSampler(len(LANGUAGES), config['lang_skew'], rng)
+    user = ZipfSampler(config['users'], config['user_skew'], rng)
+    read_share, write_share, _ = config['mix']
+
+    trace = []
+    for _ in range(config['ops']):
+        roll = rng.random()
+        op = 'read' if roll < read_share else 'write' if roll < read_share + write_share else 'invalidate'
+        scenario_id = scenario_names[scenario()]
+        if op == 'invalidate':
+            if rng.random() < SCENARIO_INVALIDATION_SHARE:
+                trace.append([op, 'scenario', scenario_id])
+                continue
+            target = 'program'
+        else:
+            target = _pick(rng, READ_TARGETS if op == 'read' else WRITE_TARGETS)
+        if target == 'scenario':
+            trace.append([op, target, scenario_id, LANGUAGES[lang()]])
+            continue
+        ids = [f"user{user()}@example.com", scenario_id, f"prog-{rng.randrange(config['programs_per_user'])}"]
+        if target == 'task':
+            ids.append(f"task-{rng.randrange(config['tasks_per_program']) + 1}")
+        trace.append([op, target] + ids)
+    return trace
+
+
+def save_trace(trace: List[List[Any]], path: Path) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for op in trace:
+            f.write(json.dumps(op, separators=(',', ':')) + '\n')
+
+
+def load_trace(path: Path) -> List[List[Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+KEY_FUNCTIONS = {
+    'scenario': get_scenario_key,
+    'program': get_program_key,
+    'task': get_task_key,
+    'completion': get_completion_key,
+}
+
+
+def _percentile(sorted_values: List[int], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))] / 1e3
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_trace(trace: List[List[Any]], config: Dict[str, Any], seed: int = 0) -> Dict[str, Any]:
+    """Replay a trace from config['threads'] threads against a fresh cache"""
+    cache = PBLCacheService(max_entries=config['cache_size'], default_ttl=config['ttl'], ttl_jitter=0.1)
+    scenario_doc = {'scenario_info': {'title': 'x' * 200},
+                    'tasks': [{'id': f"task-{i}", 'instructions': ['y' * 100] * 10}
+                              for i in range(max(1, config['scenario_kb'] // 2))]}
+    median_s = config['gcs_ms'] / 1e3
+    loader_calls = [0]
+    calls_lock = threading.Lock()
+    threads = config['threads']
+    latencies: List[Dict[str, List[int]]] = [{} for _ in range(threads)]
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+
+        def gcs_read(value):
+            def load():
+                time.sleep(median_s * rng.lognormvariate(0, config['gcs_sigma']))
+                with calls_lock:
+                    loader_calls[0] += 1
+                return value
+            return load
+
+        timings = latencies[index]
+        for op, target, *ids in trace[index::threads]:
+            started = time.perf_counter_ns()
+            if op == 'read':
+                value = scenario_doc if target == 'scenario' else {'ids': ids, 'status': 'in_progress'}
+                cache.get_or_set(KEY_FUNCTIONS[target](*ids), gcs_read(value))
+            elif op == 'write':
+                cache.set(KEY_FUNCTIONS[target](*ids), {'ids': ids, 'updated_at': started})
+            elif target == 'scenario':
+                cache.invalidate_scenario(*ids)
+            else:
+                cache.invalidate_program(*ids)
+            timings.setdefault(f"{op}:{target}", []).append(time.perf_counter_ns() - started)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    by_kind: Dict[str, List[int]] = {}
+    for timings in latencies:
+        for kind, values in timings.items():
+            by_kind.setdefault(kind, []).extend(values)
+    everything = sorted(v for values in by_kind.values() for v in values)
+
+    lookups = hits = 0
+    for stats in cache.get_stats()['prefixes'].values():
+        hits += stats['hits'] + stats['stale_hits']
+        lookups += stats['hits'] + stats['stale_hits'] + stats['misses']
+
+    return {
+        'ops': len(trace),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(trace) / elapsed, 1),
+        'p50_us': round(_percentile(everything, 0.50), 1),
+        'p99_us': round(_percentile(everything, 0.99), 1),
+        'hit_ratio': round(hits / lookups, 4) if lookups else 0.0,
+        'loader_calls': loader_calls[0],
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'by_op': {
+            kind: {'count': len(values), 'p50_us': round(_percentile(sorted(values), 0.50), 1),
+                   'p99_us': round(_percentile(sorted(values), 0.99), 1)}
+            for kind, values in sorted(by_kind.items())
+        },
+    }
+
+
+def run_isolated(trace: List[List[Any]], config: Dict[str, Any], seed: int = 0) -> Dict[str, Any]:
+    """run_trace() in a fresh process, so peak_rss_mb is this run's own and not an earlier one's"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(run_trace, trace, config, seed).result()
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Regressions of results against a saved baseline, one message each"""
+    regressions = []
+    for profile, result in results.items():
+        base = baseline.get(profile)
+        if base is None:
+            continue
+        if result['throughput'] < base['throughput'] * (1 - THROUGHPUT_TOLERANCE):
+            regressions.append(f"{profile}: throughput {result['throughput']:,.0f} ops/s "
+                               f"< baseline {base['throughput']:,.0f}")
+        if result['p99_us'] > base['p99_us'] * (1 + LATENCY_TOLERANCE):
+            regressions.append(f"{profile}: p99 {result['p99_us']:,.0f}µs > baseline {base['p99_us']:,.0f}µs")
+        if result['hit_ratio'] < base['hit_ratio'] - HIT_RATIO_TOLERANCE:
+            regressions.append(f"{profile}: hit ratio {result['hit_ratio']:.1%} "
+                               f"< baseline {base['hit_ratio']:.1%}")
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Any]], details: bool = False) -> None:
+    print(f"{'profile':<10} | {'ops/s':>10} | {'p50 (µs)':>9} | {'p99 (µs)':>9} | "
+          f"{'hit ratio':>9} | {'loads':>7} | {'peak RSS':>9}")
+    print('-' * 82)
+    for profile, r in results.items():
+        print(f"{profile:<10} | {r['throughput']:>10,.0f} | {r['p50_us']:>9,.1f} | {r['p99_us']:>9,.1f} | "
+              f"{r['hit_ratio']:>9.1%} | {r['loader_calls']:>7,} | {r['peak_rss_mb']:>6.0f} MB")
+        if details:
+            for kind, stats in r['by_op'].items():
+                print(f"    {kind:<20} {stats['count']:>8,} ops  p50 {stats['p50_us']:>9,.1f}µs  "
+                      f"p99 {stats['p99_us']:>9,.1f}µs")
+
+
+def build_config(profile: str, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    config = dict(DEFAULTS, **PROFILES[profile])
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    return config
+
+
+def parse_mix(text: str) -> tuple:
+    """'80/15/5' -> (0.8, 0.15, 0.05)"""
+    parts = [float(p) for p in text.split('/')]
+    if len(parts) != 3 or min(parts) < 0 or sum(parts) <= 0:
+        raise argparse.ArgumentTypeError("mix must be READ/WRITE/INVALIDATE, e.g. 80/15/5")
+    return tuple(p / sum(parts) for p in parts)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profile', action='append', choices=sorted(PROFILES),
+                        help='workload to run, repeatable (default: all)')
+    parser.add_argument('--ops', type=int, help=f"operations per profile (default {DEFAULTS['ops']:,})")
+    parser.add_argument('--threads', type=int, help=f"concurrent clients (default {DEFAULTS['threads']})")
+    parser.add_argument('--users', type=int, help='distinct users')
+    parser.add_argument('--cache-size', type=int, help='PBLCacheService max_entries')
+    parser.add_argument('--mix', type=parse_mix, help='read/write/invalidate shares, e.g. 80/15/5')
+    parser.add_argument('--gcs-ms', type=float, help=f"median simulated GCS latency (default {DEFAULTS['gcs_ms']})")
+    parser.add_argument('--seed', type=int, default=0, help='trace seed')
+    parser.add_argument('--trace', type=Path, help='replay this JSONL trace instead of generating one')
+    parser.add_argument('--save-trace', type=Path, help='write the generated trace(s) to this path')
+    parser.add_argument('--baseline', type=Path, help='fail when results regress against this file')
+    parser.add_argument('--save-baseline', type=Path, help='write results as the new baseline')
+    parser.add_argument('--details', action='store_true', help='latency per operation type')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    overrides = {'ops': args.ops, 'threads': args.threads, 'users': args.users,
+                 'cache_size': args.cache_size, 'mix': args.mix, 'gcs_ms': args.gcs_ms}
+    profiles = args.profile or list(PROFILES)
+    if args.trace and len(profiles) != 1:
+        parser.error('--trace replays one profile, pick it with --profile')
+
+    results = {}
+    for profile in profiles:
+        config = build_config(profile, overrides)
+        if args.trace:
+            trace = load_trace(args.trace)
+        else:
+            trace = generate_trace(config, args.seed)
+            if args.save_trace:
+                path = args.save_trace if len(profiles) == 1 else \
+                    args.save_trace.with_name(f"{args.save_trace.stem}_{profile}{args.save_trace.suffix}")
+                save_trace(trace, path)
+        results[profile] = run_isolated(trace, config, args.seed)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results, args.details)
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+        print(f"\n✅ Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding='utf-8')))
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for message in regressions:
+                print(f"  - {message}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Tests for cache warm-up at startup.
+"""
+
+import asyncio
+import time
+
+from app.services import cache_warmup
+from app.services.access_tracker import AccessTracker
+from app.services.cache_warmup import CacheWarmup, plan_pairs, warm_up
+from app.services.content_bundle import ContentBundle, build_bundle, load_scenario
+from app.services.pbl_cache_service import MISSING, PBLCacheService, get_scenario_key
+
+
+def test_access_snapshot_round_trip(tmp_path):
+    """Saved counts come back decayed, unusable snapshots are ignored."""
+    tracker = AccessTracker()
+    for _ in range(3):
+        tracker.record("ai_job_search", "en")
+    tracker.record("smart_city", "ja")
+    path = tmp_path / "access.json"
+    tracker.save(path)
+
+    restored = AccessTracker()
+    restored.record("smart_city", "ja", 2)
+    assert restored.load(path, decay=0.5) == 2
+    assert restored.counts() == {("ai_job_search", "en"): 1.5, ("smart_city", "ja"): 2.5}
+    assert restored.top() == [("smart_city", "ja"), ("ai_job_search", "en")]
+
+    path.write_text("{not json", encoding="utf-8")
+    assert AccessTracker().load(path) == 0
+    assert AccessTracker().load(tmp_path / "missing.json") == 0
+
+
+def test_plan_puts_snapshot_pairs_first():
+    """Hot pairs lead the plan and fallback pairs fill it up without duplicates."""
+    tracker = AccessTracker()
+    tracker.record("b", "en", 5)
+    tracker.record("a", "ja", 9)
+    fallback = [("a", "en"), ("b", "en"), ("c", "en")]
+    assert plan_pairs(tracker, fallback, limit=3) == [("a", "ja"), ("b", "en"), ("a", "en")]
+
+
+def test_warm_up_loads_concurrently():
+    """Loads overlap up to the concurrency limit and outcomes are counted."""
+    cache = PBLCacheService()
+    cache.set(get_scenario_key("cached", "en"), {"title": "cached"})
+    running = []
+    peak = []
+
+    async def loader(scenario_id, lang):
+        running.append(scenario_id)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(scenario_id)
+        if scenario_id == "broken":
+            raise OSError("unreadable")
+        return None if scenario_id == "gone" else {"title": scenario_id}
+
+    pairs = [(f"s{i}", "en") for i in range(10)] + [("cached", "en"), ("gone", "en"), ("broken", "en")]
+    stats = asyncio.run(warm_up(pairs, loader, cache, concurrency=4, budget=5))
+
+    assert max(peak) == 4
+    assert {k: stats[k] for k in ("warmed", "cached", "missing", "failed", "skipped")} == {
+        "warmed": 10, "cached": 1, "missing": 1, "failed": 1, "skipped": 0}
+    assert not stats["timed_out"]
+    assert cache.get(get_scenario_key("s9", "en")) == {"title": "s9"}
+
+
+def test_warm_up_stops_at_budget():
+    """Pairs left when the budget runs out are skipped, sync loaders run in threads."""
+    cache = PBLCacheService()
+
+    def loader(scenario_id, lang):
+        time.sleep(0.05)
+        return {"title": scenario_id}
+
+    pairs = [(f"s{i}", "en") for i in range(40)]
+    stats = asyncio.run(warm_up(pairs, loader, cache, concurrency=2, budget=0.12))
+    assert stats["timed_out"]
+    assert 2 <= stats["warmed"] <= 8
+    assert stats["skipped"] == 40 - stats["warmed"]
+    # Plan order is kept, so the hottest pairs are the ones that made it
+    assert cache.get(get_scenario_key("s0", "en")) == {"title": "s0"}
+    assert cache.get(get_scenario_key("s39", "en"), MISSING) is MISSING
+
+
+def test_ready_after_warm_up(tmp_path):
+    """The instance reports ready once warm-up is done, even if it failed."""
+    snapshot = tmp_path / "access.json"
+    previous = AccessTracker()
+    previous.record("hot", "zhTW", 10)
+    previous.save(snapshot)
+
+    cache = PBLCacheService()
+    warmup = CacheWarmup(cache, loader=lambda s, lang: {"id": s}, tracker=AccessTracker(),
+                         snapshot_path=snapshot, limit=2)
+    assert not warmup.ready
+    stats = asyncio.run(warmup.run(fallback=[("cold", "en"), ("other", "en")]))
+    assert warmup.ready
+    assert stats["warmed"] == 2 and stats["snapshot_pairs"] == 1
+    assert cache.get(get_scenario_key("hot", "zhTW")) == {"id": "hot"}
+    assert cache.get(get_scenario_key("other", "en"), MISSING) is MISSING
+    assert warmup.status()["ready"] is True
+
+    def broken_plan(*args):
+        raise RuntimeError("boom")
+
+    failing = CacheWarmup(PBLCacheService(), loader=lambda s, lang: None, tracker=AccessTracker(),
+                          snapshot_path=tmp_path / "none.json")
+    failing.tracker.top = broken_plan
+    assert asyncio.run(failing.run(fallback=[])) == {}
+    assert failing.ready
+    assert asyncio.run(failing.wait_ready(timeout=0.1))
+
+    warmup.tracker.record("hot", "zhTW")
+    warmup.save_snapshot()
+    reloaded = AccessTracker()
+    reloaded.load(snapshot, decay=1.0)
+    assert reloaded.counts() == {("hot", "zhTW"): 6.0}
+
+
+def test_default_loader_matches_load_scenario(tmp_path, monkeypatch):
+    """Warm-up leaves the same entries a request would: no English under a missing translation's key."""
+    scenario_dir = tmp_path / "pbl_data" / "scenarios" / "ai_job_search"
+    scenario_dir.mkdir(parents=True)
+    (scenario_dir / "ai_job_search_en.yaml").write_text("scenario_info:\n  title: Job Search\n", encoding="utf-8")
+    build_bundle(tmp_path, tmp_path / "bundle.bin")
+    bundle = ContentBundle(tmp_path / "bundle.bin")
+    monkeypatch.setattr(cache_warmup, "get_default_bundle", lambda: bundle)
+    try:
+        cache = PBLCacheService(negative_ttl=30)
+        warmup = CacheWarmup(cache, tracker=AccessTracker(), snapshot_path=tmp_path / "none.json")
+        stats = asyncio.run(warmup.run(fallback=[("ai_job_search", "en"), ("ai_job_search", "fr")]))
+        assert stats["warmed"] == 1 and stats["missing"] == 1
+
+        fr_entry = cache._cache[get_scenario_key("ai_job_search", "fr")]
+        assert fr_entry["value"] is None
+        assert fr_entry["expires_at"] - fr_entry["created_at"] <= 30
+        assert load_scenario("ai_job_search", "fr", bundle=bundle, cache=cache) == {
+            "scenario_info": {"title": "Job Search"}}
+    finally:
+        bundle.close()
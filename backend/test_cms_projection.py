@@ -0,0 +1,136 @@
+"""
+Tests for the per-language CMS projection.
+"""
+
+import os
+
+import pytest
+import yaml
+
+from app.services.cms_projection import (
+    build_projections, languages_in, load_cms_document, load_projection, project, projection_path,
+)
+from app.services.pbl_cache_service import PBLCacheService, get_cms_key
+
+
+MASTER = """\
+scenario_info:
+  id: ai-job-search
+  title: AI Job Search
+  title_zh: AI 求職訓練
+  title_ja: AI就職活動
+  description: Practice a job interview with AI
+  description_zh: 用 AI 模擬面試
+  prerequisites:
+  - Basic computer skills
+  prerequisites_ja:
+  - 基本的なコンピュータスキル
+tasks:
+- id: task-1
+  title: Research
+  title_zh: 研究
+  title_ja: ''
+  instructions:
+  - Search for jobs
+  - en: Compare offers
+    zhTW: 比較工作機會
+  - en: Write a summary
+  instructions_zh:
+  - 搜尋工作
+  hints:
+    en: Use filters
+    ja: フィルターを使う
+"""
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def cms_root(tmp_path):
+    root = tmp_path / "cms"
+    write(root / "pbl_data" / "ai_job_search_scenario.yaml", MASTER)
+    write(root / "pbl_data" / "_scenario_template.yaml", "scenario_info:\n  title: Template\n")
+    write(root / "rubrics_data" / "ksa_codes.yaml", "knowledge_codes:\n  desc: Knowledge\n  desc_ko: 지식\n")
+    write(root / "assessment_data" / "broken.yaml", "questions: : broken\n")
+    return root
+
+
+def test_project_suffix_keys_and_language_maps():
+    """Each field holds only the requested language and falls back to English."""
+    data = yaml.safe_load(MASTER)
+
+    zh = project(data, "zhTW")
+    assert zh["scenario_info"] == {
+        "id": "ai-job-search", "title": "AI 求職訓練", "description": "用 AI 模擬面試",
+        "prerequisites": ["Basic computer skills"],
+    }
+    assert zh["tasks"][0]["instructions"] == ["搜尋工作"]
+    assert zh["tasks"][0]["hints"] == "Use filters"
+
+    ja = project(data, "ja")
+    # Empty translations fall back, mixed lists resolve item by item
+    assert ja["tasks"][0]["title"] == "Research"
+    assert ja["tasks"][0]["instructions"] == ["Search for jobs", "Compare offers", "Write a summary"]
+    assert ja["tasks"][0]["hints"] == "フィルターを使う"
+    assert ja["scenario_info"]["prerequisites"] == ["基本的なコンピュータスキル"]
+
+    en = project(data, "en")
+    assert list(en["tasks"][0]) == ["id", "title", "instructions", "hints"]
+    assert en["scenario_info"]["title"] == "AI Job Search"
+    assert project(data, "th") == en
+
+    assert languages_in(data) == {"en", "zhTW", "ja"}
+    # A dict with keys that are not all languages is left alone
+    assert project({"en": "a", "level": 1}, "ja") == {"en": "a", "level": 1}
+
+
+def test_build_projections(cms_root, tmp_path):
+    """Masters are projected once per language present and skipped while unchanged."""
+    out = tmp_path / "out"
+    stats = build_projections(cms_root, out)
+    assert stats["masters"] == 2
+    assert stats["documents"] == 5
+    assert list(stats["errors"]) == [str(cms_root / "assessment_data" / "broken.yaml")]
+    assert stats["projected_bytes"] < stats["master_bytes"]
+    assert sorted(os.listdir(out / "pbl" / "ai_job_search")) == [
+        "ai_job_search_en.json", "ai_job_search_ja.json", "ai_job_search_zhTW.json",
+    ]
+    assert not (out / "pbl" / "_scenario_template").exists()
+
+    again = build_projections(cms_root, out)
+    assert again["masters"] == 0
+    assert again["skipped"] == 2
+
+
+def test_load_projection(cms_root, tmp_path):
+    """Prebuilt projections are used while current, otherwise the master is projected."""
+    out = tmp_path / "out"
+    assert load_projection("pbl", "ai_job_search", "zhTW", cms_root, out)["scenario_info"]["title"] == "AI 求職訓練"
+    build_projections(cms_root, out)
+
+    path = projection_path("pbl", "ai_job_search", "zhTW", out)
+    path.write_text('{"prebuilt": true}', encoding="utf-8")
+    assert load_projection("pbl", "ai_job_search", "zhTW", cms_root, out) == {"prebuilt": True}
+    # No translation for ko: the English projection is served
+    assert load_projection("pbl", "ai_job_search", "ko", cms_root, out)["scenario_info"]["title"] == "AI Job Search"
+
+    master = cms_root / "pbl_data" / "ai_job_search_scenario.yaml"
+    future = path.stat().st_mtime_ns + 10**9
+    os.utime(master, ns=(future, future))
+    assert load_projection("pbl", "ai_job_search", "zhTW", cms_root, out)["scenario_info"]["title"] == "AI 求職訓練"
+    assert load_projection("pbl", "missing", "en", cms_root, out) is None
+
+
+def test_load_cms_document_caches_one_language(cms_root, tmp_path):
+    """The cache holds one entry per requested language, invalidated with its scenario."""
+    cache = PBLCacheService()
+    document = load_cms_document("pbl", "ai_job_search", "ja", cms_root, tmp_path / "out", cache)
+    assert document["scenario_info"]["title"] == "AI就職活動"
+    assert cache.get(get_cms_key("pbl", "ai_job_search", "ja")) == document
+    assert cache.get(get_cms_key("pbl", "ai_job_search", "en")) is None
+
+    assert cache.invalidate_scenario("ai_job_search") == 1
+    assert cache.get(get_cms_key("pbl", "ai_job_search", "ja")) is None
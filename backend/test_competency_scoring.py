@@ -0,0 +1,114 @@
+"""
+Tests for vectorized competency scoring.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.services.competency_scoring import CompetencyScorer, QuestionBank, TaskMap
+from app.services.ksa_index import KsaIndex, build_index
+
+QUESTIONS = [
+    {"id": "E001", "domain": "engaging_with_ai", "correct_answer": "a",
+     "ksa_mapping": {"knowledge": ["K1.1"], "skills": ["S1.1"]}},
+    {"id": "E002", "domain": "engaging_with_ai", "correct_answer": "c",
+     "ksa_mapping": {"knowledge": ["K1.1"]}},
+    {"id": "C001", "domain": "creating_with_ai", "correct_answer": "b",
+     "ksa_mapping": {"skills": ["S1.1"]}},
+]
+CODES = ["K1.1", "S1.1"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    scenario_dir = tmp_path / "content" / "pbl_data" / "scenarios" / "job_search"
+    scenario_dir.mkdir(parents=True)
+    (scenario_dir / "job_search_en.yaml").write_text(
+        "scenario_info:\n  target_domains: [creating_with_ai]\n"
+        "tasks:\n  - id: task-1\n    KSA_focus:\n      primary: [S1.1]\n      secondary: [K1.1]\n",
+        encoding="utf-8")
+    out = tmp_path / "ksa.bin"
+    build_index(tmp_path / "content", out)
+    return KsaIndex(out)
+
+
+def test_assessment_scores():
+    """Domain and KSA scores are the share of correctly answered mapped questions."""
+    scorer = CompetencyScorer(QuestionBank(QUESTIONS, CODES))
+    scores = scorer.score(
+        ["alice", "bob", "carol"],
+        [("alice", "E001", "a"), ("alice", "E002", "c"), ("alice", "C001", "d"),
+         ("bob", "E001", "A"), ("bob", "C001", "???"), ("bob", "X999", "a"), ("dave", "E001", "a")])
+
+    alice = scores.learner("alice")
+    assert alice["domains"] == {"engaging_with_ai": 1.0, "creating_with_ai": 0.0,
+                                "managing_with_ai": None, "designing_with_ai": None}
+    assert alice["ksa"] == {"K1.1": 1.0, "S1.1": 0.5}
+    # Skipped questions of a started assessment count as wrong
+    assert scores.learner("bob")["ksa"] == {"K1.1": 0.5, "S1.1": 0.5}
+    # No answers at all is no evidence, not a zero
+    assert scores.learner("carol")["ksa"] == {"K1.1": None, "S1.1": None}
+    assert scores.learner("dave") is None
+    assert scores.weakest_codes("alice", limit=1) == ["S1.1"]
+    assert scores.weakest_codes("carol") == []
+
+    summary = scores.cohort_summary()
+    assert summary["ksa"]["K1.1"] == {"mean": 0.75, "learners": 2}
+    assert summary["domains"]["managing_with_ai"] == {"mean": None, "learners": 0}
+
+
+def test_task_results_combine_with_assessment(index):
+    """PBL task scores add weighted evidence on top of assessment answers."""
+    tasks = TaskMap(index, CODES)
+    assert tasks.tasks == [("job_search", "task-1")]
+    scorer = CompetencyScorer(QuestionBank(QUESTIONS, CODES), tasks)
+    scores = scorer.score(
+        ["alice", "bob"],
+        [("alice", "E001", "b"), ("alice", "E002", "b"), ("alice", "C001", "b")],
+        [("alice", "job_search", "task-1", 40), ("alice", "job_search", "task-1", 90),
+         ("bob", "job_search", "task-1", 50), ("bob", "job_search", "missing", 100)])
+
+    alice = scores.learner("alice")
+    # S1.1: C001 right (1/1) plus primary task at 0.9 with weight 2 over 2 questions + 2
+    assert alice["ksa"]["S1.1"] == pytest.approx((1 + 1.8) / 4, abs=1e-4)
+    assert alice["ksa"]["K1.1"] == pytest.approx(0.9 / 3, abs=1e-4)
+    assert alice["domains"]["creating_with_ai"] == pytest.approx((1 + 0.9) / 2, abs=1e-4)
+    bob = scores.learner("bob")
+    assert bob["ksa"] == {"K1.1": 0.5, "S1.1": 0.5}
+    assert bob["domains"]["engaging_with_ai"] is None
+
+
+def test_task_map_skips_tasks_without_id_and_reads_domain_focus(tmp_path):
+    """Tasks lacking an id are left out; a domain listed as focus weights that domain."""
+    scenario_dir = tmp_path / "content" / "pbl_data" / "scenarios" / "smart_city"
+    scenario_dir.mkdir(parents=True)
+    (scenario_dir / "smart_city_en.yaml").write_text(
+        "tasks:\n  - KSA_focus:\n      primary: [K1.1]\n"
+        "  - id: 2\n    KSA_focus:\n      primary: [managing_with_ai]\n"
+        "  - id: task-1\n    KSA_focus:\n      primary: [K1.1]\n",
+        encoding="utf-8")
+    out = tmp_path / "ksa.bin"
+    assert build_index(tmp_path / "content", out)["unknown_codes"] == ["K1.1"]
+
+    tasks = TaskMap(KsaIndex(out), CODES)
+    assert tasks.tasks == [("smart_city", 2), ("smart_city", "task-1")]
+    assert tasks.domain_weights[0].tolist() == [0, 0, 2, 0]
+
+
+def test_score_matrices_matches_row_input():
+    """Pre-encoded matrices score the same as raw rows."""
+    scorer = CompetencyScorer(QuestionBank(QUESTIONS, CODES))
+    rng = np.random.default_rng(7)
+    answers = rng.integers(-1, 4, size=(200, len(QUESTIONS))).astype(np.int8)
+    learner_ids = [f"u{i}" for i in range(len(answers))]
+    rows = [(learner_ids[i], QUESTIONS[j]["id"], "abcd"[answers[i, j]])
+            for i, j in zip(*np.nonzero(answers >= 0))]
+
+    from_matrix = scorer.score_matrices(learner_ids, answers)
+    from_rows = scorer.score(learner_ids, rows)
+    np.testing.assert_array_equal(from_matrix.ksa_scores, from_rows.ksa_scores)
+    np.testing.assert_array_equal(from_matrix.domain_scores, from_rows.domain_scores)
+    expected = (answers[0] == [0, 2, 1]) @ [1, 1, 0] / 2 if (answers[0] >= 0).any() else math.nan
+    assert from_matrix.ksa_scores[0, 0] == pytest.approx(expected, nan_ok=True)
@@ -0,0 +1,83 @@
+"""
+Tests for the precompiled content bundle.
+"""
+
+import pytest
+
+from app.services.content_bundle import ContentBundle, build_bundle, load_scenario
+from app.services.pbl_cache_service import PBLCacheService, get_scenario_key
+
+
+@pytest.fixture
+def content_root(tmp_path):
+    scenario_dir = tmp_path / "pbl_data" / "scenarios" / "ai_job_search"
+    scenario_dir.mkdir(parents=True)
+    (scenario_dir / "ai_job_search_en.yaml").write_text(
+        "scenario_info:\n  title: Job Search\n  estimated_duration: 90\n", encoding="utf-8")
+    (scenario_dir / "ai_job_search_ja.yaml").write_text(
+        "scenario_info:\n  title: 就職活動\n", encoding="utf-8")
+    (scenario_dir / "ai_job_search_ko.yaml").write_text(
+        "scenario_info:\n  title: : broken\n", encoding="utf-8")
+    (scenario_dir / "ai_job_search_template.yaml").write_text("ignored: true\n", encoding="utf-8")
+    ksa_dir = tmp_path / "rubrics_data" / "ksa_codes"
+    ksa_dir.mkdir(parents=True)
+    (ksa_dir / "ksa_codes_en.yml").write_text("knowledge_codes:\n  themes: {}\n", encoding="utf-8")
+    return tmp_path
+
+
+def test_build_and_read_bundle(content_root, tmp_path):
+    """Documents are addressable by type, id and language."""
+    out = tmp_path / "bundle.bin"
+    stats = build_bundle(content_root, out)
+    assert stats["documents"] == 3
+    assert len(stats["errors"]) == 1
+
+    bundle = ContentBundle(out)
+    try:
+        assert bundle.get_scenario("ai_job_search", "ja") == {"scenario_info": {"title": "就職活動"}}
+        assert bundle.get("rubrics", "ksa_codes", "en") == {"knowledge_codes": {"themes": {}}}
+        # Broken and missing translations fall back to English
+        assert bundle.get_scenario("ai_job_search", "ko")["scenario_info"]["title"] == "Job Search"
+        assert bundle.get_scenario("ai_job_search", "ko") == bundle.get_scenario("ai_job_search", "fr")
+        assert bundle.get("pbl", "ai_job_search", "fr", fallback_lang=None) is None
+    finally:
+        bundle.close()
+
+
+def test_rejects_non_bundle_files(tmp_path):
+    """Opening an arbitrary file raises ValueError."""
+    path = tmp_path / "not_a_bundle.bin"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        ContentBundle(path)
+
+
+def test_load_scenario_fills_cache_from_bundle(content_root, tmp_path):
+    """A cache miss is served from the bundle and cached."""
+    out = tmp_path / "bundle.bin"
+    build_bundle(content_root, out)
+    bundle = ContentBundle(out)
+    cache = PBLCacheService()
+    try:
+        scenario = load_scenario("ai_job_search", "en", bundle=bundle, cache=cache)
+        assert scenario["scenario_info"]["estimated_duration"] == 90
+        assert cache.get(get_scenario_key("ai_job_search", "en")) == scenario
+    finally:
+        bundle.close()
+
+
+def test_load_scenario_keeps_the_english_fallback_under_its_own_key(content_root, tmp_path):
+    """A missing translation is negative-cached briefly instead of caching English in its place."""
+    out = tmp_path / "bundle.bin"
+    build_bundle(content_root, out)
+    bundle = ContentBundle(out)
+    cache = PBLCacheService(negative_ttl=30)
+    try:
+        scenario = load_scenario("ai_job_search", "fr", bundle=bundle, cache=cache)
+        assert scenario["scenario_info"]["title"] == "Job Search"
+        assert cache.get(get_scenario_key("ai_job_search", "en")) == scenario
+        fr_entry = cache._cache[get_scenario_key("ai_job_search", "fr")]
+        assert fr_entry["value"] is None
+        assert fr_entry["expires_at"] - fr_entry["created_at"] <= 30
+    finally:
+        bundle.close()
@@ -0,0 +1,112 @@
+"""
+Tests for the multilingual content search index.
+"""
+
+import os
+
+import pytest
+
+from app.services.content_search import SearchIndex, build_index, main, tokenize
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def content_root(tmp_path):
+    scenarios = tmp_path / "pbl_data" / "scenarios"
+    write(scenarios / "ai_job_search" / "ai_job_search_en.yaml",
+          "scenario_info:\n  id: ai-job-search\n  difficulty: intermediate\n  title: AI Job Search\n"
+          "  description: Prepare your resume and practice a job interview with AI\n")
+    write(scenarios / "ai_job_search" / "ai_job_search_zhTW.yaml",
+          "scenario_info:\n  title: AI 求職訓練\n  description: 用 AI 準備履歷與模擬面試\n")
+    write(scenarios / "smart_city" / "smart_city_en.yaml",
+          "scenario_info:\n  title: Smart City\n  description: Plan city traffic with AI sensors\n")
+    write(scenarios / "smart_city" / "smart_city_ko.yaml", "scenario_info:\n  title: : broken\n")
+    write(tmp_path / "discovery_data" / "data_analyst" / "data_analyst_en.yaml",
+          "metadata:\n  title: Data Analyst\n  summary: Interview stakeholders and analyse data\n")
+    write(tmp_path / "assessment_data" / "ai_literacy" / "ai_literacy_questions_en.yaml",
+          "questions:\n  - question: Job interview question that is not indexed\n")
+    return tmp_path
+
+
+def test_tokenize_by_script():
+    """CJK and Thai become bigrams, Arabic and other words are normalized."""
+    assert tokenize("Prompt-Engineering für Anfänger") == ["prompt", "engineering", "fur", "anfanger"]
+    assert tokenize("人工智慧") == ["人工", "工智", "智慧"]
+    assert tokenize("AIリテラシー") == ["ai", "リテ", "テラ", "ラシ", "シー"]
+    assert tokenize("윤리 AI") == ["윤리", "ai"]
+    assert tokenize("字") == ["字"]
+    # Tone and vowel marks stay with their consonant
+    assert tokenize("งาน") == ["งา", "าน"]
+    assert tokenize("الذكاء الاصطناعيّ") == ["ذكاء", "اصطناعي"]
+    assert tokenize("ＡＩ　Ｔｏｏｌｓ") == ["ai", "tools"]
+
+
+def test_build_and_search(content_root, tmp_path):
+    """Matches are ranked by BM25 within the requested language."""
+    out = tmp_path / "search.bin"
+    stats = build_index(content_root, out)
+    assert stats["documents"] == 4
+    assert stats["parsed"] == 4
+    assert list(stats["errors"]) == [os.path.join("pbl_data", "scenarios", "smart_city", "smart_city_ko.yaml")]
+
+    with SearchIndex(out) as index:
+        results = index.search("job interview")
+        assert [(r["type"], r["id"]) for r in results] == [("pbl", "ai_job_search"), ("discovery", "data_analyst")]
+        assert results[0]["title"] == "AI Job Search"
+        assert results[0]["score"] > results[1]["score"] > 0
+
+        assert [r["id"] for r in index.search("面試", lang="zhTW")] == ["ai_job_search"]
+        assert index.search("面試", lang="en") == []
+        assert [r["lang"] for r in index.search("AI", lang=None, limit=10)].count("zhTW") == 1
+        assert [r["id"] for r in index.search("interview", types=["discovery"])] == ["data_analyst"]
+        # Identifier fields are not searchable
+        assert index.search("intermediate") == []
+        assert index.search("") == []
+
+
+def test_incremental_rebuild(content_root, tmp_path):
+    """Only changed files are parsed again, removed files drop out of the index."""
+    out = tmp_path / "search.bin"
+    build_index(content_root, out)
+
+    changed = content_root / "pbl_data" / "scenarios" / "smart_city" / "smart_city_en.yaml"
+    write(changed, "scenario_info:\n  title: Smart City\n  description: Interview residents about AI\n")
+    os.utime(changed, ns=(1, 1))
+    (content_root / "discovery_data" / "data_analyst" / "data_analyst_en.yaml").unlink()
+    stats = build_index(content_root, out)
+    assert (stats["documents"], stats["parsed"], stats["reused"]) == (3, 1, 2)
+
+    with SearchIndex(out) as index:
+        assert {r["id"] for r in index.search("interview")} == {"ai_job_search", "smart_city"}
+        assert index.search("traffic") == []
+
+    full = tmp_path / "full.bin"
+    build_index(content_root, full, incremental=False)
+    assert full.read_bytes() == out.read_bytes()
+
+
+def test_build_fails_on_unparseable_files(content_root, tmp_path, monkeypatch):
+    """The command exits 1 when files were skipped, after still writing the index."""
+    out = tmp_path / "search.bin"
+    monkeypatch.setattr("sys.argv", ["content_search", "--root", str(content_root), "--out", str(out)])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    with SearchIndex(out) as index:
+        assert index.search("smart city", "en")
+
+    os.remove(content_root / "pbl_data" / "scenarios" / "smart_city" / "smart_city_ko.yaml")
+    main()
+
+
+def test_rejects_other_files(tmp_path):
+    """Files without the index header are refused."""
+    path = tmp_path / "search.bin"
+    for content in (b"", b"not a search index at all"):
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            SearchIndex(path)
@@ -0,0 +1,157 @@
+"""
+Tests for the async GCS content loader, against a local fake GCS server.
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from app.services.gcs_loader import GCSContentLoader  # noqa: E402
+from app.services.pbl_cache_service import PBLCacheService, get_scenario_key  # noqa: E402
+
+
+class FakeGCS:
+    """Serves JSON API media downloads with generations, ETags and conditional requests"""
+
+    def __init__(self, delay=0.0):
+        self.objects = {}
+        self.requests = []
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def put(self, bucket, name, body):
+        generation = str(int(time.time() * 1e6) + len(self.objects) + len(self.requests))
+        self.objects[(bucket, name)] = (body.encode("utf-8"), generation)
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.active += 1
+                    fake.peak = max(fake.peak, fake.active)
+                try:
+                    time.sleep(fake.delay)
+                    self._serve()
+                finally:
+                    with fake._lock:
+                        fake.active -= 1
+
+            def _serve(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.split("/")
+                # /storage/v1/b/<bucket>/o/<object>
+                bucket, name = parts[4], unquote(parts[6])
+                fake.requests.append((name, dict(self.headers), query))
+                if query.get("alt") != ["media"] or (bucket, name) not in fake.objects:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body, generation = fake.objects[(bucket, name)]
+                etag = f'"{generation}"'
+                if (query.get("ifGenerationNotMatch") == [generation]
+                        or self.headers.get("If-None-Match") == etag):
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("x-goog-generation", generation)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+@pytest.fixture
+def fake_gcs():
+    fake = FakeGCS()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake.handler())
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def expire(cache, key):
+    cache._cache[key]["expires_at"] = time.time() - 1
+
+
+def test_expired_entries_revalidate(fake_gcs):
+    """An unchanged object refreshes with a 304, a changed one is downloaded again."""
+    name = "pbl_data/scenarios/ai_job_search/ai_job_search_en.yaml"
+    fake_gcs.put("content", name, "scenario_info:\n  title: Job Search\n")
+    cache = PBLCacheService()
+    key = get_scenario_key("ai_job_search", "en")
+
+    async def run():
+        async with GCSContentLoader("content", cache, base_url=fake_gcs.url) as gcs:
+            first = await gcs.get_scenario("ai_job_search", "en")
+            assert await gcs.get_scenario("ai_job_search", "en") is first
+            assert len(fake_gcs.requests) == 1
+
+            expire(cache, key)
+            assert await gcs.get_scenario("ai_job_search", "en") is first
+            assert gcs.stats["not_modified"] == 1 and gcs.stats["downloads"] == 1
+            _, headers, query = fake_gcs.requests[-1]
+            assert query["ifGenerationNotMatch"] == [cache.peek_validated(key).validator["generation"]]
+
+            fake_gcs.put("content", name, "scenario_info:\n  title: Job Search v2\n")
+            expire(cache, key)
+            assert (await gcs.get_scenario("ai_job_search", "en"))["scenario_info"]["title"] == "Job Search v2"
+            assert gcs.stats["downloads"] == 2
+
+    asyncio.run(run())
+
+
+def test_missing_objects_and_auth(fake_gcs):
+    """404s are negative-cached and a token provider adds a bearer header."""
+    fake_gcs.put("content", "config.json", '{"version": 3}')
+    cache = PBLCacheService()
+
+    async def token():
+        return "secret"
+
+    async def run():
+        async with GCSContentLoader("content", cache, base_url=fake_gcs.url, token_provider=token) as gcs:
+            assert await gcs.get("config.json") == {"version": 3}
+            assert await gcs.get("missing.json") is None
+            assert await gcs.get("missing.json") is None
+            assert gcs.stats["not_found"] == 1
+            assert fake_gcs.requests[0][1]["Authorization"] == "Bearer secret"
+
+    asyncio.run(run())
+
+
+def test_concurrent_fetches_are_bounded(fake_gcs):
+    """At most `concurrency` downloads run at once, duplicate keys share one fetch."""
+    fake_gcs.delay = 0.02
+    for i in range(12):
+        fake_gcs.put("content", f"obj{i}.yaml", f"n: {i}\n")
+    cache = PBLCacheService()
+
+    async def run():
+        async with GCSContentLoader("content", cache, base_url=fake_gcs.url, concurrency=3) as gcs:
+            names = [f"obj{i}.yaml" for i in range(12)] * 2
+            return await asyncio.gather(*(gcs.get(name) for name in names))
+
+    results = asyncio.run(run())
+    assert [r["n"] for r in results] == list(range(12)) * 2
+    assert fake_gcs.peak <= 3
+    assert len(fake_gcs.requests) == 12
@@ -0,0 +1,110 @@
+"""
+Tests for the precomputed KSA code index.
+"""
+
+import pytest
+
+from app.services.ksa_index import KsaIndex, build_index
+
+KSA_CODES_EN = """\
+knowledge_codes:
+  themes:
+    The_Nature_of_AI:
+      codes:
+        K1.1:
+          summary: AI systems use algorithms
+        K1.2:
+          summary: AI systems learn from data
+skill_codes:
+  themes:
+    Critical_Thinking:
+      codes:
+        S1.1:
+          summary: Evaluate AI output
+"""
+
+SCENARIO = """\
+scenario_info:
+  target_domains: [engaging_with_ai]
+ksa_mapping:
+  knowledge: [{k}]
+  skills: []
+tasks:
+  - id: task-1
+    KSA_focus:
+      primary: [{primary}]
+      secondary: [{secondary}]
+  - id: task-2
+    KSA_focus:
+      primary: [{primary}]
+"""
+
+
+@pytest.fixture
+def content_root(tmp_path):
+    ksa_dir = tmp_path / "rubrics_data" / "ksa_codes"
+    ksa_dir.mkdir(parents=True)
+    (ksa_dir / "ksa_codes_en.yaml").write_text(KSA_CODES_EN, encoding="utf-8")
+    (ksa_dir / "ksa_codes_ja.yaml").write_text(
+        "knowledge_codes:\n  themes:\n    The_Nature_of_AI:\n      codes:\n"
+        "        K1.1:\n          summary: AIはアルゴリズムを使う\n", encoding="utf-8")
+    for name, k, primary, secondary in [("job_search", "K1.1", "S1.1", "K1.2"),
+                                        ("smart_city", "K1.2", "K1.1", "S9.9")]:
+        scenario_dir = tmp_path / "pbl_data" / "scenarios" / name
+        scenario_dir.mkdir(parents=True)
+        (scenario_dir / f"{name}_en.yaml").write_text(
+            SCENARIO.format(k=k, primary=primary, secondary=secondary), encoding="utf-8")
+    assessment_dir = tmp_path / "assessment_data" / "ai_literacy"
+    assessment_dir.mkdir(parents=True)
+    (assessment_dir / "ai_literacy_questions_en.yaml").write_text(
+        "tasks:\n  - questions:\n      - id: E001\n        domain: engaging_with_ai\n"
+        "        ksa_mapping:\n          knowledge: [K1.1]\n", encoding="utf-8")
+    return tmp_path
+
+
+def test_code_table(content_root, tmp_path):
+    """Codes keep their kind and theme, summaries fall back to English."""
+    out = tmp_path / "ksa.bin"
+    stats = build_index(content_root, out)
+    assert stats["unknown_codes"] == ["S9.9"]
+    assert stats["errors"] == {}
+
+    index = KsaIndex(out)
+    assert index.codes == ["K1.1", "K1.2", "S1.1", "S9.9"]
+    assert index.lookup("S1.1") == {"code": "S1.1", "kind": "skills", "theme": "Critical_Thinking",
+                                    "summary": "Evaluate AI output"}
+    assert index.summary("K1.1", "ja") == "AIはアルゴリズムを使う"
+    assert index.summary("K1.2", "ja") == "AI systems learn from data"
+    assert index.summary("K1.2", "ja", fallback_lang=None) is None
+    assert index.lookup("S9.9")["theme"] is None
+    assert index.lookup("X1.1") is None
+
+
+def test_reverse_lookups(content_root, tmp_path):
+    """Codes map back to the scenarios, tasks and questions that use them."""
+    out = tmp_path / "ksa.bin"
+    build_index(content_root, out)
+    index = KsaIndex(out)
+
+    assert index.scenarios_for("K1.1") == ["job_search", "smart_city"]
+    assert index.tasks_for("K1.2") == [{"scenario_id": "job_search", "task_id": "task-1", "primary": False}]
+    assert index.tasks_for("K1.2", primary_only=True) == []
+    assert index.questions_for("K1.1") == [
+        {"bank": "ai_literacy", "question_id": "E001", "domain": "engaging_with_ai"}]
+    assert index.questions_for("S1.1") == []
+    assert index.domains_for("smart_city") == ["engaging_with_ai"]
+    assert index.domains_for("unknown") == []
+
+    # smart_city has K1.1 as primary focus twice, job_search only maps it scenario-wide
+    ranked = index.recommend_scenarios(["K1.1"])
+    assert [r["scenario_id"] for r in ranked] == ["smart_city", "job_search"]
+    ranked = index.recommend_scenarios({"K1.1": 0.1, "S1.1": 1.0}, limit=1)
+    assert ranked == [{"scenario_id": "job_search", "score": pytest.approx(4.1), "codes": ["K1.1", "S1.1"]}]
+
+
+def test_rejects_other_files(tmp_path):
+    """Files without the index header are refused."""
+    path = tmp_path / "ksa.bin"
+    path.write_bytes(b"not an index at all")
+    with pytest.raises(ValueError):
+        KsaIndex(path)
@@ -0,0 +1,564 @@
+"""
+Tests for the PBL cache service.
+"""
+
+import asyncio
+import threading
+import time
+
+from app.services.cache_backends import LocalCacheBackend
+from app.services.pbl_cache_service import (
+    MISSING,
+    PBLCacheService,
+    Validated,
+    get_cms_key,
+    get_completion_key,
+    get_program_key,
+    get_scenario_key,
+    get_task_key,
+)
+
+
+def test_get_set_and_delete():
+    """Values round-trip and can be deleted."""
+    cache = PBLCacheService()
+    key = get_scenario_key("ai_job_search", "en")
+    cache.set(key, {"title": "Job Search"})
+    assert cache.get(key) == {"title": "Job Search"}
+    cache.delete(key)
+    assert cache.get(key) is None
+
+
+def test_expired_entries_are_dropped():
+    """An entry past its TTL is treated as missing."""
+    cache = PBLCacheService()
+    cache.set("k", "v", ttl=1)
+    cache._cache["k"]["expires_at"] = time.time() - 1
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_eviction_is_least_recently_used():
+    """A hit refreshes recency so the untouched key is evicted first."""
+    cache = PBLCacheService(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_overwrite_does_not_evict():
+    """Updating an existing key at capacity keeps the other entries."""
+    cache = PBLCacheService(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    assert len(cache) == 2
+    assert cache.get("b") == 2
+    assert cache.get("a") == 10
+
+
+def test_clear_pattern():
+    """Matching keys are removed and others kept."""
+    cache = PBLCacheService()
+    program_key = get_program_key("a@example.com", "s1", "p1")
+    task_key = get_task_key("a@example.com", "s1", "p1", "t1")
+    cache.set(program_key, 1)
+    cache.set(task_key, 2)
+    cache.set(get_scenario_key("s1", "en"), 3)
+    cache.clear_pattern("pbl:task:")
+    assert cache.get(task_key) is None
+    assert cache.get(program_key) == 1
+
+
+def test_concurrent_access_respects_capacity():
+    """Many threads hammering the cache never exceed max_entries."""
+    cache = PBLCacheService(max_entries=50)
+
+    def worker(n):
+        for i in range(2000):
+            cache.set(f"k{n}:{i % 200}", i)
+            cache.get(f"k{(n + 1) % 8}:{i % 200}")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cache) <= 50
+
+
+def test_plain_sets_defer_sizing_and_indexing():
+    """Without a byte budget a set neither sizes the value nor touches the indexes."""
+    cache = PBLCacheService()
+    key = get_scenario_key("s1", "en")
+    cache.set(key, {"title": "S1"})
+    cache.set(key, {"title": "S1 v2"})
+    assert cache._tag_index == {}
+    assert cache._expiry_heap == []
+    assert cache.get_memory_stats()["total_bytes"] == 0
+
+    # Invalidation indexes the queued keys first
+    assert cache.invalidate_scenario("s1") == 1
+    assert cache.get(key) is None
+
+
+def test_purge_expired_reclaims_without_get():
+    """The sweeper removes expired keys nobody reads again."""
+    cache = PBLCacheService(max_bytes=1_000_000)
+    cache.set(get_task_key("a@example.com", "s1", "p1", "t1"), {"score": 1}, ttl=60)
+    cache.set("live", "v", ttl=60)
+    for key in list(cache._cache):
+        if key != "live":
+            cache._cache[key]["expires_at"] = time.time() - 1
+    cache._rebuild_expiry_heap()
+
+    assert cache.purge_expired() == 1
+    assert len(cache) == 1
+    stats = cache.get_expiry_stats()
+    assert stats["expired"] == 1
+    assert stats["reclaimed_bytes"] > 0
+
+
+def test_purge_expired_is_bounded_and_skips_overwrites():
+    """Work per tick is capped and stale heap items are ignored."""
+    cache = PBLCacheService()
+    for i in range(10):
+        cache.set(f"k{i}", i)
+    cache.set("k0", "fresh", ttl=600)
+    past = time.time() - 1
+    for i in range(1, 10):
+        cache._cache[f"k{i}"]["expires_at"] = past
+    cache._rebuild_expiry_heap()
+
+    assert cache.purge_expired(max_items=4) == 4
+    assert cache.purge_expired(max_items=100) == 5
+    assert cache.get("k0") == "fresh"
+
+
+def test_background_sweeper_starts_and_stops():
+    """The sweeper thread purges entries and shuts down cleanly."""
+    cache = PBLCacheService()
+    cache.set("k", "v")
+    cache._cache["k"]["expires_at"] = time.time() - 1
+    cache._rebuild_expiry_heap()
+    cache.start_sweeper(interval=0.01)
+    deadline = time.time() + 2
+    while len(cache) and time.time() < deadline:
+        time.sleep(0.01)
+    cache.stop_sweeper()
+    assert len(cache) == 0
+
+
+def test_get_or_set_coalesces_concurrent_misses():
+    """Concurrent misses for one key run the loader exactly once."""
+    cache = PBLCacheService()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"scenario": "ai_job_search"}
+
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_set(get_scenario_key("ai_job_search", "en"), loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"scenario": "ai_job_search"}] * 8
+
+
+def test_get_or_set_propagates_loader_errors():
+    """A failing loader raises and does not leave a stuck flight behind."""
+    cache = PBLCacheService()
+
+    def loader():
+        raise RuntimeError("gcs unavailable")
+
+    try:
+        cache.get_or_set("k", loader)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+    assert cache.get_or_set("k", lambda: "ok") == "ok"
+
+
+def test_aget_or_set_coalesces_async_loaders():
+    """Concurrent coroutines share one async loader call."""
+    cache = PBLCacheService()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*[cache.aget_or_set("k", loader) for _ in range(10)])
+
+    assert asyncio.run(run()) == ["value"] * 10
+    assert len(calls) == 1
+    assert cache.get("k") == "value"
+
+
+def test_cancelled_caller_does_not_fail_other_waiters():
+    """Cancelling the caller that started a load leaves it running for the other waiters."""
+    cache = PBLCacheService()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run():
+        leader = asyncio.ensure_future(cache.aget_or_set("k", loader))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.aget_or_set("k", loader))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await waiter == "value"
+        assert leader.cancelled()
+
+    asyncio.run(run())
+    assert calls == [1]
+    assert cache.get("k") == "value"
+
+
+def test_aget_or_set_runs_sync_getters_off_the_loop():
+    """Plain getters run in a worker thread, not on the event loop."""
+    cache = PBLCacheService()
+
+    async def run():
+        return await cache.aget_or_set("k", threading.get_ident)
+
+    assert asyncio.run(run()) != threading.get_ident()
+
+
+def test_stale_value_served_while_revalidating():
+    """An expired entry inside its stale window is served and refreshed."""
+    cache = PBLCacheService()
+    cache.set("k", "old", ttl=60, stale_ttl=60)
+    cache._cache["k"]["expires_at"] = time.time() - 1
+    assert cache.get("k") is None
+
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_set("k", loader, ttl=60, stale_ttl=60) == "old"
+    assert refreshed.wait(2)
+    deadline = time.time() + 2
+    while cache.get("k") != "new" and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get("k") == "new"
+
+
+def test_ttl_jitter_spreads_expiry():
+    """Jittered TTLs land between ttl and ttl * (1 + jitter)."""
+    cache = PBLCacheService(ttl_jitter=0.5)
+    now = time.time()
+    for i in range(20):
+        cache.set(f"k{i}", i, ttl=100)
+    expiries = [entry["expires_at"] - now for entry in cache._cache.values()]
+    assert all(99 <= e <= 151 for e in expiries)
+    assert len({round(e, 3) for e in expiries}) > 1
+
+
+def test_get_or_set_caches_falsy_values():
+    """Empty dicts and lists are hits, not misses."""
+    cache = PBLCacheService()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {}
+
+    assert cache.get_or_set("k", loader) == {}
+    assert cache.get_or_set("k", loader) == {}
+    assert len(calls) == 1
+
+
+def test_get_or_set_negative_caches_missing_objects():
+    """A loader returning None is cached with the short negative TTL."""
+    cache = PBLCacheService(negative_ttl=5)
+    key = get_completion_key("new@example.com", "s1", "p1")
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    assert cache.get_or_set(key, loader, ttl=300) is None
+    assert cache.get_or_set(key, loader, ttl=300) is None
+    assert len(calls) == 1
+    assert cache.get(key, MISSING) is None
+    assert cache.get("other", MISSING) is MISSING
+    assert cache._cache[key]["expires_at"] - time.time() <= 5
+
+
+def test_invalidation_uses_exact_tags():
+    """Invalidating a user does not touch emails that merely contain it."""
+    cache = PBLCacheService()
+    cache.set(get_program_key("bob@example.com", "s1", "p1"), 1)
+    cache.set(get_task_key("bob@example.com", "s1", "p1", "t1"), 2)
+    cache.set(get_completion_key("bob@example.com", "s1", "p1"), 3)
+    other = get_program_key("jimbob@example.com", "s1", "p9")
+    cache.set(other, 4)
+    cache.set(get_scenario_key("s1", "en"), 5)
+
+    assert cache.invalidate_user("bob@example.com") == 3
+    assert cache.get(other) == 4
+    assert cache.invalidate_scenario("s1") == 2
+    assert len(cache) == 0
+    assert cache._prefix_index == {}
+    assert cache._tag_index == {}
+
+
+def test_invalidate_program_and_clear_prefix():
+    """Program tags and prefixes select only the keys below them."""
+    cache = PBLCacheService()
+    cache.set(get_program_key("a@example.com", "s1", "p1"), 1)
+    cache.set(get_task_key("a@example.com", "s1", "p1", "t1"), 2)
+    cache.set(get_task_key("a@example.com", "s1", "p2", "t1"), 3)
+
+    assert cache.invalidate_program("a@example.com", "s1", "p1") == 2
+    assert cache.get(get_task_key("a@example.com", "s1", "p2", "t1")) == 3
+    assert cache.clear_prefix("pbl:task:a@example.com:") == 1
+    assert len(cache) == 0
+
+
+def test_evicted_keys_leave_the_index():
+    """LRU eviction keeps the indexes in sync with the store."""
+    cache = PBLCacheService(max_entries=1)
+    cache.set(get_scenario_key("s1", "en"), 1)
+    cache.set(get_scenario_key("s2", "en"), 2)
+    assert ("scenario", "s1") not in cache._tag_index
+    assert cache.invalidate_scenario("s2") == 1
+
+
+def test_byte_budget_evicts_by_weight():
+    """Large values push out enough LRU entries to fit the budget."""
+    cache = PBLCacheService(max_bytes=20_000)
+    for i in range(5):
+        cache.set(get_task_key("a@example.com", "s1", "p1", f"t{i}"), "x" * 1000)
+    cache.set(get_scenario_key("s1", "en"), {"title": "y" * 15_000})
+
+    stats = cache.get_memory_stats()
+    assert stats["total_bytes"] <= 20_000
+    assert cache.get(get_scenario_key("s1", "en")) is not None
+    assert cache.get(get_task_key("a@example.com", "s1", "p1", "t4")) is not None
+    assert cache.get(get_task_key("a@example.com", "s1", "p1", "t0")) is None
+    assert set(stats["bytes_by_prefix"]) == {"pbl:scenario", "pbl:task"}
+    assert sum(stats["bytes_by_prefix"].values()) == stats["total_bytes"]
+
+
+def test_oversized_values_are_not_cached():
+    """A value larger than the whole budget is skipped."""
+    cache = PBLCacheService(max_bytes=1000)
+    cache.set("small", "x")
+    cache.set("small", "x" * 5000)
+    assert cache.get("small") is None
+    assert cache.get_memory_stats()["total_bytes"] == 0
+
+
+def test_shared_backend_serves_other_instances():
+    """A value set by one instance is read from L2 by another."""
+    backend = LocalCacheBackend()
+    first = PBLCacheService(backend=backend)
+    second = PBLCacheService(backend=backend)
+    key = get_scenario_key("ai_job_search", "en")
+    first.set(key, {"title": "Job Search"})
+
+    calls = []
+    assert second.get_or_set(key, lambda: calls.append(1)) == {"title": "Job Search"}
+    assert calls == []
+    assert len(second) == 1
+
+
+def test_shared_backend_broadcasts_invalidations():
+    """Invalidating on one instance clears L1 copies everywhere and L2."""
+    backend = LocalCacheBackend()
+    first = PBLCacheService(backend=backend)
+    second = PBLCacheService(backend=backend)
+    key = get_program_key("a@example.com", "s1", "p1")
+    first.set(key, {"status": "active"})
+    assert second.get(key) == {"status": "active"}
+
+    first.invalidate_user("a@example.com")
+    assert second.get(key) is None
+    assert backend.get_many([key]) == {}
+
+
+def test_shared_backend_broadcasts_writes():
+    """A write on one instance replaces the L1 copies other instances hold."""
+    backend = LocalCacheBackend()
+    first = PBLCacheService(backend=backend)
+    second = PBLCacheService(backend=backend)
+    key = get_program_key("a@example.com", "s1", "p1")
+    first.set(key, {"status": "active"})
+    assert second.get(key) == {"status": "active"}
+
+    first.set(key, {"status": "completed"})
+    assert second.get(key) == {"status": "completed"}
+    first.set_many({key: {"status": "archived"}})
+    assert second.get(key) == {"status": "archived"}
+
+
+def test_shared_backend_tag_invalidation_is_exact():
+    """Scenario invalidation in L2 skips keys whose other segments equal the scenario id."""
+    backend = LocalCacheBackend()
+    cache = PBLCacheService(backend=backend)
+    own = get_task_key("a@example.com", "s1", "p1", "t1")
+    other = get_task_key("b@example.com", "s2", "s1", "t1")
+    cache.set(own, 1)
+    cache.set(other, 2)
+
+    cache.invalidate_scenario("s1")
+    assert set(backend.get_many([own, other])) == {other}
+
+
+def test_shared_backend_scenario_invalidation_covers_cms_projections():
+    """Per-language CMS documents of a scenario leave L2 and other instances with it."""
+    backend = LocalCacheBackend()
+    first = PBLCacheService(backend=backend)
+    second = PBLCacheService(backend=backend)
+    ja = get_cms_key("pbl", "s1", "ja")
+    other = get_cms_key("pbl", "s2", "ja")
+    first.set(ja, {"title": "AI就職活動"})
+    first.set(other, {"title": "Smart City"})
+    assert second.get(ja) == {"title": "AI就職活動"}
+
+    first.invalidate_scenario("s1")
+    assert set(backend.get_many([ja, other])) == {other}
+    assert second.get(ja) is None
+    assert PBLCacheService(backend=backend).get(ja) is None
+
+
+def test_shared_backend_keeps_ttl_and_metadata_per_key():
+    """Each key is written with its own TTL, and stale and validator metadata survive promotion."""
+    backend = LocalCacheBackend()
+    first = PBLCacheService(backend=backend)
+    second = PBLCacheService(backend=backend)
+    first.set("short", 1, ttl=5)
+    first.set("long", 2, ttl=600)
+    assert backend._store["short"][1] - time.time() <= 5
+    assert backend._store["long"][1] - time.time() > 500
+
+    first.set("stale", "old", ttl=60, stale_ttl=120)
+    first.get_or_set("validated", lambda: Validated({"v": 1}, "etag-1"), ttl=60)
+    assert second.get("stale") == "old"
+    assert second._cache["stale"]["stale_until"] == first._cache["stale"]["stale_until"]
+    assert second.get("validated") == {"v": 1}
+    assert second.peek_validated("validated").validator == "etag-1"
+
+
+def test_shared_backend_failures_fall_back_to_loader():
+    """An unavailable L2 tier is treated as a miss."""
+
+    class BrokenBackend(LocalCacheBackend):
+        def get_many(self, keys):
+            raise ConnectionError("redis down")
+
+    cache = PBLCacheService(backend=BrokenBackend())
+    assert cache.get_or_set("k", lambda: "loaded") == "loaded"
+
+
+def test_get_many_and_set_many():
+    """Batch calls round-trip and skip missing keys."""
+    cache = PBLCacheService()
+    cache.set_many({"a": 1, "b": 0})
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "b": 0}
+
+
+def test_get_or_load_many_batches_only_missing_keys():
+    """One loader call receives exactly the keys not yet cached."""
+    cache = PBLCacheService()
+    program = get_program_key("a@example.com", "s1", "p1")
+    tasks = [get_task_key("a@example.com", "s1", "p1", f"t{i}") for i in range(4)]
+    cache.set(program, {"id": "p1"})
+    cache.set(tasks[0], {"id": "t0"})
+    batches = []
+
+    def batch_loader(keys):
+        batches.append(keys)
+        return {key: {"id": key.rsplit(":", 1)[1]} for key in keys if not key.endswith("t3")}
+
+    result = cache.get_or_load_many([program] + tasks, batch_loader)
+    assert batches == [tasks[1:]]
+    assert result[tasks[2]] == {"id": "t2"}
+    assert result[tasks[3]] is None
+
+    # Loaded and negative-cached keys are now hits
+    cache.get_or_load_many([program] + tasks, batch_loader)
+    assert len(batches) == 1
+
+    # Batch latency is recorded once for the whole batch, not against one key's prefix
+    stats = cache.get_stats()
+    assert stats["loader_latency"] == {}
+    assert stats["batch_loader_latency"]["count"] == 1
+    assert stats["batch_loader_latency"]["keys"] == 3
+    assert "pbl_cache_batch_loader_keys_total 3" in cache.export_prometheus()
+
+
+def test_stats_count_hits_misses_and_evictions_per_prefix():
+    """Counters are grouped by key prefix and exported for Prometheus."""
+    cache = PBLCacheService(max_entries=2)
+    scenario = get_scenario_key("s1", "en")
+    cache.get_or_set(scenario, lambda: {"title": "S1"})
+    cache.get(scenario)
+    cache.set(get_task_key("a@example.com", "s1", "p1", "t1"), 1)
+    cache.set(get_task_key("a@example.com", "s1", "p1", "t2"), 2)
+
+    stats = cache.get_stats()
+    assert stats["prefixes"]["pbl:scenario"]["misses"] == 1
+    assert stats["prefixes"]["pbl:scenario"]["hits"] == 1
+    assert stats["prefixes"]["pbl:scenario"]["evicted"] == 1
+    assert stats["loader_latency"]["pbl:scenario"]["count"] == 1
+
+    text = cache.export_prometheus()
+    assert 'pbl_cache_hits_total{prefix="pbl:scenario"} 1' in text
+    assert 'pbl_cache_loader_seconds_count{prefix="pbl:scenario"} 1' in text
+    assert 'pbl_cache_loader_seconds_bucket{prefix="pbl:scenario",le="+Inf"} 1' in text
+
+
+def test_metrics_can_be_disabled():
+    """A cache built without metrics still reports memory stats."""
+    cache = PBLCacheService(metrics=False)
+    cache.get_or_set("k", lambda: 1)
+    stats = cache.get_stats()
+    assert stats["prefixes"] == {}
+    assert stats["memory"]["entries"] == 1
+
+
+def test_validated_entries_are_kept_for_revalidation():
+    """Loaders can store a validator, which outlives expiry without the value being served."""
+    cache = PBLCacheService(revalidate_ttl=60)
+    assert cache.get_or_set("k", lambda: Validated({"v": 1}, "etag-1")) == {"v": 1}
+    assert cache.peek_validated("k").validator == "etag-1"
+
+    cache._cache["k"]["expires_at"] = time.time() - 1
+    assert cache.get("k", MISSING) is MISSING
+    previous = cache.peek_validated("k")
+    assert previous.value == {"v": 1}
+    assert cache.get_or_set("k", lambda: Validated(previous.value, previous.validator)) == {"v": 1}
+
+    cache.set("plain", 1)
+    assert cache.peek_validated("plain") is None
+    cache._cache["k"]["revalidate_until"] = time.time() - 1
+    cache._cache["k"]["expires_at"] = time.time() - 2
+    assert cache.peek_validated("k") is None
@@ -0,0 +1,76 @@
+"""
+Smoke tests for scripts/rebalance-answers.py and the analyzer it builds on.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+import yaml
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "rebalance-answers.py"
+_spec = importlib.util.spec_from_file_location("rebalance_answers", SCRIPT)
+rebalance = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(rebalance)
+
+DOMAINS = ["engaging_with_ai", "creating_with_ai", "managing_with_ai", "designing_with_ai"]
+DIFFICULTIES = ["basic", "intermediate", "advanced"]
+
+
+def question_bank(lang, count=12):
+    """Bank in the frontend layout with every correct answer on option a."""
+    lines = ["tasks:", "  - id: task-1", "    questions:"]
+    for i in range(count):
+        lines += [
+            f"      - id: Q{i:03d}",
+            f"        domain: {DOMAINS[i % len(DOMAINS)]}",
+            f"        difficulty: {DIFFICULTIES[i % len(DIFFICULTIES)]}",
+            f"        question: Question {i} ({lang})",
+            "        options:",
+        ]
+        lines += [f"          {o}: Option {o} of {i}" for o in "abcd"]
+        lines.append("        correct_answer: a")
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def bank_dir(tmp_path):
+    bank = tmp_path / "ai_literacy"
+    bank.mkdir()
+    for lang in ("en", "ja"):
+        (bank / f"ai_literacy_questions_{lang}.yaml").write_text(question_bank(lang), encoding="utf-8")
+    return bank
+
+
+def test_association_p():
+    """Answer position tied to an attribute gives a small p, a single group gives 1."""
+    groups = ["basic"] * 8 + ["advanced"] * 8
+    assert rebalance.association_p(groups, [0] * 8 + [1] * 8, 4) < 0.001
+    assert rebalance.association_p(groups, [0, 1] * 8, 4) == pytest.approx(1.0)
+    assert rebalance.association_p(["basic"] * 4, [0, 1, 2, 3], 4) == 1.0
+
+
+def test_dry_run_prints_plan(bank_dir, capsys):
+    """The plan and per-language rewrites are shown without touching the files."""
+    before = {path: path.read_text(encoding="utf-8") for path in bank_dir.iterdir()}
+    with pytest.raises(SystemExit) as exit_info:
+        rebalance.main([str(bank_dir)])
+    assert exit_info.value.code == 0
+
+    out = capsys.readouterr().out
+    assert "before" in out and "after" in out
+    assert "en: would rewrite" in out and "ja: would rewrite" in out
+    assert {path: path.read_text(encoding="utf-8") for path in bank_dir.iterdir()} == before
+
+
+def test_write_balances_every_language(bank_dir):
+    """Rewritten banks are balanced and agree on the correct answers."""
+    with pytest.raises(SystemExit):
+        rebalance.main([str(bank_dir), "--write"])
+
+    answers = {}
+    for path in sorted(bank_dir.iterdir()):
+        questions = list(rebalance.analyzer.iter_questions(yaml.safe_load(path.read_text(encoding="utf-8"))))
+        answers[path.name] = [q["correct_answer"] for q in questions]
+        assert sorted(answers[path.name].count(o) for o in "abcd") == [3, 3, 3, 3]
+    assert len(set(map(tuple, answers.values()))) == 1
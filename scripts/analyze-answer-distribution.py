@@ -2,23 +2,70 @@
 """
 Analyze answer distribution in assessment question banks.
 Identifies pattern bias that allows students to game the system.
+
+Every translated bank (frontend/public/assessment_data/*/ai_literacy_questions_*.yaml)
+and the CMS master file are loaded in one pass into a (question x language x option)
+answer matrix, so distribution, cross-language agreement, chi-square uniformity and
+run/sequence tests are computed with NumPy over all languages at once.
+
+Exits 1 when a bank's reference (English) file is biased or unparseable; with --strict, also
+when any other file is, or when a translation's answers disagree with the reference.
+
+Usage: python3 scripts/analyze-answer-distribution.py [FILE_OR_DIR ...] [--details] [--json OUT] [--strict]
 """
 
+import argparse
+import json
+import re
 import yaml
 import sys
 from pathlib import Path
 from collections import Counter
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy.stats import chi2 as chi2_dist
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # libyaml not available, fall back to the pure-Python loader
+    from yaml import SafeLoader as YamlLoader
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+ASSESSMENT_DIR = REPO_ROOT / 'frontend' / 'public' / 'assessment_data'
+CMS_MASTER_FILE = REPO_ROOT / 'cms' / 'content' / 'assessment_data' / 'ai_literacy_questions.yaml'
+BANK_PATTERN = re.compile(r'^(?P<bank>.+)_questions_(?P<lang>[A-Za-z]+)\.ya?ml$')
+
+OPTIONS = ['a', 'b', 'c', 'd']
+REFERENCE_LANG = 'en'
+CMS_LABEL = 'cms'
+
+BIAS_THRESHOLD = 0.4        # any option above this share is exploitable
+BALANCED_RANGE = (20, 30)   # acceptable share per option, in percent
+CHI2_ALPHA = 0.05
+RUNS_Z_LIMIT = 1.96         # two-sided 5% for the runs test
+PERIOD_MATCH_RATIO = 0.75   # share of answers repeating with period p that counts as a pattern
+MAX_PERIOD = 4              # ABCD-style cycles
+
+def load_question_data(filepath: Path) -> Dict:
+    """Parse a question bank with libyaml when available."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=YamlLoader) or {}
+
+def iter_questions(data: Dict) -> Iterator[Dict]:
+    """Questions in bank order, from tasks[*].questions or the CMS top-level questions list."""
+    for task in data.get('tasks') or []:
+        yield from task.get('questions') or []
+    yield from data.get('questions') or []
 
 def analyze_question_file(filepath: Path) -> Dict:
     """Analyze a single question file for answer distribution."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
+    data = load_question_data(filepath)
 
     answers = []
     questions_detail = []
 
-    if 'tasks' not in data:
+    if 'tasks' not in data and 'questions' not in data:
         return {
             'total': 0,
             'distribution': {},
@@ -26,19 +73,16 @@ def analyze_question_file(filepath: Path) -> Dict:
             'has_bias': False
         }
 
-    for task in data['tasks']:
-        if 'questions' not in task:
-            continue
-        for q in task['questions']:
-            answer = q.get('correct_answer', '').lower()
-            answers.append(answer)
-            questions_detail.append({
-                'id': q.get('id'),
-                'domain': q.get('domain'),
-                'difficulty': q.get('difficulty'),
-                'answer': answer,
-                'question': q.get('question', '')[:60] + '...'
-            })
+    for q in iter_questions(data):
+        answer = str(q.get('correct_answer', '')).lower()
+        answers.append(answer)
+        questions_detail.append({
+            'id': q.get('id'),
+            'domain': q.get('domain'),
+            'difficulty': q.get('difficulty'),
+            'answer': answer,
+            'question': q.get('question', '')[:60] + '...'
+        })
 
     distribution = Counter(answers)
     total = len(answers)
@@ -81,21 +125,230 @@ def print_analysis(filename: str, analysis: Dict):
 
     print("\nQuestion Details:")
     for q in analysis['questions']:
-        print(f"  {q['id']:6s} | {q['difficulty']:12s} | Answer: {q['answer'].upper()} | {q['question']}")
+        print(f"  {str(q['id']):6s} | {str(q['difficulty']):12s} | Answer: {q['answer'].upper()} | {q['question']}")
 
-def main():
-    # Analyze English version (source of truth)
-    base_path = Path(__file__).parent.parent / 'frontend' / 'public' / 'assessment_data' / 'ai_literacy'
-    en_file = base_path / 'ai_literacy_questions_en.yaml'
+def find_question_files(paths: List[Path]) -> List[Path]:
+    """Expand directories into their per-language question files (templates are skipped)."""
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files += sorted(p for p in path.rglob('*_questions_*.y*ml') if BANK_PATTERN.match(p.name))
+        else:
+            files.append(path)
+    return [f for f in files if not f.name.endswith(('_template.yaml', '_template.yml'))]
 
-    if not en_file.exists():
-        print(f"❌ File not found: {en_file}")
-        sys.exit(1)
+def bank_label(filepath: Path) -> Tuple[str, str]:
+    """(bank, language) for a question file; unsuffixed files such as the CMS master are 'cms'."""
+    match = BANK_PATTERN.match(filepath.name)
+    if match:
+        return match.group('bank'), match.group('lang')
+    return re.sub(r'_questions$', '', filepath.stem), CMS_LABEL
+
+def load_banks(files: List[Path]) -> Tuple[Dict[str, Dict[str, List[Dict]]], Dict[str, str]]:
+    """Parse every file once: ({bank: {language: questions}}, {file: parse error})."""
+    banks: Dict[str, Dict[str, List[Dict]]] = {}
+    errors = {}
+    for filepath in files:
+        bank, lang = bank_label(filepath)
+        try:
+            questions = list(iter_questions(load_question_data(filepath)))
+        except yaml.YAMLError as e:
+            errors[str(filepath)] = str(e).splitlines()[0]
+            continue
+        banks.setdefault(bank, {})[lang] = questions
+    return banks, errors
+
+def build_answer_codes(bank: Dict[str, List[Dict]]) -> Dict:
+    """
+    Encode a bank's correct answers as an int8 (language x question) matrix of option indexes.
+    -1 marks a question missing from that language, -2 an answer that is not a known option.
+    Questions are aligned by id, in reference-language order.
+    """
+    langs = sorted(bank, key=lambda lang: (lang != REFERENCE_LANG, lang == CMS_LABEL, lang))
+    question_ids: Dict[str, int] = {}
+    meta = []
+    for lang in langs:
+        for q in bank[lang]:
+            qid = str(q.get('id'))
+            if qid not in question_ids:
+                question_ids[qid] = len(question_ids)
+                meta.append({'id': qid, 'domain': q.get('domain'), 'difficulty': q.get('difficulty')})
+
+    options = list(OPTIONS)
+    for questions in bank.values():
+        for q in questions:
+            for key in (q.get('options') or {}):
+                if str(key).lower() not in options:
+                    options.append(str(key).lower())
+    option_index = {o: i for i, o in enumerate(options)}
+
+    codes = np.full((len(langs), len(question_ids)), -1, dtype=np.int8)
+    for row, lang in enumerate(langs):
+        for q in bank[lang]:
+            answer = str(q.get('correct_answer', '')).strip().lower()
+            codes[row, question_ids[str(q.get('id'))]] = option_index.get(answer, -2)
+    return {'languages': langs, 'questions': meta, 'options': options, 'codes': codes}
+
+def answer_matrix(codes: np.ndarray, n_options: int) -> np.ndarray:
+    """One-hot (question x language x option) matrix of correct answers."""
+    return (codes.T[:, :, None] == np.arange(n_options)).astype(np.int8)
+
+def compact_rows(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Shift each language's answered questions to the front so sequence tests skip gaps."""
+    valid = codes >= 0
+    order = np.argsort(~valid, axis=1, kind='stable')
+    return np.take_along_axis(codes, order, axis=1), valid.sum(axis=1)
+
+def sequence_stats(codes: np.ndarray, n_options: int) -> Dict[str, np.ndarray]:
+    """
+    Per-language distribution, chi-square uniformity, runs test and periodicity, all computed
+    on the whole (language x question) matrix at once.
+    """
+    n_langs, n_questions = codes.shape
+    counts = answer_matrix(codes, n_options).sum(axis=0).astype(np.int64)     # language x option
+    n = counts.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+    percentages = counts / safe_n[:, None] * 100
+
+    expected = n / n_options
+    chi2 = ((counts - expected[:, None]) ** 2 / np.maximum(expected, 1e-12)[:, None]).sum(axis=1)
+    chi2_p = chi2_dist.sf(chi2, n_options - 1)
+
+    compact, lengths = compact_rows(codes)
+    position = np.arange(n_questions)
+    in_seq = position[None, :] < lengths[:, None]
+
+    # Runs of the same answer (Wald-Wolfowitz generalised to k categories)
+    changes = (compact[:, 1:] != compact[:, :-1]) & in_seq[:, 1:]
+    runs = np.where(n > 0, 1 + changes.sum(axis=1), 0)
+    s2 = (counts ** 2).sum(axis=1)
+    s3 = (counts ** 3).sum(axis=1)
+    runs_expected = 1 + (n ** 2 - s2) / safe_n
+    runs_var = (s2 * (s2 + n * (n + 1)) - 2 * n * s3 - n ** 3) / np.maximum(n ** 2 * (n - 1), 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        runs_z = np.where(runs_var > 0, (runs - runs_expected) / np.sqrt(runs_var), 0.0)
 
-    analysis = analyze_question_file(en_file)
-    print_analysis(en_file.name, analysis)
+    # Longest streak: label runs with a cumulative sum and count labels per language
+    run_id = np.concatenate([np.zeros((n_langs, 1), dtype=np.int64), np.cumsum(changes, axis=1)], axis=1)
+    keys = (np.arange(n_langs)[:, None] * max(n_questions, 1) + run_id)[in_seq]
+    streaks = np.bincount(keys, minlength=n_langs * max(n_questions, 1)).reshape(n_langs, -1)
+    longest_run = streaks.max(axis=1) if n_questions else np.zeros(n_langs, dtype=np.int64)
 
-    # Print recommendations
+    # Periodic patterns: share of answers equal to the one p positions earlier (AAAA, ABAB, ABCDABCD)
+    period_ratio = np.zeros((n_langs, MAX_PERIOD + 1))
+    for period in range(1, MAX_PERIOD + 1):
+        if n_questions <= period:
+            break
+        pairs = in_seq[:, period:]
+        matches = ((compact[:, period:] == compact[:, :-period]) & pairs).sum(axis=1)
+        period_ratio[:, period] = matches / np.maximum(pairs.sum(axis=1), 1)
+    # Require at least two full cycles before calling a period a pattern
+    enough = lengths[:, None] >= 2 * np.arange(MAX_PERIOD + 1)[None, :]
+    periodic = (period_ratio >= PERIOD_MATCH_RATIO) & enough
+    # Report only the shortest period: AAAA is also "periodic" with period 2, 3 and 4
+    for period in range(2, MAX_PERIOD + 1):
+        for divisor in range(1, period):
+            if period % divisor == 0:
+                periodic[:, period] &= ~periodic[:, divisor]
+
+    return {
+        'counts': counts, 'n': n, 'percentages': percentages,
+        'chi2': chi2, 'chi2_p': chi2_p,
+        'runs': runs, 'runs_expected': runs_expected, 'runs_z': runs_z, 'longest_run': longest_run,
+        'period_ratio': period_ratio, 'periodic': periodic, 'sequences': compact, 'lengths': lengths,
+    }
+
+def answer_mismatches(codes: np.ndarray) -> np.ndarray:
+    """(language, question) pairs whose answer disagrees with the reference (first) row."""
+    reference = codes[0]
+    mismatch = (codes != reference[None, :]) & (reference[None, :] >= 0) & (codes != -1)
+    mismatch[0] = False
+    return np.argwhere(mismatch)
+
+def analyze_bank(bank: Dict[str, List[Dict]]) -> Dict:
+    """Matrix, statistics and findings for one question bank across all its languages."""
+    encoded = build_answer_codes(bank)
+    codes, langs, options = encoded['codes'], encoded['languages'], encoded['options']
+    stats = sequence_stats(codes, len(options))
+    shares = stats['counts'] / np.maximum(stats['n'], 1)[:, None]
+
+    languages = {}
+    for row, lang in enumerate(langs):
+        sequence = stats['sequences'][row]
+        languages[lang] = {
+            'total': int(stats['n'][row]),
+            'distribution': {o: int(c) for o, c in zip(options, stats['counts'][row]) if c},
+            'percentages': {o: round(float(p), 1) for o, p in zip(options, stats['percentages'][row])},
+            'missing_questions': int((codes[row] == -1).sum()),
+            'invalid_answers': int((codes[row] == -2).sum()),
+            'has_bias': bool((shares[row] > BIAS_THRESHOLD).any()),
+            'chi2': round(float(stats['chi2'][row]), 3),
+            'chi2_p': round(float(stats['chi2_p'][row]), 4),
+            'runs': int(stats['runs'][row]),
+            'runs_expected': round(float(stats['runs_expected'][row]), 2),
+            'runs_z': round(float(stats['runs_z'][row]), 2),
+            'longest_run': int(stats['longest_run'][row]),
+            'patterns': [''.join(options[c].upper() for c in sequence[:period]) + '…'
+                         for period in np.flatnonzero(stats['periodic'][row])],
+        }
+
+    mismatches = [
+        {
+            'id': encoded['questions'][q]['id'],
+            'language': langs[row],
+            'answer': options[codes[row, q]] if codes[row, q] >= 0 else None,
+            'reference': options[codes[0, q]],
+        }
+        for row, q in answer_mismatches(codes)
+    ]
+    return {
+        'reference': langs[0],
+        'options': options,
+        'questions': encoded['questions'],
+        'languages': languages,
+        'mismatches': mismatches,
+    }
+
+def print_bank_report(name: str, report: Dict):
+    """One row per language, then answers that disagree with the reference language."""
+    options = report['options']
+    print(f"\n{'='*60}")
+    print(f"Bank: {name} ({len(report['questions'])} questions, {len(report['languages'])} languages, "
+          f"reference: {report['reference']})")
+    print(f"{'='*60}")
+    header = ' '.join(f"{o.upper():>4s}" for o in options)
+    print(f"  {'lang':6s} {header} | {'chi2':>6s} {'p':>6s} | {'runs':>4s} {'z':>5s} {'max':>3s} | flags")
+    for lang, stats in report['languages'].items():
+        cells = ' '.join(f"{stats['percentages'][o]:3.0f}%" for o in options)
+        flags = []
+        if stats['has_bias']:
+            flags.append('🚨 bias')
+        elif any(not BALANCED_RANGE[0] <= stats['percentages'][o] <= BALANCED_RANGE[1] for o in options):
+            flags.append('⚠️ unbalanced')
+        if stats['chi2_p'] < CHI2_ALPHA:
+            flags.append('non-uniform')
+        if abs(stats['runs_z']) > RUNS_Z_LIMIT:
+            flags.append('clustered' if stats['runs_z'] < 0 else 'alternating')
+        flags += [f"repeats {pattern}" for pattern in stats['patterns']]
+        if stats['missing_questions']:
+            flags.append(f"{stats['missing_questions']} missing")
+        if stats['invalid_answers']:
+            flags.append(f"{stats['invalid_answers']} invalid")
+        print(f"  {lang:6s} {cells} | {stats['chi2']:6.2f} {stats['chi2_p']:6.3f} | "
+              f"{stats['runs']:4d} {stats['runs_z']:5.2f} {stats['longest_run']:3d} | {', '.join(flags) or '✅'}")
+
+    if report['mismatches']:
+        print(f"\n🚨 {len(report['mismatches'])} answers disagree with {report['reference']}:")
+        by_question: Dict[str, List[str]] = {}
+        for m in report['mismatches']:
+            answer = m['answer'].upper() if m['answer'] else '?'
+            by_question.setdefault(f"{m['id']} ({m['reference'].upper()})", []).append(f"{m['language']}={answer}")
+        for question, langs in by_question.items():
+            print(f"  {question}: {', '.join(langs)}")
+    else:
+        print("\n✅ Correct answers agree across all languages")
+
+def print_recommendations():
     print(f"\n{'='*60}")
     print("RECOMMENDATIONS")
     print(f"{'='*60}")
@@ -117,11 +370,56 @@ def main():
     print("   - Verify answer explanations still match")
     print("   - Ensure no correlation between difficulty and answer")
     print("   - Test that questions still assess knowledge accurately")
+    print("   - Keep correct answers identical across every translation")
 
-    if analysis['has_bias']:
-        sys.exit(1)  # Exit with error code if bias detected
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Analyze correct-answer distribution in question banks')
+    parser.add_argument('paths', nargs='*', type=Path,
+                        help='question files or directories (default: all assessment banks and the CMS master)')
+    parser.add_argument('--details', action='store_true', help='also print per-question rows for every file')
+    parser.add_argument('--json', type=Path, metavar='OUT', help='write the full analysis as JSON')
+    parser.add_argument('--strict', action='store_true',
+                        help='also exit 1 on biased translations and answers that disagree across languages')
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    paths = args.paths or [ASSESSMENT_DIR, CMS_MASTER_FILE]
+    files = [f for f in find_question_files(paths) if f.exists()]
+    if not files:
+        print(f"❌ No question files found in: {', '.join(str(p) for p in paths)}")
+        sys.exit(1)
+
+    banks, errors = load_banks(files)
+    for filepath, error in errors.items():
+        print(f"❌ Could not parse {filepath}: {error}")
+
+    if args.details:
+        for filepath in files:
+            if str(filepath) not in errors:
+                print_analysis(filepath.name, analyze_question_file(filepath))
+
+    reports = {name: analyze_bank(bank) for name, bank in banks.items()}
+    for name, report in reports.items():
+        print_bank_report(name, report)
+
+    # By default only a biased reference bank fails, as before; --strict gates every language
+    reference_bias = any(report['languages'][report['reference']]['has_bias'] for report in reports.values())
+    reference_errors = any(bank_label(Path(filepath))[1] == REFERENCE_LANG for filepath in errors)
+    translation_issues = bool(errors) or any(
+        report['mismatches'] or any(stats['has_bias'] for stats in report['languages'].values())
+        for report in reports.values()
+    )
+    if reference_bias or translation_issues:
+        print_recommendations()
+    failed = reference_bias or reference_errors or (args.strict and translation_issues)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'banks': reports, 'errors': errors}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Analysis saved to: {args.json}")
 
-    sys.exit(0)
+    sys.exit(1 if failed else 0)  # Exit with error code if bias detected
 
 if __name__ == '__main__':
     main()
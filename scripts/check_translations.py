@@ -2,13 +2,50 @@
 """
 PBL Scenarios Translation Status Checker
 檢查所有PBL場景的翻譯狀況
+
+除了 PBL 場景，也能以 --types 檢查探索路徑 (discovery)、評量規準 (rubrics) 與評量題庫
+(assessment)。每種內容類型以 CONTENT_SCHEMAS 宣告需要翻譯的欄位路徑（支援 * 萬用字元，
+例如 themes.*.codes.*.summary），路徑會先編譯成樹狀結構，每份文件只走訪一次。
+
+YAML 檔案以 process pool 平行解析（使用 libyaml CSafeLoader），解析結果依檔案內容
+hash 快取於 .cache/translations/，未變更的檔案不會重新解析。
+
+加上 --since <git-ref> 時只重新檢查自該版本以來變更的 (場景, 語言)，並合併進既有的
+translation_report.json；既有報告的格式（單一 PBL 或多類型）與這次的 --types 不符時改為完整檢查。
+
+加上 --jsonl <file> 時改以 JSON Lines 串流寫出結果，每份內容檢查完就寫入一行一個
+(內容, 語言)，記憶體用量固定，執行被中斷時已完成的部分仍可用 --summary <file> 讀取。
+
+Usage: python3 scripts/check_translations.py [scenarios_dir] [--types pbl,discovery,...|all]
+                                             [--jobs N] [--no-cache] [--since REF]
+                                             [--jsonl FILE] [--summary FILE]
 """
 
+import argparse
+import hashlib
 import os
+import pickle
+import re
+import subprocess
 import yaml
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # 沒有 libyaml 時使用純 Python 版本
+    from yaml import SafeLoader as YamlLoader
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CONTENT_ROOT = REPO_ROOT / 'frontend' / 'public'
+DEFAULT_SCENARIOS_DIR = DEFAULT_CONTENT_ROOT / 'pbl_data' / 'scenarios'
+DEFAULT_REPORT_FILE = REPO_ROOT / 'translation_report.json'
+DEFAULT_CACHE_DIR = REPO_ROOT / '.cache' / 'translations'
+
+# 解析格式改變時遞增，讓舊的快取失效
+CACHE_VERSION = f"1-{YamlLoader.__name__}"
+
 # 目標語言列表
 LANGUAGES = ['en', 'zhTW', 'zhCN', 'ja', 'ko', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'ar', 'th', 'id']
 
@@ -27,15 +64,145 @@ TASK_FIELDS = [
     'expected_outcome'
 ]
 
+# 各內容類型的翻譯欄位宣告
+#   dir:             相對於 frontend/public 的根目錄，底下每個子目錄是一份內容
+#   file:            語言文件名稱樣板
+#   fields:          必須翻譯的欄位，缺少也算未翻譯
+#   optional_fields: 兩邊都有值時才比較的欄位
+CONTENT_SCHEMAS = {
+    'pbl': {
+        'label': '場景',
+        'dir': 'pbl_data/scenarios',
+        'file': '{id}_{lang}.yaml',
+        'fields': KEY_FIELDS,
+        'optional_fields': [f'tasks.*.{field}' for field in TASK_FIELDS],
+    },
+    'discovery': {
+        'label': '探索路徑',
+        'dir': 'discovery_data',
+        'file': '{id}_{lang}.yml',
+        'fields': [
+            'metadata.title',
+            'metadata.short_description',
+            'metadata.long_description',
+            'world_setting.name',
+            'world_setting.description',
+            'starting_scenario.title',
+            'starting_scenario.description',
+        ],
+        'optional_fields': [
+            'skill_tree.*.*.name',
+            'skill_tree.*.*.description',
+            'milestone_quests.*.name',
+            'milestone_quests.*.description',
+            'achievements.*.name',
+            'achievements.*.description',
+            'example_tasks.*.*.title',
+            'example_tasks.*.*.description',
+            'learning_objectives',
+            'career_outcomes',
+        ],
+    },
+    'rubrics': {
+        'label': '評量規準',
+        'dir': 'rubrics_data',
+        'file': '{id}_{lang}.yaml',
+        'fields': [],
+        'optional_fields': [
+            # ksa_codes
+            '*.description',
+            '*.themes.*.explanation',
+            '*.themes.*.codes.*.summary',
+            '*.themes.*.codes.*.questions',
+            # ai_lit_domains
+            'domains.*.title',
+            'domains.*.overview',
+            'domains.*.competencies.*.description',
+            'domains.*.competencies.*.content',
+            'domains.*.competencies.*.scenarios',
+        ],
+    },
+    'assessment': {
+        'label': '評量題庫',
+        'dir': 'assessment_data',
+        'file': '{id}_questions_{lang}.yaml',
+        'fields': [
+            'assessment_config.title',
+            'assessment_config.description',
+        ],
+        'optional_fields': [
+            'assessment_config.domains.*.description',
+            'tasks.*.title',
+            'tasks.*.description',
+            'tasks.*.questions.*.question',
+            'tasks.*.questions.*.options.*',
+            'tasks.*.questions.*.explanation',
+        ],
+    },
+}
+
 def load_yaml_file(file_path):
     """載入YAML文件"""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=YamlLoader)
     except Exception as e:
         print(f"Error loading {file_path}: {e}")
         return None
 
+def _parse_yaml_bytes(raw):
+    """在 worker process 中解析 YAML，回傳 (data, error)"""
+    try:
+        return yaml.load(raw.decode('utf-8'), Loader=YamlLoader), None
+    except Exception as e:
+        return None, str(e)
+
+def load_yaml_files(paths, jobs=None, cache_dir=DEFAULT_CACHE_DIR):
+    """平行載入多個YAML文件，依內容 hash 使用快取；回傳 {path: data}，失敗者為 None"""
+    results = {}
+    pending = {}  # content hash -> (raw bytes, [paths])
+
+    for path in paths:
+        path = Path(path)
+        raw = path.read_bytes()
+        digest = hashlib.sha256(CACHE_VERSION.encode() + raw).hexdigest()
+        cache_file = Path(cache_dir) / f"{digest}.pickle" if cache_dir else None
+        if cache_file is not None and cache_file.exists():
+            try:
+                with open(cache_file, 'rb') as f:
+                    results[path] = pickle.load(f)
+                continue
+            except Exception:
+                pass  # 快取損壞時重新解析
+        pending.setdefault(digest, (raw, []))[1].append(path)
+
+    if not pending:
+        return results
+
+    digests = list(pending)
+    raws = [pending[d][0] for d in digests]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(raws) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parsed = list(pool.map(_parse_yaml_bytes, raws, chunksize=max(1, len(raws) // (jobs * 4))))
+    else:
+        parsed = [_parse_yaml_bytes(raw) for raw in raws]
+
+    if cache_dir:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    for digest, (data, error) in zip(digests, parsed):
+        for path in pending[digest][1]:
+            if error is not None:
+                print(f"Error loading {path}: {error}")
+            results[path] = data
+        if error is None and cache_dir:
+            tmp = Path(cache_dir) / f"{digest}.pickle.tmp{os.getpid()}"
+            with open(tmp, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, Path(cache_dir) / f"{digest}.pickle")
+
+    return results
+
 def get_nested_value(data, path):
     """取得嵌套字典的值"""
     keys = path.split('.')
@@ -51,7 +218,10 @@ def compare_field_values(en_data, other_data, field_path):
     """比較欄位值是否相同"""
     en_value = get_nested_value(en_data, field_path)
     other_value = get_nested_value(other_data, field_path)
+    return compare_values(en_value, other_value)
 
+def compare_values(en_value, other_value):
+    """比較兩個欄位值是否相同"""
     if en_value is None or other_value is None:
         return False, "Field missing"
 
@@ -76,111 +246,387 @@ def compare_field_values(en_data, other_data, field_path):
 
     return en_value == other_value, f"EN: {en_value} vs OTHER: {other_value}"
 
-def check_scenario_translations(scenarios_dir):
-    """檢查所有場景的翻譯狀況"""
-    scenarios_dir = Path(scenarios_dir)
-    results = {}
+def compile_fields(fields, optional_fields=()):
+    """把欄位路徑編譯成樹狀結構：{segment: [required/optional/None, children]}"""
+    tree = {}
+    for kind, paths in (('required', fields), ('optional', optional_fields)):
+        for path in paths:
+            node = None
+            children = tree
+            for segment in path.split('.'):
+                node = children.setdefault(segment, [None, {}])
+                children = node[1]
+            node[0] = kind
+    return tree
+
+def _join_path(path, key):
+    return f"{path}.{key}" if path else str(key)
+
+def _walk_fields(tree, en_node, lang_node, path, lang, untranslated_fields, counter, verbose=True):
+    """同時走訪英文與其他語言的文件，依欄位樹比較每個欄位"""
+    for segment, (kind, children) in tree.items():
+        if segment == '*':
+            if isinstance(en_node, list):
+                lang_list = lang_node if isinstance(lang_node, list) else []
+                if len(en_node) != len(lang_list) and verbose:
+                    print(f"    ⚠️  {lang} - {path} 數量不匹配: EN={len(en_node)}, {lang}={len(lang_list)}")
+                items = [(f"{path}[{i}]", en_item, lang_list[i] if i < len(lang_list) else None)
+                         for i, en_item in enumerate(en_node)]
+            elif isinstance(en_node, dict):
+                lang_dict = lang_node if isinstance(lang_node, dict) else {}
+                items = [(_join_path(path, key), en_item, lang_dict.get(key))
+                         for key, en_item in en_node.items()]
+            else:
+                items = []
+        else:
+            items = [(
+                _join_path(path, segment),
+                en_node.get(segment) if isinstance(en_node, dict) else None,
+                lang_node.get(segment) if isinstance(lang_node, dict) else None,
+            )]
+
+        for field_path, en_value, lang_value in items:
+            if kind is not None:
+                counter[0] += 1
+                if kind == 'required':
+                    # 缺少欄位也算未翻譯
+                    is_same = en_value is None or lang_value is None or compare_values(en_value, lang_value)[0]
+                else:
+                    is_same = bool(en_value and lang_value) and compare_values(en_value, lang_value)[0]
+                if is_same:
+                    untranslated_fields.append(field_path)
+                    if verbose:
+                        print(f"    🔄 {lang} - {field_path}: 未翻譯")
+            if children:
+                _walk_fields(children, en_value, lang_value, field_path, lang, untranslated_fields, counter, verbose)
+
+_COMPILED_SCHEMAS = {}
+
+def compiled_schema(content_type):
+    """取得（並快取）某內容類型編譯後的欄位樹"""
+    if content_type not in _COMPILED_SCHEMAS:
+        schema = CONTENT_SCHEMAS[content_type]
+        _COMPILED_SCHEMAS[content_type] = compile_fields(schema['fields'], schema.get('optional_fields', ()))
+    return _COMPILED_SCHEMAS[content_type]
+
+def check_language(en_data, lang, lang_data, content_type='pbl', verbose=True):
+    """比較單一語言與英文版本，回傳 (未翻譯欄位, 翻譯狀況)"""
+    untranslated_fields = []
+    counter = [0]
+    _walk_fields(compiled_schema(content_type), en_data, lang_data, '', lang, untranslated_fields, counter, verbose)
+
+    # 計算翻譯狀況
+    total_fields = counter[0]
+    translated_fields = total_fields - len(untranslated_fields)
+    translation_rate = (translated_fields / total_fields * 100) if total_fields > 0 else 0
+
+    status = {
+        'total_fields': total_fields,
+        'translated_fields': translated_fields,
+        'untranslated_fields': len(untranslated_fields),
+        'translation_rate': round(translation_rate, 1)
+    }
+
+    if verbose:
+        status_icon = "✅" if translation_rate == 100 else "🔄" if translation_rate > 50 else "❌"
+        print(f"  {status_icon} {lang}: {translation_rate}% 翻譯完成 ({translated_fields}/{total_fields})")
+
+    return untranslated_fields, status
+
+def content_file(content_dir, content_type, lang):
+    """某份內容在某語言的文件路徑"""
+    file_name = CONTENT_SCHEMAS[content_type]['file'].format(id=content_dir.name, lang=lang)
+    return content_dir / file_name
+
+def list_content_dirs(base_dir, only=None):
+    """內容根目錄下的每份內容（略過 _ 開頭的樣板目錄）"""
+    dirs = [d for d in Path(base_dir).iterdir() if d.is_dir() and not d.name.startswith('_')]
+    if only is not None:
+        dirs = [d for d in dirs if d.name in only]
+    return sorted(dirs)
+
+def languages_for(content_id, only=None):
+    """需要檢查的語言（英文永遠載入作為基準）"""
+    if only is None:
+        return LANGUAGES
+    return [lang for lang in LANGUAGES if lang == 'en' or lang in only[content_id]]
+
+def collect_content_files(content_type, base_dir, only=None):
+    """列出需要載入的語言文件"""
+    files = []
+    for content_dir in list_content_dirs(base_dir, only):
+        for lang in languages_for(content_dir.name, only):
+            path = content_file(content_dir, content_type, lang)
+            if path.exists():
+                files.append(path)
+    return files
+
+def iter_content_records(content_type, content_dir, loaded, langs=LANGUAGES, verbose=True):
+    """逐一產生某份內容各語言的檢查結果，每筆即是 JSON Lines 報告的一行
+
+    {"type", "id", "lang", "translation_status", "untranslated_fields"}  已檢查
+    {"type", "id", "lang", "missing": true}                              缺少語言文件
+    {"type", "id", "lang", "error": "..."}                               無法載入（lang 為 en 時整份內容略過）
+    """
+    base = {'type': content_type, 'id': content_dir.name}
+
+    # 載入英文版本作為基準
+    en_file = content_file(content_dir, content_type, 'en')
+    if not en_file.exists():
+        if verbose:
+            print(f"  ❌ 英文版本不存在: {en_file}")
+        yield {**base, 'lang': 'en', 'error': '英文版本不存在'}
+        return
 
-    # 取得所有場景目錄
-    scenario_dirs = [d for d in scenarios_dir.iterdir() if d.is_dir() and not d.name.startswith('_')]
+    en_data = loaded.get(en_file)
+    if not en_data:
+        if verbose:
+            print(f"  ❌ 無法載入英文版本: {en_file}")
+        yield {**base, 'lang': 'en', 'error': '無法載入英文版本'}
+        return
 
-    for scenario_dir in sorted(scenario_dirs):
-        scenario_name = scenario_dir.name
-        print(f"\n=== 檢查場景: {scenario_name} ===")
+    # 檢查每種語言
+    for lang in langs:
+        if lang == 'en':
+            continue
 
-        # 載入英文版本作為基準
-        en_file = scenario_dir / f"{scenario_name}_en.yaml"
-        if not en_file.exists():
-            print(f"  ❌ 英文版本不存在: {en_file}")
+        lang_file = content_file(content_dir, content_type, lang)
+
+        if not lang_file.exists():
+            if verbose:
+                print(f"  ❌ 缺少語言文件: {lang}")
+            yield {**base, 'lang': lang, 'missing': True}
             continue
 
-        en_data = load_yaml_file(en_file)
-        if not en_data:
-            print(f"  ❌ 無法載入英文版本: {en_file}")
+        lang_data = loaded.get(lang_file)
+        if not lang_data:
+            if verbose:
+                print(f"  ❌ 無法載入語言文件: {lang}")
+            yield {**base, 'lang': lang, 'error': '無法載入語言文件'}
             continue
 
-        scenario_results = {
+        untranslated_fields, status = check_language(en_data, lang, lang_data, content_type, verbose)
+        yield {**base, 'lang': lang, 'translation_status': status, 'untranslated_fields': untranslated_fields}
+
+def check_content_translations(content_type, base_dir, loaded, only=None):
+    """檢查某內容類型的翻譯狀況；loaded 為已解析的 {path: data}"""
+    label = CONTENT_SCHEMAS[content_type]['label']
+    results = {}
+
+    for content_dir in list_content_dirs(base_dir, only):
+        content_id = content_dir.name
+        print(f"\n=== 檢查{label}: {content_id} ===")
+
+        content_results = {
             'translation_status': {},
             'untranslated_fields': {},
             'missing_files': []
         }
 
-        # 檢查每種語言
-        for lang in LANGUAGES:
+        for record in iter_content_records(content_type, content_dir, loaded, languages_for(content_id, only)):
+            lang = record['lang']
             if lang == 'en':
-                continue
+                break
+            if record.get('missing'):
+                content_results['missing_files'].append(lang)
+            elif 'translation_status' in record:
+                content_results['untranslated_fields'][lang] = record['untranslated_fields']
+                content_results['translation_status'][lang] = record['translation_status']
+        else:
+            results[content_id] = content_results
 
-            lang_file = scenario_dir / f"{scenario_name}_{lang}.yaml"
+    return results
 
-            if not lang_file.exists():
-                print(f"  ❌ 缺少語言文件: {lang}")
-                scenario_results['missing_files'].append(lang)
+def check_scenario_translations(scenarios_dir, jobs=None, cache_dir=DEFAULT_CACHE_DIR, only=None):
+    """檢查所有場景的翻譯狀況；only={場景: {語言}} 時只檢查指定的組合"""
+    files = collect_content_files('pbl', scenarios_dir, only)
+    loaded = load_yaml_files(files, jobs=jobs, cache_dir=cache_dir)
+    return check_content_translations('pbl', scenarios_dir, loaded, only)
+
+def check_all_translations(base_dirs, jobs=None, cache_dir=DEFAULT_CACHE_DIR, only=None):
+    """一次平行解析並檢查多種內容類型；base_dirs={類型: 根目錄}，回傳 {類型: 結果}"""
+    only = only or {}
+    files = []
+    for content_type, base_dir in base_dirs.items():
+        files += collect_content_files(content_type, base_dir, only.get(content_type))
+    loaded = load_yaml_files(files, jobs=jobs, cache_dir=cache_dir)
+    return {
+        content_type: check_content_translations(content_type, base_dir, loaded, only.get(content_type))
+        for content_type, base_dir in base_dirs.items()
+    }
+
+def _check_content_worker(task):
+    """在 worker process 中載入並檢查一份內容，回傳該內容的所有紀錄"""
+    content_type, content_dir, langs, cache_dir = task
+    paths = [content_file(content_dir, content_type, lang) for lang in langs]
+    loaded = load_yaml_files([p for p in paths if p.exists()], jobs=1, cache_dir=cache_dir)
+    return list(iter_content_records(content_type, content_dir, loaded, langs, verbose=False))
+
+def stream_translations(base_dirs, output_file, jobs=None, cache_dir=DEFAULT_CACHE_DIR):
+    """以 JSON Lines 串流寫出檢查結果，每份內容完成後立即寫入並 flush；回傳寫入的紀錄數
+
+    每份內容由 worker 各自載入與檢查，主程序只保留目前這份內容的結果，
+    記憶體用量不隨內容數量成長；中途被中斷時已寫入的行仍可讀取。
+    """
+    tasks = [
+        (content_type, content_dir, LANGUAGES, cache_dir)
+        for content_type, base_dir in base_dirs.items()
+        for content_dir in list_content_dirs(base_dir)
+    ]
+    jobs = jobs or os.cpu_count() or 1
+    written = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        if jobs > 1 and len(tasks) > 1:
+            pool = ProcessPoolExecutor(max_workers=jobs)
+            batches = pool.map(_check_content_worker, tasks)
+        else:
+            pool = None
+            batches = map(_check_content_worker, tasks)
+        try:
+            for records in batches:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                written += len(records)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    return written
+
+def iter_report_records(report_file):
+    """逐行讀取 JSON Lines 報告；中斷的執行可能留下不完整的最後一行，會略過"""
+    with open(report_file, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
                 continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"⚠️  {report_file}:{line_no} 不是完整的紀錄，報告可能被中斷")
+                return
+
+def render_stream_summary(records):
+    """從紀錄串流產生精簡摘要；每份內容的紀錄是連續的，只需保留目前內容與各語言統計"""
+    stats = {}  # 類型 -> 語言 -> [完成, 部分, 缺失]
+    current = None
+    line = []
+
+    def flush():
+        if current is not None:
+            print(f"🎯 {current[0]}/{current[1]}: " + (' '.join(line) or '✅ 全部完成'))
+
+    for record in records:
+        key = (record['type'], record['id'])
+        if key != current:
+            flush()
+            current, line = key, []
+        lang = record['lang']
+        if lang == 'en':
+            line.append(f"❌ {record['error']}")
+            continue
+        counts = stats.setdefault(record['type'], {}).setdefault(lang, [0, 0, 0])
+        if record.get('missing'):
+            counts[2] += 1
+            line.append(f"❌{lang}")
+        elif 'translation_status' in record:
+            rate = record['translation_status']['translation_rate']
+            counts[0 if rate == 100 else 1] += 1
+            if rate < 100:
+                line.append(f"🔄{lang} {rate}%")
+        else:
+            line.append(f"⚠️{lang}")
+    flush()
 
-            lang_data = load_yaml_file(lang_file)
-            if not lang_data:
-                print(f"  ❌ 無法載入語言文件: {lang}")
-                continue
+    for content_type, langs in stats.items():
+        print(f"\n📈 {CONTENT_SCHEMAS[content_type]['label']} ({content_type}):")
+        for lang in LANGUAGES:
+            if lang in langs:
+                completed, partial, missing = langs[lang]
+                total = completed + partial + missing
+                if not total:
+                    continue  # 只有無法載入的文件
+                print(f"{lang:5s}: ✅完成 {completed:2d} | 🔄部分 {partial:2d} | ❌缺失 {missing:2d} | "
+                      f"完成率 {completed / total * 100:5.1f}%")
+
+def changed_translation_pairs(scenarios_dir, since, content_type='pbl'):
+    """依 git diff 找出自 since 以來變更的 (場景, 語言)，英文變更時該場景所有語言都要重查"""
+    scenarios_dir = Path(scenarios_dir).resolve()
+    file_template = CONTENT_SCHEMAS[content_type]['file']
+
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=scenarios_dir, capture_output=True,
+                              text=True, check=True).stdout.splitlines()
+
+    top = Path(git('rev-parse', '--show-toplevel')[0])
+    changed = git('diff', '--name-only', since, '--', '.')
+    changed += git('ls-files', '--others', '--exclude-standard', '--full-name', '--', '.')
+
+    lang_pattern = '|'.join(LANGUAGES)
+    pairs = {}
+    for rel in changed:
+        try:
+            parts = (top / rel).relative_to(scenarios_dir).parts
+        except ValueError:
+            continue
+        if len(parts) != 2:
+            continue
+        scenario = parts[0]
+        file_pattern = re.escape(file_template).replace(r'\{id\}', re.escape(scenario))
+        file_pattern = file_pattern.replace(r'\{lang\}', f'({lang_pattern})')
+        match = re.fullmatch(file_pattern, parts[1])
+        if not match:
+            continue
+        lang = match.group(1)
+        if lang == 'en':
+            pairs[scenario] = {other for other in LANGUAGES if other != 'en'}
+        else:
+            pairs.setdefault(scenario, set()).add(lang)
+    return pairs
+
+def is_content_report(report):
+    """單一類型報告為 {內容: 結果}，每個結果都有 translation_status；多類型報告則多包一層 {類型: ...}"""
+    return isinstance(report, dict) and all(
+        isinstance(result, dict) and 'translation_status' in result for result in report.values()
+    )
+
+def previous_report_for(report, types):
+    """把既有報告轉成 {類型: {內容: 結果}}；格式與這次要檢查的類型不符時回傳 None"""
+    if types == ['pbl']:
+        return {'pbl': report} if is_content_report(report) else None
+    # 空的多類型報告無法和單一 PBL 報告區分，寧可重跑一次完整檢查
+    if not isinstance(report, dict) or not report or is_content_report(report):
+        return None
+    if any(content_type not in report or not is_content_report(report[content_type]) for content_type in types):
+        return None
+    return report
 
-            # 檢查基本欄位
-            untranslated_fields = []
+def merge_results(previous, updates, only):
+    """把部分重查的結果合併進先前的完整報告，順序與完整檢查一致"""
+    merged = dict(previous)
+    order = {lang: i for i, lang in enumerate(LANGUAGES)}
 
-            for field_path in KEY_FIELDS:
-                is_different, details = compare_field_values(en_data, lang_data, field_path)
-                if not is_different:
-                    untranslated_fields.append(field_path)
-                    print(f"    🔄 {lang} - {field_path}: 未翻譯")
-
-            # 檢查任務欄位
-            en_tasks = en_data.get('tasks', [])
-            lang_tasks = lang_data.get('tasks', [])
-
-            if len(en_tasks) != len(lang_tasks):
-                print(f"    ⚠️  {lang} - 任務數量不匹配: EN={len(en_tasks)}, {lang}={len(lang_tasks)}")
-
-            for i, (en_task, lang_task) in enumerate(zip(en_tasks, lang_tasks)):
-                for field in TASK_FIELDS:
-                    en_value = en_task.get(field)
-                    lang_value = lang_task.get(field)
-
-                    if en_value and lang_value:
-                        # 處理字串欄位
-                        if isinstance(en_value, str) and isinstance(lang_value, str):
-                            if en_value.strip() == lang_value.strip():
-                                task_field = f"tasks[{i}].{field}"
-                                untranslated_fields.append(task_field)
-                                print(f"    🔄 {lang} - {task_field}: 未翻譯")
-                        # 處理其他類型欄位
-                        elif en_value == lang_value:
-                            task_field = f"tasks[{i}].{field}"
-                            untranslated_fields.append(task_field)
-                            print(f"    🔄 {lang} - {task_field}: 未翻譯")
-
-            scenario_results['untranslated_fields'][lang] = untranslated_fields
-
-            # 計算翻譯狀況
-            total_fields = len(KEY_FIELDS) + len(en_tasks) * len(TASK_FIELDS)
-            translated_fields = total_fields - len(untranslated_fields)
-            translation_rate = (translated_fields / total_fields * 100) if total_fields > 0 else 0
-
-            scenario_results['translation_status'][lang] = {
-                'total_fields': total_fields,
-                'translated_fields': translated_fields,
-                'untranslated_fields': len(untranslated_fields),
-                'translation_rate': round(translation_rate, 1)
-            }
-
-            status_icon = "✅" if translation_rate == 100 else "🔄" if translation_rate > 50 else "❌"
-            print(f"  {status_icon} {lang}: {translation_rate}% 翻譯完成 ({translated_fields}/{total_fields})")
-
-        results[scenario_name] = scenario_results
+    for scenario, langs in only.items():
+        if scenario not in updates:
+            # 英文版本被刪除或無法載入，完整檢查也不會列出這個場景
+            merged.pop(scenario, None)
+            continue
 
-    return results
+        new = updates[scenario]
+        old = merged.get(scenario) or {'translation_status': {}, 'untranslated_fields': {}, 'missing_files': []}
+        for section in ('translation_status', 'untranslated_fields'):
+            section_data = {k: v for k, v in old[section].items() if k not in langs}
+            section_data.update(new[section])
+            old[section] = dict(sorted(section_data.items(), key=lambda item: order[item[0]]))
+        missing = [lang for lang in old['missing_files'] if lang not in langs] + new['missing_files']
+        old['missing_files'] = sorted(missing, key=order.get)
+        merged[scenario] = old
+
+    return dict(sorted(merged.items()))
 
-def generate_summary_report(results):
+def generate_summary_report(results, title="PBL場景翻譯狀況摘要報告"):
     """生成摘要報告"""
     print("\n" + "="*80)
-    print("📊 PBL場景翻譯狀況摘要報告")
+    print(f"📊 {title}")
     print("="*80)
 
     # 統計概要
@@ -233,18 +679,97 @@ def generate_summary_report(results):
                     fields_str += f" (+{remaining} more)"
                 print(f"      🔄 未翻譯欄位: {fields_str}")
 
-def main():
-    scenarios_dir = "/Users/young/project/ai-square/frontend/public/pbl_data/scenarios"
-
-    print("🔍 開始檢查PBL場景翻譯狀況...")
-    print(f"📁 場景目錄: {scenarios_dir}")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='檢查PBL場景的翻譯狀況')
+    parser.add_argument('scenarios_dir', nargs='?', default=DEFAULT_SCENARIOS_DIR, type=Path,
+                        help='場景根目錄 (預設: frontend/public/pbl_data/scenarios)')
+    parser.add_argument('-t', '--types', default='pbl',
+                        help=f"要檢查的內容類型，以逗號分隔或 all (可用: {', '.join(CONTENT_SCHEMAS)}；預設: pbl)")
+    parser.add_argument('--content-root', default=DEFAULT_CONTENT_ROOT, type=Path,
+                        help='其他內容類型的根目錄 (預設: frontend/public)')
+    parser.add_argument('-o', '--output', default=DEFAULT_REPORT_FILE, type=Path,
+                        help='JSON 報告輸出路徑')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='平行解析的 process 數量 (預設: CPU 數量, 1 = 不平行)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, type=Path,
+                        help='解析結果快取目錄')
+    parser.add_argument('--no-cache', action='store_true', help='不使用解析快取')
+    parser.add_argument('--since', metavar='GIT_REF',
+                        help='只重查自此 git ref 以來變更的文件，並合併進既有報告')
+    parser.add_argument('--jsonl', metavar='FILE', type=Path,
+                        help='以 JSON Lines 串流寫出每個 (內容, 語言) 的結果，取代 JSON 報告')
+    parser.add_argument('--summary', metavar='FILE', type=Path,
+                        help='只讀取既有的 JSON Lines 報告並顯示精簡摘要')
+    args = parser.parse_args(argv)
+    if args.jsonl and args.since:
+        parser.error("--since 無法與 --jsonl 同時使用")
+    args.types = list(CONTENT_SCHEMAS) if args.types == 'all' else args.types.split(',')
+    unknown = [t for t in args.types if t not in CONTENT_SCHEMAS]
+    if unknown:
+        parser.error(f"未知的內容類型: {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.summary:
+        render_stream_summary(iter_report_records(args.summary))
+        return
+    scenarios_dir = args.scenarios_dir
+    cache_dir = None if args.no_cache else args.cache_dir
+    # 只檢查 PBL 時維持原本的報告格式 {場景: 結果}，多種類型時為 {類型: {內容: 結果}}
+    single_pbl = args.types == ['pbl']
+    base_dirs = {
+        content_type: scenarios_dir if content_type == 'pbl' else args.content_root / CONTENT_SCHEMAS[content_type]['dir']
+        for content_type in args.types
+    }
+
+    print("🔍 開始檢查PBL場景翻譯狀況..." if single_pbl else f"🔍 開始檢查翻譯狀況: {', '.join(args.types)}")
+    for content_type, base_dir in base_dirs.items():
+        print(f"📁 {CONTENT_SCHEMAS[content_type]['label']}目錄: {base_dir}")
     print(f"🌐 檢查語言: {', '.join(LANGUAGES)}")
 
-    results = check_scenario_translations(scenarios_dir)
-    generate_summary_report(results)
+    if args.jsonl:
+        written = stream_translations(base_dirs, args.jsonl, jobs=args.jobs, cache_dir=cache_dir)
+        render_stream_summary(iter_report_records(args.jsonl))
+        print(f"\n💾 {written} 筆結果已串流寫入: {args.jsonl}")
+        return
+
+    previous = None
+    if args.since:
+        if args.output.exists():
+            with open(args.output, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        else:
+            print(f"⚠️  找不到先前的報告 {args.output}，改為完整檢查")
+
+    if previous is not None:
+        previous = previous_report_for(previous, args.types)
+        if previous is None:
+            print(f"⚠️  先前的報告 {args.output} 與這次檢查的內容類型格式不符，改為完整檢查")
+
+    if previous is not None:
+        only = {
+            content_type: changed_translation_pairs(base_dir, args.since, content_type)
+            for content_type, base_dir in base_dirs.items()
+        }
+        changed = sum(len(langs) for pairs in only.values() for langs in pairs.values())
+        print(f"🔀 自 {args.since} 以來變更: {changed} 個 (內容, 語言) 組合")
+        updates = check_all_translations(base_dirs, jobs=args.jobs, cache_dir=cache_dir, only=only)
+        results = {
+            content_type: merge_results(previous.get(content_type, {}), updates[content_type], only[content_type])
+            for content_type in base_dirs
+        }
+    else:
+        results = check_all_translations(base_dirs, jobs=args.jobs, cache_dir=cache_dir)
+
+    for content_type, type_results in results.items():
+        title = "PBL場景翻譯狀況摘要報告" if content_type == 'pbl' else f"{CONTENT_SCHEMAS[content_type]['label']}翻譯狀況摘要報告"
+        generate_summary_report(type_results, title)
+    if single_pbl:
+        results = results['pbl']
 
     # 保存詳細結果到JSON文件
-    output_file = "/Users/young/project/ai-square/translation_report.json"
+    output_file = args.output
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
 
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Near-copy / Wrong-script Translation Detector
+找出「看起來有翻譯、其實沒翻」的欄位
+
+check_translations.py 只在欄位與英文完全相同時才判定未翻譯，這裡對每個文字欄位與其英文
+來源做以下檢查：
+
+  script     Unicode 文字系統分布：ja 欄位全是拉丁字母、ko 欄位裡是漢字、
+             ja 長句完全沒有假名（通常是誤貼中文）等
+  near_copy  以字元 shingle 的 Jaccard 相似度找出只稍作修改的英文複本
+  copy       與英文完全相同（正規化空白與大小寫後）
+
+每個欄位只和自己的英文來源比較（約 4 萬組短字串），不是全語料兩兩比對，因此直接以 set
+計算精確的 Jaccard：每組只需一次交集與聯集，比替每個 shingle 算上百個 MinHash 雜湊
+（即使用 NumPy 向量化）還便宜，結果也沒有估計誤差。文字系統分布以 str.translate 一次
+對應整段文字，整個語料庫約 2 秒即可完成。
+
+除了 frontend/public 下各語言分檔的內容 (CONTENT_SCHEMAS)，也檢查
+cms/content/pbl_data/*_scenario.yaml 這類以欄位後綴 (title_zh, instructions_ja...)
+把所有語言放在同一份文件的內容。
+
+Usage: python3 scripts/detect_untranslated.py [--types pbl,discovery,...|all] [--cms-dir DIR]
+                                              [--threshold 0.7] [-o report.json]
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+from check_translations import (
+    CONTENT_SCHEMAS, DEFAULT_CACHE_DIR, DEFAULT_CONTENT_ROOT, LANGUAGES, REPO_ROOT,
+    collect_content_files, content_file, list_content_dirs, load_yaml_files,
+)
+
+DEFAULT_CMS_DIR = REPO_ROOT / 'cms' / 'content' / 'pbl_data'
+DEFAULT_REPORT_FILE = REPO_ROOT / 'translation_quality_report.json'
+
+# CMS 單一文件內的欄位後綴 -> 語言代碼
+CMS_SUFFIX_LANGUAGES = {
+    'zh': 'zhTW', 'zhTW': 'zhTW', 'zhCN': 'zhCN', 'ja': 'ja', 'ko': 'ko', 'es': 'es',
+    'fr': 'fr', 'de': 'de', 'it': 'it', 'pt': 'pt', 'ru': 'ru', 'ar': 'ar', 'th': 'th',
+}
+_CMS_SUFFIX = re.compile(r'^(.+)_(%s)$' % '|'.join(CMS_SUFFIX_LANGUAGES))
+
+# 文字系統代碼；其他字元（數字、標點、空白）不列入計算
+LATIN, HAN, KANA, HANGUL, CYRILLIC, ARABIC, THAI = 'LHKGCAT'
+SCRIPTS = LATIN + HAN + KANA + HANGUL + CYRILLIC + ARABIC + THAI
+
+_SCRIPT_RANGES = [
+    (LATIN, 0x41, 0x5A), (LATIN, 0x61, 0x7A), (LATIN, 0xC0, 0x24F), (LATIN, 0x1E00, 0x1EFF),
+    (CYRILLIC, 0x400, 0x4FF),
+    (ARABIC, 0x600, 0x6FF), (ARABIC, 0x750, 0x77F), (ARABIC, 0xFB50, 0xFDFF), (ARABIC, 0xFE70, 0xFEFF),
+    (THAI, 0xE00, 0xE7F),
+    (HANGUL, 0x1100, 0x11FF), (HANGUL, 0x3130, 0x318F), (HANGUL, 0xAC00, 0xD7AF),
+    (KANA, 0x3040, 0x30FF), (KANA, 0x31F0, 0x31FF), (KANA, 0xFF66, 0xFF9F),
+    (HAN, 0x3400, 0x4DBF), (HAN, 0x4E00, 0x9FFF), (HAN, 0xF900, 0xFAFF),
+]
+
+
+def _build_script_table():
+    """str.translate 用的對應表：BMP 內每個字元對應到文字系統代碼，其餘對應到空白"""
+    table = [' '] * 0x10000
+    for script, start, end in _SCRIPT_RANGES:
+        for codepoint in range(start, end + 1):
+            table[codepoint] = script
+    # 拉丁字母之間的 × ÷ 不是字母
+    table[0xD7] = table[0xF7] = ' '
+    return ''.join(table)
+
+
+_SCRIPT_TABLE = _build_script_table()
+
+# 各語言預期的文字系統
+LANGUAGE_SCRIPTS = {
+    'en': LATIN, 'es': LATIN, 'fr': LATIN, 'de': LATIN, 'it': LATIN, 'pt': LATIN, 'id': LATIN,
+    'zhTW': HAN, 'zhCN': HAN, 'ja': HAN + KANA, 'ko': HANGUL,
+    'ru': CYRILLIC, 'ar': ARABIC, 'th': THAI,
+}
+
+MIN_LETTERS = 4          # 少於這個字母數的文字不判斷文字系統
+MIN_KANA_CHECK = 20      # ja 句子有這麼多漢字卻沒有假名時，多半是中文（標題常全是漢字）
+SHINGLE_SIZE = 4
+MIN_SHINGLE_CHARS = 20   # 太短的文字（名稱、縮寫）不做相似度比對
+DEFAULT_THRESHOLD = 0.7
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def script_profile(text):
+    """各文字系統的字元數 {代碼: 數量}"""
+    mapped = text.translate(_SCRIPT_TABLE)
+    return {script: mapped.count(script) for script in SCRIPTS}
+
+
+def script_issue(lang, profile):
+    """文字系統不符合語言時回傳原因，否則 None"""
+    expected = LANGUAGE_SCRIPTS.get(lang)
+    if expected is None:
+        return None
+    letters = sum(profile.values())
+    if letters < MIN_LETTERS:
+        return None
+    native = sum(profile[s] for s in expected)
+    if native == 0:
+        return 'no_native_script'
+    # 拉丁字母在非拉丁語言中常是專有名詞 (AI, ChatGPT)，只比較非拉丁的外來文字
+    foreign = sum(count for s, count in profile.items() if s not in expected and s != LATIN)
+    if expected == LATIN:
+        foreign = letters - native
+    if foreign > native:
+        return 'foreign_script'
+    if lang == 'ja' and profile[KANA] == 0 and profile[HAN] >= MIN_KANA_CHECK:
+        return 'missing_kana'
+    return None
+
+
+def normalize_text(text):
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+def shingles(text):
+    """字元 shingle 集合（跨文字系統都適用，不需要分詞）"""
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def similarity(en_text, other_text):
+    """兩段正規化文字的 shingle Jaccard 相似度"""
+    a, b = shingles(en_text), shingles(other_text)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def is_translatable(text):
+    """略過 id、KSA 代碼、網址、時間戳記這類不含空白的單一詞彙"""
+    return ' ' in text.strip()
+
+
+def iter_text_pairs(en_node, lang_node, path=''):
+    """同時走訪英文與譯文，產生結構位置相同的 (路徑, 英文, 譯文) 字串組合"""
+    if isinstance(en_node, str):
+        if isinstance(lang_node, str):
+            yield path, en_node, lang_node
+    elif isinstance(en_node, dict):
+        if isinstance(lang_node, dict):
+            for key, en_value in en_node.items():
+                if key in lang_node:
+                    yield from iter_text_pairs(en_value, lang_node[key], f"{path}.{key}" if path else str(key))
+    elif isinstance(en_node, list):
+        if isinstance(lang_node, list):
+            for i, (en_value, lang_value) in enumerate(zip(en_node, lang_node)):
+                yield from iter_text_pairs(en_value, lang_value, f"{path}[{i}]")
+
+
+def iter_suffixed_pairs(node, path=''):
+    """CMS 文件中 title / title_zh 這類並列欄位，產生 (語言, 路徑, 英文, 譯文)"""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            child_path = f"{path}.{key}" if path else str(key)
+            match = _CMS_SUFFIX.match(str(key))
+            if match and match.group(1) in node:
+                lang = CMS_SUFFIX_LANGUAGES[match.group(2)]
+                base_path = f"{path}.{match.group(1)}" if path else match.group(1)
+                for pair_path, en_text, lang_text in iter_text_pairs(node[match.group(1)], value, base_path):
+                    yield lang, pair_path, en_text, lang_text
+            else:
+                yield from iter_suffixed_pairs(value, child_path)
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            yield from iter_suffixed_pairs(value, f"{path}[{i}]")
+
+
+def score_pair(lang, en_text, lang_text, threshold=DEFAULT_THRESHOLD):
+    """檢查一組英文/譯文，有問題時回傳 (類別, 分數或原因)，否則 None"""
+    if not is_translatable(en_text):
+        return None
+    en_norm, lang_norm = normalize_text(en_text), normalize_text(lang_text)
+    if en_norm == lang_norm:
+        return 'copy', 1.0
+    issue = script_issue(lang, script_profile(lang_text))
+    if issue is not None:
+        return 'script', issue
+    if min(len(en_norm), len(lang_norm)) >= MIN_SHINGLE_CHARS:
+        score = similarity(en_norm, lang_norm)
+        if score >= threshold:
+            return 'near_copy', round(score, 3)
+    return None
+
+
+def finding(content_type, content_id, lang, path, kind, detail, lang_text):
+    return {
+        'type': content_type,
+        'id': content_id,
+        'lang': lang,
+        'path': path,
+        'kind': kind,
+        'detail': detail,
+        'text': lang_text if len(lang_text) <= 120 else lang_text[:117] + '...',
+    }
+
+
+def detect_content(content_type, base_dir, loaded, threshold=DEFAULT_THRESHOLD):
+    """檢查某內容類型每個語言文件的每個文字欄位"""
+    findings = []
+    pairs = 0
+    for content_dir in list_content_dirs(base_dir):
+        en_data = loaded.get(content_file(content_dir, content_type, 'en'))
+        if not en_data:
+            continue
+        for lang in LANGUAGES[1:]:
+            lang_data = loaded.get(content_file(content_dir, content_type, lang))
+            if not lang_data:
+                continue
+            for path, en_text, lang_text in iter_text_pairs(en_data, lang_data):
+                pairs += 1
+                result = score_pair(lang, en_text, lang_text, threshold)
+                if result is not None:
+                    findings.append(finding(content_type, content_dir.name, lang, path, *result, lang_text))
+    return findings, pairs
+
+
+def detect_cms(cms_dir, loaded, threshold=DEFAULT_THRESHOLD):
+    """檢查 CMS 以後綴並列多語言的場景文件"""
+    findings = []
+    pairs = 0
+    for path in sorted(Path(cms_dir).glob('*_scenario.yaml')):
+        data = loaded.get(path)
+        if not data or path.name.startswith('_'):
+            continue
+        content_id = path.name[:-len('_scenario.yaml')]
+        for lang, field_path, en_text, lang_text in iter_suffixed_pairs(data):
+            pairs += 1
+            result = score_pair(lang, en_text, lang_text, threshold)
+            if result is not None:
+                findings.append(finding('cms', content_id, lang, field_path, *result, lang_text))
+    return findings, pairs
+
+
+def print_summary(findings, pairs, elapsed):
+    """依內容與類別列出問題"""
+    print("\n" + "="*80)
+    print("🔎 翻譯品質檢查摘要")
+    print("="*80)
+    print(f"\n檢查欄位: {pairs}，發現問題: {len(findings)}，耗時 {elapsed:.2f}s")
+
+    by_kind = {}
+    for item in findings:
+        by_kind[item['kind']] = by_kind.get(item['kind'], 0) + 1
+    for kind, count in sorted(by_kind.items()):
+        print(f"  {kind}: {count}")
+
+    # 完全相同的複本數量很多，只列出各語言的數量；其餘問題逐筆列出
+    counts = {}
+    for item in findings:
+        content = counts.setdefault(f"{item['type']}/{item['id']}", {})
+        content[item['lang']] = content.get(item['lang'], 0) + 1
+    for content, langs in counts.items():
+        print(f"\n📄 {content}: " + ', '.join(f"{lang} {count}" for lang, count in langs.items()))
+        for item in findings:
+            if item['kind'] != 'copy' and f"{item['type']}/{item['id']}" == content:
+                print(f"  [{item['lang']}] {item['kind']} ({item['detail']}) {item['path']}: {item['text']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='找出近似英文複本或文字系統錯誤的翻譯欄位')
+    parser.add_argument('-t', '--types', default='all',
+                        help=f"要檢查的內容類型，以逗號分隔或 all (可用: {', '.join(CONTENT_SCHEMAS)}；預設: all)")
+    parser.add_argument('--content-root', default=DEFAULT_CONTENT_ROOT, type=Path,
+                        help='內容根目錄 (預設: frontend/public)')
+    parser.add_argument('--cms-dir', default=DEFAULT_CMS_DIR, type=Path,
+                        help='CMS 多語言場景目錄 (預設: cms/content/pbl_data)')
+    parser.add_argument('--no-cms', action='store_true', help='不檢查 CMS 場景')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'near_copy 的 Jaccard 相似度門檻 (預設: {DEFAULT_THRESHOLD})')
+    parser.add_argument('-o', '--output', default=DEFAULT_REPORT_FILE, type=Path,
+                        help='詳細報告輸出路徑 (預設: translation_quality_report.json)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='解析 YAML 的平行 process 數 (預設: CPU 核心數)')
+    parser.add_argument('--no-cache', action='store_true', help='不使用解析結果快取')
+    args = parser.parse_args(argv)
+    args.types = list(CONTENT_SCHEMAS) if args.types == 'all' else args.types.split(',')
+    unknown = [t for t in args.types if t not in CONTENT_SCHEMAS]
+    if unknown:
+        parser.error(f"未知的內容類型: {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache_dir = None if args.no_cache else DEFAULT_CACHE_DIR
+    start = time.perf_counter()
+
+    base_dirs = {t: args.content_root / CONTENT_SCHEMAS[t]['dir'] for t in args.types}
+    files = []
+    for content_type, base_dir in base_dirs.items():
+        files += collect_content_files(content_type, base_dir)
+    cms_files = [] if args.no_cms else sorted(Path(args.cms_dir).glob('*_scenario.yaml'))
+    loaded = load_yaml_files(files + cms_files, jobs=args.jobs, cache_dir=cache_dir)
+
+    findings = []
+    pairs = 0
+    for content_type, base_dir in base_dirs.items():
+        type_findings, type_pairs = detect_content(content_type, base_dir, loaded, args.threshold)
+        findings += type_findings
+        pairs += type_pairs
+    if cms_files:
+        cms_findings, cms_pairs = detect_cms(args.cms_dir, loaded, args.threshold)
+        findings += cms_findings
+        pairs += cms_pairs
+
+    print_summary(findings, pairs, time.perf_counter() - start)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'fields_checked': pairs, 'findings': findings}, f, ensure_ascii=False, indent=2)
+    print(f"\n📄 詳細報告已保存至: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
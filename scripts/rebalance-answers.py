@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Rebalance correct-answer positions in assessment question banks.
+
+Builds on analyze-answer-distribution.py: the English bank's questions (from
+analyze_question_file) are assigned a target option each so that
+
+  - every option holds floor(n/k) or ceil(n/k) answers (20-30% for 4 options when n allows)
+  - the same holds within every domain and every difficulty, so position carries no signal
+  - no option appears 3 times in a row and no short cycle repeats (ABAB, ABCABC, ABCDABCD)
+
+The assignment is a depth-first search in question order with capacity pruning. It prefers
+keeping each question's current answer, so balanced banks are left almost untouched.
+
+Every language file of the bank (and the CMS master file) is then rewritten consistently:
+in each file the option holding that file's correct answer is swapped with the target slot,
+in `options` and every `options_<lang>` mapping. Files are edited line by line so comments
+and formatting survive, and each rewrite is re-parsed and checked before it is written.
+
+Usage: python3 scripts/rebalance-answers.py [FILE_OR_DIR ...] [--write] [--seed N]
+"""
+
+import argparse
+import copy
+import importlib.util
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+from scipy.stats import chi2 as chi2_dist
+
+# The analyzer's file name is not importable as a module name
+_spec = importlib.util.spec_from_file_location(
+    'analyze_answer_distribution', Path(__file__).resolve().parent / 'analyze-answer-distribution.py')
+analyzer = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(analyzer)
+
+MAX_RUN = 2                 # longest allowed streak of the same option
+MAX_CYCLE = 4               # forbid back-to-back repeats of any block up to this length
+KEEP_BONUS = 3.0            # preference for a question's current answer, in "answers behind schedule"
+MAX_NODES = 200000          # search budget per attempt before restarting with another seed
+MAX_ATTEMPTS = 5
+OPTIMIZE_NODES = 20000      # extra nodes spent looking for an assignment that moves fewer answers
+
+_ID_LINE = re.compile(r'^(?P<indent>\s*)-\s+id:\s*["\']?(?P<id>[^"\'#\s]+)["\']?\s*(#.*)?$')
+_ANSWER_LINE = re.compile(r'^(?P<prefix>\s*correct_answer:\s*["\']?)(?P<answer>[A-Za-z])(?P<suffix>["\']?\s*(#.*)?)$')
+_OPTIONS_LINE = re.compile(r'^(?P<indent>\s*)options(_[A-Za-z]+)?:\s*(#.*)?$')
+_OPTION_ENTRY = re.compile(r'^(?P<key>\s*["\']?(?P<letter>[A-Za-z])["\']?:)(?P<rest>.*)$')
+
+
+class RebalanceError(Exception):
+    """Raised when no assignment satisfies the constraints or a file cannot be rewritten safely"""
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _is_content(line: str) -> bool:
+    return bool(line.strip()) and not line.lstrip().startswith('#')
+
+
+class _Group:
+    """Per-option counters and floor/ceil bounds for one set of questions (whole bank, a domain, ...)"""
+
+    def __init__(self, size: int, n_options: int, wants: List[int]):
+        self.size = size
+        self.wants = wants  # unassigned members whose current answer is each option
+        self.lo = size // n_options
+        self.hi = -(-size // n_options)
+        self.counts = [0] * n_options
+        self.remaining = size
+        self.deficit = self.lo * n_options
+
+    def lag(self, option: int) -> float:
+        """How far an option is ahead (+) or behind (-) an even share of the questions assigned so far"""
+        return self.counts[option] - (self.size - self.remaining) / len(self.counts)
+
+    def allows(self, option: int) -> bool:
+        if self.counts[option] >= self.hi:
+            return False
+        # Every option must still be able to reach its floor with the questions left after this one
+        deficit = self.deficit - (1 if self.counts[option] < self.lo else 0)
+        return deficit <= self.remaining - 1
+
+    def forced_moves(self) -> int:
+        """Lower bound on answers that must still move: members wanting an option beyond its capacity"""
+        return sum(max(0, want - (self.hi - count)) for want, count in zip(self.wants, self.counts))
+
+    def push(self, option: int, current: int) -> None:
+        if self.counts[option] < self.lo:
+            self.deficit -= 1
+        self.counts[option] += 1
+        self.remaining -= 1
+        if current >= 0:
+            self.wants[current] -= 1
+
+    def pop(self, option: int, current: int) -> None:
+        self.counts[option] -= 1
+        self.remaining += 1
+        if self.counts[option] < self.lo:
+            self.deficit += 1
+        if current >= 0:
+            self.wants[current] += 1
+
+
+def _breaks_sequence(sequence: List[int], option: int) -> bool:
+    """Would appending option create a streak longer than MAX_RUN or a repeated block (ABAB...)?"""
+    if len(sequence) >= MAX_RUN and all(s == option for s in sequence[-MAX_RUN:]):
+        return True
+    candidate_tail = sequence[-(2 * MAX_CYCLE - 1):] + [option]
+    for size in range(2, MAX_CYCLE + 1):
+        if len(candidate_tail) >= 2 * size and candidate_tail[-size:] == candidate_tail[-2 * size:-size]:
+            return True
+    return False
+
+
+def solve_assignment(questions: Sequence[Dict], options: Sequence[str], seed: Optional[int] = None) -> List[int]:
+    """
+    Target option index for every question, in order. Questions need 'answer', 'domain' and
+    'difficulty'; raises RebalanceError when the search budget runs out on every attempt.
+
+    Branch and bound on the number of answers that move: after the first feasible assignment
+    the search continues for OPTIMIZE_NODES more nodes, pruning branches that cannot beat it.
+    """
+    n_options = len(options)
+    option_index = {o: i for i, o in enumerate(options)}
+    current = [option_index.get(q['answer'], -1) for q in questions]
+    n = len(questions)
+
+    for attempt in range(MAX_ATTEMPTS):
+        rng = random.Random(None if seed is None else seed + attempt)
+        members: Dict[Tuple, List[int]] = {}
+        for i, q in enumerate(questions):
+            for key in (('all', None), ('domain', q.get('domain')), ('difficulty', q.get('difficulty'))):
+                members.setdefault(key, []).append(i)
+        groups = {}
+        for key, indexes in members.items():
+            wants = [0] * n_options
+            for i in indexes:
+                if current[i] >= 0:
+                    wants[current[i]] += 1
+            groups[key] = _Group(len(indexes), n_options, wants)
+        memberships = [[groups[('all', None)], groups[('domain', q.get('domain'))],
+                        groups[('difficulty', q.get('difficulty'))]] for q in questions]
+
+        best, best_moved = None, n + 1
+        sequence: List[int] = []
+        stack = []  # candidate options still to try at each depth
+        moved = 0
+        nodes = 0
+        while True:
+            depth = len(sequence)
+            advanced = False
+            if depth == n:
+                best, best_moved = list(sequence), moved
+                if moved == 0:
+                    break
+            else:
+                member_groups = memberships[depth]
+                if len(stack) == depth:
+                    # Fill the options furthest behind in this question's groups first, so every group
+                    # tracks an even share and the tail of the search is not left with conflicting needs
+                    stack.append(sorted(range(n_options), key=lambda o: (
+                        sum(g.lag(o) for g in member_groups) - (KEEP_BONUS if o == current[depth] else 0),
+                        rng.random())))
+                candidates = stack[depth]
+                while candidates:
+                    option = candidates.pop(0)
+                    nodes += 1
+                    cost = moved + (option != current[depth])
+                    if cost >= best_moved:
+                        continue
+                    if _breaks_sequence(sequence, option) or not all(g.allows(option) for g in member_groups):
+                        continue
+                    for g in member_groups:
+                        g.push(option, current[depth])
+                    if best is not None and cost + max(g.forced_moves() for g in groups.values()) >= best_moved:
+                        for g in member_groups:
+                            g.pop(option, current[depth])
+                        continue
+                    sequence.append(option)
+                    moved = cost
+                    advanced = True
+                    break
+                else:
+                    stack.pop()
+
+            if not advanced:
+                # Solution recorded or dead end: backtrack one question
+                if not sequence:
+                    break
+                option = sequence.pop()
+                depth = len(sequence)
+                moved -= option != current[depth]
+                for g in memberships[depth]:
+                    g.pop(option, current[depth])
+            if nodes > (MAX_NODES if best is None else OPTIMIZE_NODES):
+                break
+        if best is not None:
+            return best
+    raise RebalanceError(f"no balanced assignment found for {len(questions)} questions "
+                         f"after {MAX_ATTEMPTS} attempts")
+
+
+def swap_options(question: Dict, own: str, target: str) -> None:
+    """Swap two option slots in every options mapping of a parsed question and move correct_answer"""
+    for key, mapping in question.items():
+        if str(key).startswith('options') and isinstance(mapping, dict) and own in mapping and target in mapping:
+            mapping[own], mapping[target] = mapping[target], mapping[own]
+    question['correct_answer'] = target
+
+
+def _rewrite_options_block(lines: List[str], start: int, end: int, own: str, target: str) -> None:
+    """Swap the values of two entries in an options mapping spanning lines[start+1:end]"""
+    header_indent = _indent(lines[start])
+    entries: Dict[str, Tuple[int, int]] = {}
+    child_indent = None
+    i = start + 1
+    while i < end:
+        line = lines[i]
+        if _is_content(line) and _indent(line) <= header_indent:
+            break
+        match = _OPTION_ENTRY.match(line)
+        if match and (child_indent is None or _indent(line) == child_indent):
+            child_indent = _indent(line)
+            j = i + 1
+            while j < end and not (_is_content(lines[j]) and _indent(lines[j]) <= child_indent):
+                j += 1
+            entries[match.group('letter')] = (i, j)
+            i = j
+        else:
+            i += 1
+    if own not in entries or target not in entries:
+        return
+
+    def value_lines(letter):
+        first, stop = entries[letter]
+        return [_OPTION_ENTRY.match(lines[first]).group('rest')] + lines[first + 1:stop]
+
+    own_value, target_value = value_lines(own), value_lines(target)
+    # Replace the later entry first so the earlier one's line numbers stay valid
+    for letter, value in sorted(((own, target_value), (target, own_value)), key=lambda x: -entries[x[0]][0]):
+        first, stop = entries[letter]
+        key = _OPTION_ENTRY.match(lines[first]).group('key')
+        lines[first:stop] = [key + value[0]] + value[1:]
+
+
+def rewrite_question_file(text: str, changes: Dict[str, Tuple[str, str]]) -> str:
+    """Apply {question id: (own correct option, target option)} to a question file's text"""
+    lines = text.split('\n')
+    i = 0
+    while i < len(lines):
+        match = _ID_LINE.match(lines[i])
+        if not match or match.group('id') not in changes:
+            i += 1
+            continue
+        own, target = changes[match.group('id')]
+        block_indent = len(match.group('indent'))
+        end = i + 1
+        while end < len(lines) and not (_is_content(lines[end]) and _indent(lines[end]) <= block_indent):
+            end += 1
+        for j in range(i + 1, end):
+            answer = _ANSWER_LINE.match(lines[j])
+            if answer and answer.group('answer').lower() == own:
+                lines[j] = answer.group('prefix') + target + answer.group('suffix')
+            elif _OPTIONS_LINE.match(lines[j]):
+                before = len(lines)
+                _rewrite_options_block(lines, j, end, own, target)
+                end += len(lines) - before
+        i = end
+    return '\n'.join(lines)
+
+
+def plan_file(filepath: Path, targets: Dict[str, str]) -> Tuple[Optional[str], Dict[str, Tuple[str, str]], List[str]]:
+    """New text for one bank file (None when nothing changes), the swaps it applies and target ids it lacks"""
+    text = filepath.read_text(encoding='utf-8')
+    data = yaml.load(text, Loader=analyzer.YamlLoader) or {}
+    expected = copy.deepcopy(data)
+    changes = {}
+    found = set()
+    for q in analyzer.iter_questions(expected):
+        qid = str(q.get('id'))
+        own = str(q.get('correct_answer') or '').strip().lower()
+        if qid in targets and own:
+            found.add(qid)
+            if own != targets[qid]:
+                changes[qid] = (own, targets[qid])
+                swap_options(q, own, targets[qid])
+    missing = [qid for qid in targets if qid not in found]
+    if not changes:
+        return None, changes, missing
+
+    new_text = rewrite_question_file(text, changes)
+    if yaml.load(new_text, Loader=analyzer.YamlLoader) != expected:
+        raise RebalanceError(f"{filepath}: line-level rewrite does not match the intended swap, file left unchanged")
+    return new_text, changes, missing
+
+
+def association_p(groups: Sequence, answers: Sequence[int], n_options: int) -> float:
+    """Chi-square test of independence between answer position and a question attribute"""
+    labels = sorted({str(g) for g in groups})
+    if len(labels) < 2:
+        return 1.0
+    index = {label: i for i, label in enumerate(labels)}
+    table = np.zeros((len(labels), n_options))
+    np.add.at(table, ([index[str(g)] for g in groups], list(answers)), 1)
+    expected = table.sum(axis=1, keepdims=True) * table.sum(axis=0, keepdims=True) / table.sum()
+    mask = expected > 0
+    chi2 = float((((table - expected) ** 2)[mask] / expected[mask]).sum())
+    df = (len(labels) - 1) * (int((table.sum(axis=0) > 0).sum()) - 1)
+    return float(chi2_dist.sf(chi2, df)) if df > 0 else 1.0
+
+
+def print_plan(questions: List[Dict], options: List[str], before: List[int], after: List[int]):
+    """Before/after distribution, sequence and association statistics of the reference bank"""
+    codes = np.array([before, after], dtype=np.int8)
+    stats = analyzer.sequence_stats(codes, len(options))
+    print(f"  {'':7s} " + ' '.join(f"{o.upper():>4s}" for o in options) +
+          f" | {'max run':>7s} | {'domain p':>8s} | {'difficulty p':>12s} | sequence")
+    for row, label in enumerate(['before', 'after']):
+        answers = [a for a in codes[row] if a >= 0]
+        domain_p = association_p([q['domain'] for q, a in zip(questions, codes[row]) if a >= 0], answers, len(options))
+        difficulty_p = association_p([q['difficulty'] for q, a in zip(questions, codes[row]) if a >= 0],
+                                     answers, len(options))
+        sequence = ''.join(options[a].upper() if a >= 0 else '?' for a in codes[row])
+        print(f"  {label:7s} " + ' '.join(f"{p:3.0f}%" for p in stats['percentages'][row]) +
+              f" | {stats['longest_run'][row]:7d} | {domain_p:8.3f} | {difficulty_p:12.3f} | "
+              f"{sequence if len(sequence) <= 40 else sequence[:37] + '...'}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Rebalance correct-answer positions in question banks')
+    parser.add_argument('paths', nargs='*', type=Path,
+                        help='question files or directories (default: all assessment banks and the CMS master)')
+    parser.add_argument('--write', action='store_true', help='rewrite the files (default: only show the plan)')
+    parser.add_argument('--seed', type=int, default=0, help='tie-break seed, for reproducible plans')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    paths = args.paths or [analyzer.ASSESSMENT_DIR, analyzer.CMS_MASTER_FILE]
+    files: Dict[str, Dict[str, Path]] = {}
+    for filepath in analyzer.find_question_files(paths):
+        if filepath.exists():
+            bank, lang = analyzer.bank_label(filepath)
+            files.setdefault(bank, {})[lang] = filepath
+
+    failed = False
+    for bank, bank_files in files.items():
+        reference = bank_files.get(analyzer.REFERENCE_LANG)
+        if reference is None:
+            print(f"❌ {bank}: no {analyzer.REFERENCE_LANG} file to rebalance from")
+            failed = True
+            continue
+
+        analysis = analyzer.analyze_question_file(reference)
+        questions = analysis['questions']
+        options = list(analyzer.OPTIONS)
+        print(f"\n{'='*60}")
+        print(f"Bank: {bank} ({len(questions)} questions, reference: {reference.name})")
+        print(f"{'='*60}")
+
+        start = time.perf_counter()
+        try:
+            solution = solve_assignment(questions, options, seed=args.seed)
+        except RebalanceError as e:
+            print(f"❌ {e}")
+            failed = True
+            continue
+        elapsed = time.perf_counter() - start
+        before = [options.index(q['answer']) if q['answer'] in options else -1 for q in questions]
+        print_plan(questions, options, before, solution)
+        moved = sum(1 for b, a in zip(before, solution) if b != a)
+        print(f"\n  {moved} of {len(questions)} answers move (solved in {elapsed * 1000:.1f} ms)")
+
+        targets = {str(q['id']): options[option] for q, option in zip(questions, solution)}
+        for lang, filepath in sorted(bank_files.items()):
+            try:
+                new_text, changes, missing = plan_file(filepath, targets)
+            except (RebalanceError, yaml.YAMLError) as e:
+                print(f"  ❌ {lang}: {str(e).splitlines()[0]}")
+                failed = True
+                continue
+            if missing:
+                print(f"  ⚠️  {lang}: {len(missing)} questions not found or without an answer: {', '.join(missing)}")
+                failed = True
+            if new_text is None:
+                if not missing:
+                    print(f"  ✅ {lang}: already consistent")
+                continue
+            if args.write:
+                filepath.write_text(new_text, encoding='utf-8')
+            action = 'rewrote' if args.write else 'would rewrite'
+            print(f"  🔀 {lang}: {action} {len(changes)} questions")
+
+    if not args.write:
+        print("\nDry run, pass --write to rewrite the files")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()